@@ -0,0 +1,203 @@
+"""增量计算 public/assets 中文件的哈希并重新生成 resource-metadata.json
+
+哈希与 git 的 blob SHA-1 相同（即 GitHub 接口返回的文件 sha）。每个文件的
+(大小, 修改时间, inode) 保存在缓存中，只有新增或变化的文件才重新计算；大文件
+通过 mmap 读取，多个文件在线程池中并行计算（hashlib 计算时会释放 GIL）。
+
+清单条目的 hash 是管理后台用来标识资源的唯一 id（上传时为提交的 sha），不能改成
+内容哈希——相同内容的文件会得到相同的 id。内容哈希另存在 sha1 字段中，用于判断
+文件是否变化；已有条目的 hash 保持不变，新文件按路径生成唯一的 hash。
+"""
+import email.utils
+import hashlib
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from navcore import DEFAULT_ASSET_CACHE, DEFAULT_ASSET_DIR, DEFAULT_METADATA_PATH
+from navio import loads_json, write_json_atomic
+
+ASSET_URL_PREFIX = "/assets/"
+# 达到该大小的文件使用 mmap 读取
+MMAP_THRESHOLD = 1024 * 1024
+# 修改时间与缓存写入时间相差不到该值的条目下次仍重新计算，
+# 避免同一时间粒度内被再次修改却保持相同大小的文件被漏掉
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+CACHE_VERSION = 2
+
+
+def hash_file(path):
+    # 返回与 `git hash-object` 相同的十六进制 SHA-1
+    with open(path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        digest = hashlib.sha1(b"blob %d\0" % size)
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        elif size:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class AssetIndex:
+    # 资源目录（不含子目录）中每个文件的 [大小, 修改时间(ns), inode, 哈希]；
+    # 多个目录可以共用一个缓存文件，各自保存在以绝对路径为键的分区中
+    def __init__(self, directory=DEFAULT_ASSET_DIR, cache_path=DEFAULT_ASSET_CACHE, workers=None):
+        self.directory = directory
+        self.cache_path = cache_path
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.files = {}
+        self._scanned_ns = 0
+        if cache_path:
+            self._load_cache()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, 'rb') as file:
+                data = loads_json(file.read())
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError):
+            return {}  # 缓存损坏时全部重新计算
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("directories") or {}
+
+    def _load_cache(self):
+        section = self._read_cache().get(os.path.abspath(self.directory))
+        if isinstance(section, dict):
+            self.files = section.get("files") or {}
+            self._scanned_ns = section.get("scanned_ns", 0)
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        directories = self._read_cache()
+        directories[os.path.abspath(self.directory)] = {"scanned_ns": self._scanned_ns, "files": self.files}
+        write_json_atomic(self.cache_path, {"version": CACHE_VERSION, "directories": directories})
+
+    def refresh(self):
+        # 扫描目录并更新哈希，返回重新计算哈希的文件数
+        scanned_ns = time.time_ns()
+        racy_after = self._scanned_ns - RACY_WINDOW_NS
+        files = {}
+        to_hash = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+                cached = self.files.get(entry.name)
+                if cached and cached[:3] == signature and stat.st_mtime_ns < racy_after:
+                    files[entry.name] = cached
+                else:
+                    to_hash.append((entry.name, signature))
+
+        if to_hash:
+            paths = [os.path.join(self.directory, name) for name, _ in to_hash]
+            if len(to_hash) == 1:
+                digests = [hash_file(paths[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    digests = list(executor.map(hash_file, paths))
+            for (name, signature), digest in zip(to_hash, digests):
+                files[name] = [*signature, digest]
+
+        changed = files != self.files
+        self.files = files
+        if changed or to_hash:
+            self._scanned_ns = scanned_ns
+            self._save_cache()
+        return len(to_hash)
+
+    def digest(self, name):
+        entry = self.files.get(name)
+        return entry[3] if entry else None
+
+
+def _new_resource_id(path, used):
+    # 新文件的 hash：由路径得到的 40 位十六进制串，与已有的 id 不重复
+    seed = path
+    while True:
+        resource_id = hashlib.sha1(f"navsphere-asset\0{seed}".encode('utf-8')).hexdigest()
+        if resource_id not in used:
+            used.add(resource_id)
+            return resource_id
+        seed += "\0"
+
+
+def build_metadata(existing, files):
+    # 根据目录内容生成新的元数据列表：已记录的文件保持原有顺序、commit 和 hash，sha1
+    # 更新为当前内容的哈希；新文件按文件名倒序（文件名中的时间戳越新越靠前）插入到最前面；
+    # 已不存在的文件被移除。不在 /assets/ 下的条目原样保留
+    metadata = []
+    listed = set()
+    used = {entry.get("hash") for entry in existing.get("metadata") or [] if isinstance(entry, dict)}
+    for entry in existing.get("metadata") or []:
+        if not isinstance(entry, dict):
+            continue
+        path = entry.get("path", "")
+        if not path.startswith(ASSET_URL_PREFIX):
+            metadata.append(entry)
+            continue
+        name = path[len(ASSET_URL_PREFIX):]
+        if name not in files or name in listed:
+            continue
+        listed.add(name)
+        metadata.append(dict(entry, sha1=files[name][3]))
+
+    added = [{"commit": "", "hash": _new_resource_id(ASSET_URL_PREFIX + name, used),
+              "path": ASSET_URL_PREFIX + name, "sha1": files[name][3]}
+             for name in sorted(files, reverse=True) if name not in listed]
+    return added + metadata
+
+
+def regenerate_metadata(metadata_path=DEFAULT_METADATA_PATH, asset_dir=DEFAULT_ASSET_DIR,
+                        cache_path=DEFAULT_ASSET_CACHE, workers=None):
+    # 更新资源清单，内容没有变化时不写入文件；返回统计信息
+    started = time.perf_counter()
+    index = AssetIndex(asset_dir, cache_path, workers)
+    hashed = index.refresh()
+
+    try:
+        with open(metadata_path, 'rb') as file:
+            existing = loads_json(file.read())
+    except FileNotFoundError:
+        existing = {}
+    if not isinstance(existing, dict):
+        raise ValueError(f"{metadata_path} 的格式不正确")
+
+    old_paths = {entry.get("path"): entry.get("sha1") for entry in existing.get("metadata") or []
+                 if isinstance(entry, dict)}
+    metadata = build_metadata(existing, index.files)
+    new_paths = {entry["path"]: entry.get("sha1") for entry in metadata}
+
+    written = False
+    if metadata != existing.get("metadata"):
+        data = {
+            "commit": existing.get("commit", ""),
+            "generated": email.utils.formatdate(usegmt=True),
+            "metadata": metadata,
+        }
+        written = write_json_atomic(metadata_path, data)[0]
+
+    return {
+        "files": len(index.files),
+        "hashed": hashed,
+        "added": sum(1 for path in new_paths if path not in old_paths),
+        "removed": sum(1 for path in old_paths if path not in new_paths),
+        # 之前没有记录 sha1 的条目不算变化
+        "changed": sum(1 for path, digest in new_paths.items()
+                       if old_paths.get(path) is not None and old_paths[path] != digest),
+        "written": written,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def format_summary(summary):
+    text = (f"{summary['files']} 个文件，重新计算 {summary['hashed']} 个，新增 {summary['added']}，"
+            f"移除 {summary['removed']}，内容变化 {summary['changed']}，用时 {summary['elapsed_ms']} 毫秒")
+    return text + ("" if summary["written"] else "（清单无变化）")
@@ -0,0 +1,424 @@
+"""内容寻址、去重的 navigation.json 备份存储
+
+目录结构:
+    backups/objects/<前两位>/<sha256>.gz   压缩后的数据块（顶层字段或单个分类）
+    backups/snapshots/<时间戳>_<短哈希>.json  快照记录，引用若干数据块
+    backups/navigation_<时间戳>.json      旧版整文件备份，仍可列出和恢复
+    backups/manifest.jsonl               备份目录清单（时间、大小、哈希、条目数、与上一版的差异摘要）
+
+相邻版本中未变化的分类引用同一个数据块，因此每次备份只新增发生变化的分类。
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from navdiff import count_entries, diff_navigation
+from navio import WRITE_CHUNK_SIZE, iter_json_chunks, loads_json, write_bytes_atomic
+
+LEGACY_PREFIX = "navigation_"
+SNAPSHOT_DIR = "snapshots"
+OBJECT_DIR = "objects"
+MANIFEST_NAME = "manifest.jsonl"
+# 数据块文件名（sha256 十六进制 + .gz）；objects 下其他文件不是本存储创建的，清理时不动
+_OBJECT_NAME = re.compile(r"^[0-9a-f]{64}\.gz$")
+
+
+class BackupError(Exception):
+    pass
+
+
+class RetentionPolicy:
+    # 任一条件为 None 表示不限制；最新的快照总会保留。
+    # 旧版整文件备份默认不参与淘汰（不计入数量和大小），include_legacy 为真时才按同样的条件处理
+    def __init__(self, max_count=200, max_age_days=None, max_bytes=None, include_legacy=False):
+        self.max_count = max_count
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.include_legacy = include_legacy
+
+
+class BackupEntry:
+    __slots__ = ("name", "created", "kind", "path", "record", "info")
+
+    def __init__(self, name, created, kind, path, record=None, info=None):
+        self.name = name
+        self.created = created
+        self.kind = kind  # "snapshot" 或 "legacy"
+        self.path = path
+        self.record = record
+        self.info = info or {}  # 清单中的元数据
+
+    def matches(self, text):
+        # 按名称、时间或变化的分类标题过滤
+        text = text.lower()
+        if text in self.name.lower() or text in self.info.get("created", ""):
+            return True
+        return any(text in (change.get("title") or "").lower() for change in self.info.get("changes", []))
+
+
+class BackupStore:
+    def __init__(self, directory, policy=None):
+        self.directory = directory
+        self.policy = policy or RetentionPolicy()
+
+    # ---- 创建 ----
+
+    def create(self, source_path):
+        # 为磁盘上的文件创建快照；与最新快照内容相同时直接返回已有快照
+        with open(source_path, 'rb') as file:
+            raw = file.read()
+        snapshot_id = hashlib.sha256(raw).hexdigest()
+
+        entries = self.list()
+        if entries and entries[0].info.get("hash") == snapshot_id:
+            return entries[0]
+
+        data = _parse_navigation(raw)
+        parts = self._split(raw, data)
+        now = datetime.datetime.now()
+        record = {
+            "id": snapshot_id,
+            "created": now.isoformat(timespec="seconds"),
+            "source": os.path.basename(source_path),
+            "size": len(raw),
+            "parts": parts,
+        }
+        name = f"{now.strftime('%Y%m%d_%H%M%S_%f')}_{snapshot_id[:12]}"
+        path = os.path.join(self.directory, SNAPSHOT_DIR, f"{name}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps(record, ensure_ascii=False, indent=2).encode('utf-8')
+        write_bytes_atomic(path, [payload])
+
+        entry = BackupEntry(name, now, "snapshot", path, record)
+        entry.info = self._describe(entry, data, entries[0] if entries else None)
+        self._append_manifest(entry.info)
+        self.prune()
+        return entry
+
+    def _split(self, raw, data):
+        # 能按标准格式（indent=2）还原的文件按分类拆分存储，否则整体存储原始字节
+        if data is not None and b"".join(iter_json_chunks(data)) == raw:
+            categories = [self._put_object(_compact(category)) for category in data["navigationItems"]]
+            # 顶层字段保持原顺序，navigationItems 用 null 占位
+            meta = dict(data, navigationItems=None)
+            return {"format": "json", "meta": self._put_object(_compact(meta)), "categories": categories,
+                    "category_ids": [str(category.get("id")) if isinstance(category, dict) else None
+                                     for category in data["navigationItems"]]}
+        return {"format": "raw", "blob": self._put_object(raw)}
+
+    def _describe(self, entry, data, previous):
+        # 生成清单行：基本信息、条目统计，以及与上一个备份相比各分类的变化
+        record = self._load_record(entry) if entry.kind == "snapshot" else None
+        if record is not None:
+            size, digest = record["size"], record["id"]
+        else:
+            with open(entry.path, 'rb') as file:
+                raw = file.read()
+            size, digest = len(raw), hashlib.sha256(raw).hexdigest()
+        info = {"name": entry.name, "kind": entry.kind, "created": entry.created.isoformat(timespec="seconds"),
+                "size": size, "hash": digest, "categories": None, "items": None, "changes": []}
+        if data is None:
+            return info
+
+        info["categories"], info["items"] = count_entries(data)
+        previous_data = self._previous_view(previous, entry, data) if previous is not None else None
+        if previous_data is not None:
+            info["changes"] = [{"id": change["id"], "title": change["title"], "status": change["status"],
+                                "added": len(change["added"]), "removed": len(change["removed"]),
+                                "modified": len(change["modified"])}
+                               for change in diff_navigation(previous_data, data)]
+        return info
+
+    def _previous_view(self, previous, entry, data):
+        # 构造上一个备份的数据视图：数据块未变化的分类直接复用当前对象，只解压变化的分类
+        try:
+            previous_parts = self._load_record(previous)["parts"] if previous.kind == "snapshot" else {}
+            parts = entry.record["parts"] if entry.record else {}
+            if "category_ids" in previous_parts and "category_ids" in parts:
+                current = {category_id: (digest, category) for category_id, digest, category
+                           in zip(parts["category_ids"], parts["categories"], data["navigationItems"])}
+                categories = []
+                for category_id, digest in zip(previous_parts["category_ids"], previous_parts["categories"]):
+                    same = current.get(category_id)
+                    categories.append(same[1] if same and same[0] == digest else json.loads(self._get_object(digest)))
+                return {"navigationItems": categories}
+            return self.load_data(previous)
+        except (OSError, ValueError, BackupError):
+            return None
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, OBJECT_DIR, digest[:2], f"{digest}.gz")
+
+    def _put_object(self, payload):
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_bytes_atomic(path, [gzip.compress(payload, compresslevel=6, mtime=0)])
+        return digest
+
+    def _get_object(self, digest):
+        try:
+            with open(self._object_path(digest), 'rb') as file:
+                return gzip.decompress(file.read())
+        except FileNotFoundError:
+            raise BackupError(f"备份数据块缺失: {digest}")
+
+    # ---- 列出与读取 ----
+
+    def list(self):
+        # 从清单读取所有备份（含旧版整文件备份），最新的在前
+        rows = self._read_manifest()
+        if rows is None:
+            rows = self.rebuild_manifest()
+        entries = [self._entry_from_row(row) for row in rows]
+        entries.reverse()
+        return entries
+
+    def query(self, text="", offset=0, limit=None):
+        # 过滤并分页，返回 (匹配总数, 当前页的备份)
+        entries = self.list()
+        if text:
+            entries = [entry for entry in entries if entry.matches(text)]
+        page = entries[offset:offset + limit] if limit is not None else entries[offset:]
+        return len(entries), page
+
+    def get(self, name):
+        for entry in self.list():
+            if entry.name == name:
+                return entry
+        raise BackupError(f"备份不存在: {name}")
+
+    def _entry_from_row(self, row):
+        name = row["name"]
+        if row.get("kind") == "legacy":
+            path = os.path.join(self.directory, name)
+        else:
+            path = os.path.join(self.directory, SNAPSHOT_DIR, f"{name}.json")
+        return BackupEntry(name, _parse_created(row.get("created")), row.get("kind", "snapshot"), path, info=row)
+
+    # ---- 清单 ----
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_NAME)
+
+    def _read_manifest(self):
+        # 清单按创建时间从旧到新排列；不存在时返回 None
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                rows = []
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        try:
+                            rows.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            continue  # 写入中断留下的半行
+                return rows
+        except FileNotFoundError:
+            return None
+
+    def _append_manifest(self, row):
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(self.manifest_path):
+            self.rebuild_manifest()
+            return
+        with open(self.manifest_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _write_manifest(self, rows):
+        os.makedirs(self.directory, exist_ok=True)
+        payload = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        write_bytes_atomic(self.manifest_path, [payload.encode('utf-8')])
+
+    def rebuild_manifest(self):
+        # 扫描快照和旧版备份重新生成清单（清单丢失或手动改动备份目录后使用）
+        entries = []
+        snapshot_dir = os.path.join(self.directory, SNAPSHOT_DIR)
+        if os.path.isdir(snapshot_dir):
+            for filename in os.listdir(snapshot_dir):
+                if filename.endswith(".json"):
+                    name = filename[:-len(".json")]
+                    entries.append(BackupEntry(name, _parse_timestamp(name), "snapshot",
+                                               os.path.join(snapshot_dir, filename)))
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.startswith(LEGACY_PREFIX) and filename.endswith(".json"):
+                    stamp = filename[len(LEGACY_PREFIX):-len(".json")]
+                    entries.append(BackupEntry(filename, _parse_timestamp(stamp), "legacy",
+                                               os.path.join(self.directory, filename)))
+        entries.sort(key=lambda entry: entry.created)
+
+        rows = []
+        previous = None
+        for entry in entries:
+            try:
+                data = self.load_data(entry)
+                if not isinstance(data, dict) or not isinstance(data.get("navigationItems"), list):
+                    data = None
+            except (OSError, ValueError, BackupError):
+                data = None
+            entry.info = self._describe(entry, data, previous)
+            rows.append(entry.info)
+            previous = entry
+        if rows or os.path.isdir(self.directory):
+            self._write_manifest(rows)
+        return rows
+
+    def _load_record(self, entry):
+        if entry.record is None:
+            with open(entry.path, 'r', encoding='utf-8') as file:
+                entry.record = json.load(file)
+        return entry.record
+
+    def iter_bytes(self, name):
+        # 按块产出某个备份还原后的文件内容
+        entry = name if isinstance(name, BackupEntry) else self.get(name)
+        if entry.kind == "legacy":
+            with open(entry.path, 'rb') as file:
+                yield from iter(lambda: file.read(WRITE_CHUNK_SIZE), b"")
+            return
+
+        parts = self._load_record(entry)["parts"]
+        if parts["format"] == "raw":
+            yield self._get_object(parts["blob"])
+            return
+        yield from iter_json_chunks(self.load_data(entry))
+
+    def load_data(self, name):
+        # 将备份还原为数据对象
+        entry = name if isinstance(name, BackupEntry) else self.get(name)
+        if entry.kind == "legacy":
+            with open(entry.path, 'rb') as file:
+                return loads_json(file.read())
+        parts = self._load_record(entry)["parts"]
+        if parts["format"] == "raw":
+            return loads_json(self._get_object(parts["blob"]))
+        data = loads_json(self._get_object(parts["meta"]))
+        data["navigationItems"] = [loads_json(self._get_object(digest)) for digest in parts["categories"]]
+        return data
+
+    def restore_to(self, name, target_path):
+        write_bytes_atomic(target_path, self.iter_bytes(name))
+
+    # ---- 保留策略 ----
+
+    def prune(self, policy=None):
+        # 按数量、时间和总大小淘汰旧备份，并清理不再被引用的数据块；返回被删除的备份名
+        policy = policy or self.policy
+        entries = self.list()
+        keep = entries[:1]
+        removed = []
+        cutoff = None
+        if policy.max_age_days is not None:
+            cutoff = datetime.datetime.now() - datetime.timedelta(days=policy.max_age_days)
+        counted = len(keep)
+        for entry in entries[1:]:
+            if entry.kind == "legacy" and not policy.include_legacy:
+                keep.append(entry)
+            elif policy.max_count is not None and counted >= policy.max_count:
+                removed.append(entry)
+            elif cutoff is not None and entry.created < cutoff:
+                removed.append(entry)
+            else:
+                keep.append(entry)
+                counted += 1
+
+        for entry in removed:
+            _remove_quietly(entry.path)
+        if removed or policy.max_bytes is not None:
+            removed.extend(self._collect_garbage(keep, policy.max_bytes, policy.include_legacy))
+        if removed:
+            self._write_manifest([entry.info for entry in reversed(keep)])
+        return [entry.name for entry in removed]
+
+    def _collect_garbage(self, keep, max_bytes, include_legacy=False):
+        # 标记仍被引用的数据块，超出总大小限制时从最旧的可淘汰备份开始继续淘汰
+        removed = []
+        while True:
+            referenced = {}
+            total = 0
+            for entry in keep:
+                if entry.kind == "legacy":
+                    if include_legacy:
+                        total += entry.info.get("size") or 0
+                    continue
+                try:
+                    record = self._load_record(entry)
+                except FileNotFoundError:
+                    continue
+                for digest in _record_digests(record):
+                    if digest not in referenced:
+                        path = self._object_path(digest)
+                        referenced[digest] = os.path.getsize(path) if os.path.exists(path) else 0
+                        total += referenced[digest]
+            # 最新的备份总会保留
+            candidates = [i for i in range(1, len(keep)) if include_legacy or keep[i].kind != "legacy"]
+            if max_bytes is None or total <= max_bytes or not candidates:
+                break
+            oldest = keep.pop(candidates[-1])
+            _remove_quietly(oldest.path)
+            removed.append(oldest)
+
+        # 只删除符合本存储命名方式、且位于对应前缀目录中的数据块
+        object_root = os.path.join(self.directory, OBJECT_DIR)
+        if os.path.isdir(object_root):
+            for prefix in os.listdir(object_root):
+                prefix_dir = os.path.join(object_root, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for filename in os.listdir(prefix_dir):
+                    digest = filename[:-len(".gz")]
+                    if _OBJECT_NAME.match(filename) and digest[:2] == prefix and digest not in referenced:
+                        os.remove(os.path.join(prefix_dir, filename))
+        return removed
+
+
+def _parse_navigation(raw):
+    try:
+        data = loads_json(raw)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if isinstance(data, dict) and isinstance(data.get("navigationItems"), list):
+        return data
+    return None
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _compact(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def _record_digests(record):
+    parts = record.get("parts", {})
+    if parts.get("format") == "raw":
+        return [parts["blob"]]
+    return [parts["meta"], *parts["categories"]]
+
+
+def _parse_created(text):
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except (TypeError, ValueError):
+        return datetime.datetime.min
+
+
+def _parse_timestamp(stamp):
+    for fmt, length in (("%Y%m%d_%H%M%S_%f", 22), ("%Y%m%d_%H%M%S", 15)):
+        try:
+            return datetime.datetime.strptime(stamp[:length], fmt)
+        except ValueError:
+            continue
+    return datetime.datetime.min
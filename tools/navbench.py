@@ -0,0 +1,357 @@
+"""编辑器热点操作的基准测试
+
+按固定的随机种子生成与 navigation.json 结构相同的数据（1k 到 200k 个链接，可配置
+subCategories 层数和中文标题的比例），在临时目录中分别计时：
+
+    load         读取并解析文件（load_navigation_json）
+    validate     完整校验
+    dirty_check  判断是否有未保存的修改以及文件是否被外部修改（has_unsaved_changes）
+    save         修改一个条目后保存，包括分片、搜索索引和预压缩副本（save_json）
+    backup       为当前文件创建备份（create_backup）
+    restore      从备份恢复（restore_from_backup）
+    tree_tab     创建第一个标签页的 Treeview（_populate_tree，懒加载）
+    tree_full    展开全部标签页的全部节点
+
+Treeview 相关的两项需要图形环境：没有 DISPLAY 时尝试启动 Xvfb，仍不可用则跳过。
+每项记录多次运行的最短和中位耗时，以及在 tracemalloc 下单独运行一次得到的 Python
+内存峰值（Tk 自身的内存不计入）。结果写成 JSON，可以与之前的结果比较：
+
+    python tools/navbench.py --sizes 1000,10000 --output bench.json
+    python tools/navbench.py --baseline bench.json --threshold 0.25
+
+耗时或内存超过基准的 (1 + threshold) 倍且差值超过噪声下限时视为退化，退出码为 1。
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from navcore import NavigationDocument
+from navio import JSON_BACKEND, write_json_atomic
+
+RESULT_VERSION = 1
+DEFAULT_SIZES = (1000, 10000, 50000, 200000)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+# 低于该差值的变化视为噪声，不报告退化
+MIN_DELTA_SECONDS = 0.005
+MIN_DELTA_BYTES = 256 * 1024
+# 超过该链接数时不测 tree_full（逐个展开的耗时过长）
+DEFAULT_TREE_LIMIT = 50000
+
+CJK_WORDS = ("搜索", "工具", "设计", "开发", "文档", "社区", "视频", "音乐", "图片", "翻译",
+             "学习", "资源", "导航", "效率", "编程", "云端", "数据", "安全", "写作", "办公")
+LATIN_WORDS = ("search", "tool", "design", "dev", "docs", "hub", "video", "music", "image", "translate",
+               "learn", "kit", "nav", "flow", "code", "cloud", "data", "secure", "write", "office")
+
+
+# ---- 数据生成 ----
+
+def _words(rng, cjk, count):
+    words = CJK_WORDS if cjk else LATIN_WORDS
+    return ("" if cjk else " ").join(rng.choice(words) for _ in range(count))
+
+
+def generate_catalog(links, depth=1, fanout=4, categories=None, cjk_ratio=0.5, seed=0):
+    # depth 为 0 时链接直接位于顶级分类下；每增加一层，每个分类下有 fanout 个子分类
+    rng = random.Random(seed)
+    if categories is None:
+        categories = max(1, min(40, links // 500))
+    leaves = []
+
+    def make_category(category_id, level):
+        cjk = rng.random() < cjk_ratio
+        node = {"id": category_id, "title": _words(rng, cjk, 2), "icon": f"/assets/{category_id}.png",
+                "description": _words(rng, cjk, 4)}
+        if level < depth:
+            node["subCategories"] = [make_category(f"{category_id}_{i + 1}", level + 1) for i in range(fanout)]
+        else:
+            node["items"] = []
+            leaves.append(node)
+        return node
+
+    data = {"navigationItems": [make_category(str(i + 1), 0) for i in range(categories)]}
+    for n in range(links):
+        leaf = leaves[n % len(leaves)]
+        cjk = rng.random() < cjk_ratio
+        word = rng.choice(LATIN_WORDS)
+        leaf["items"].append({
+            "id": f"{leaf['id']}_{len(leaf['items']) + 1}",
+            "title": _words(rng, cjk, rng.randint(1, 3)),
+            "href": f"https://{word}{n}.example.com/{rng.choice(LATIN_WORDS)}",
+            "description": _words(rng, cjk, rng.randint(3, 8)),
+            "icon": f"/assets/images/{word}{n % 97}.png",
+            "enabled": rng.random() > 0.05,
+        })
+    return data
+
+
+# ---- 计时 ----
+
+def measure(func, setup=None, repeat=DEFAULT_REPEAT):
+    # func(state) 的最短和中位耗时，以及单独运行一次的 Python 内存峰值；setup() 不计时
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(state)
+        timings.append(time.perf_counter() - start)
+    state = setup() if setup is not None else None
+    tracemalloc.start()
+    try:
+        func(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"min": min(timings), "median": statistics.median(timings), "peak_bytes": peak}
+
+
+class _Workspace:
+    # 临时目录中的 navigation.json 和备份目录，保存时生成的派生文件也写在这里
+    def __init__(self, data):
+        self.directory = tempfile.mkdtemp(prefix="navbench-")
+        self.json_path = os.path.join(self.directory, "navigation.json")
+        write_json_atomic(self.json_path, data)
+        self.size = os.path.getsize(self.json_path)
+        self.backups = 0
+
+    def document(self, fresh_backups=False):
+        # fresh_backups 为 True 时使用新的备份目录，备份不会复用已有的快照
+        if fresh_backups:
+            self.backups += 1
+        document = NavigationDocument(self.json_path, os.path.join(self.directory, f"backups{self.backups}"))
+        document.load()
+        return document
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_EDITS = itertools.count(1)
+
+
+def _touch(document):
+    # 修改一个条目，使文档有未保存的修改且内容每次不同
+    item = next(item for _, item in document.iter_entries() if "href" in item)
+    document.set_fields(item["id"], {"title": f"{item['title'].split('#')[0]}#{next(_EDITS)}"})
+
+
+def run_core(data, repeat):
+    workspace = _Workspace(data)
+    results = {}
+    try:
+        document = workspace.document()
+
+        def load(state):
+            document.set_data(*document.read_with_state())
+
+        results["load"] = measure(load, repeat=repeat)
+        results["validate"] = measure(lambda state: document.validator.validate(document.data), repeat=repeat)
+
+        _touch(document)
+
+        def dirty_check(state):
+            return document.is_dirty, document.disk_changed()
+
+        results["dirty_check"] = measure(dirty_check, repeat=repeat)
+
+        def save_setup():
+            _touch(document)
+            return document
+
+        results["save"] = measure(lambda doc: doc.save(backup=False), save_setup, repeat)
+        results["backup"] = measure(lambda doc: doc.create_backup(),
+                                    lambda: workspace.document(fresh_backups=True), repeat)
+
+        restorer = workspace.document(fresh_backups=True)
+        name = restorer.create_backup()
+        results["restore"] = measure(lambda state: restorer.restore_backup(name), repeat=repeat)
+    finally:
+        workspace.close()
+    return results, workspace.size
+
+
+# ---- Treeview ----
+
+def _start_virtual_display():
+    # 没有图形环境时启动 Xvfb，返回进程（不可用时返回 None）
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin") or shutil.which("Xvfb") is None:
+        return None
+    display = f":{os.getpid() % 500 + 100}"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    if process.poll() is not None:
+        return None
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def open_tk():
+    # 返回 (root, 说明)；无法创建窗口时 root 为 None
+    try:
+        import tkinter as tk
+    except ImportError:
+        return None, "未安装 tkinter"
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return None, f"无法创建窗口: {e}"
+    root.withdraw()
+    return root, "ok"
+
+
+def _wait_idle(editor):
+    while editor.task is not None:
+        editor.root.update()
+        time.sleep(0.01)
+
+
+def run_tree(data, repeat, expand_all):
+    # 每个规模使用新的 Tk 根窗口，避免上一个编辑器的定时回调继续运行
+    from publishtool import NavigationEditor
+
+    root, status = open_tk()
+    if root is None:
+        return {"tree_tab": {"skipped": status}, "tree_full": {"skipped": status}}
+    workspace = _Workspace(data)
+    try:
+        # 编辑器启动时会加载默认文件，等它完成后再换成生成的数据
+        editor = NavigationEditor(root)
+        _wait_idle(editor)
+        editor.document = workspace.document()
+
+        def reset(state=None):
+            editor._reset_tabs()
+            root.update_idletasks()
+
+        def first_tab(state):
+            editor._get_current_tree()
+            root.update_idletasks()
+
+        results = {"tree_tab": measure(first_tab, reset, repeat)}
+        if expand_all:
+            def full(state):
+                for tab_id in editor.notebook.tabs():
+                    tree = editor._ensure_tab_tree(editor.notebook.nametowidget(tab_id))
+                    pending = list(tree.get_children(""))
+                    while pending:
+                        node = pending.pop()
+                        editor._expand_node(tree, node)
+                        pending.extend(tree.get_children(node))
+                root.update_idletasks()
+
+            results["tree_full"] = measure(full, reset, repeat)
+        else:
+            results["tree_full"] = {"skipped": "超过 --tree-limit"}
+        return results
+    finally:
+        root.destroy()
+        workspace.close()
+
+
+# ---- 比较 ----
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    # 返回 [(规模, 操作, 指标, 基准值, 当前值)]，只包含超出阈值的项
+    regressions = []
+    for size, entry in current["results"].items():
+        previous = baseline.get("results", {}).get(size, {}).get("operations", {})
+        for name, values in entry["operations"].items():
+            old = previous.get(name)
+            if not isinstance(old, dict) or "median" not in values or "median" not in old:
+                continue
+            for metric, floor in (("median", MIN_DELTA_SECONDS), ("peak_bytes", MIN_DELTA_BYTES)):
+                if values[metric] > old[metric] * (1 + threshold) and values[metric] - old[metric] > floor:
+                    regressions.append((size, name, metric, old[metric], values[metric]))
+    return regressions
+
+
+def _format_value(metric, value):
+    return f"{value * 1000:.1f} ms" if metric == "median" else f"{value / 1048576:.1f} MB"
+
+
+def format_results(result):
+    lines = []
+    for size, entry in result["results"].items():
+        lines.append(f"{size} 个链接（{entry['file_bytes'] / 1048576:.1f} MB）")
+        for name, values in entry["operations"].items():
+            if "skipped" in values:
+                lines.append(f"  {name:<12} 跳过: {values['skipped']}")
+            else:
+                lines.append(f"  {name:<12} {values['median'] * 1000:10.1f} ms  最短 {values['min'] * 1000:.1f} ms"
+                             f"  内存峰值 {values['peak_bytes'] / 1048576:.1f} MB")
+    return "\n".join(lines)
+
+
+def run(sizes, depth, fanout, cjk_ratio, seed, repeat, tree=True, tree_limit=DEFAULT_TREE_LIMIT, report=print):
+    result = {
+        "version": RESULT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "json_backend": JSON_BACKEND},
+        "config": {"depth": depth, "fanout": fanout, "cjk_ratio": cjk_ratio, "seed": seed, "repeat": repeat},
+        "results": {},
+    }
+    display = _start_virtual_display() if tree else None
+    try:
+        for size in sizes:
+            report(f"正在测试 {size} 个链接...")
+            data = generate_catalog(size, depth, fanout, cjk_ratio=cjk_ratio, seed=seed)
+            operations, file_bytes = run_core(data, repeat)
+            if tree:
+                operations.update(run_tree(data, repeat, size <= tree_limit))
+            result["results"][str(size)] = {"file_bytes": file_bytes, "operations": operations}
+    finally:
+        if display is not None:
+            display.terminate()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="编辑器热点操作的基准测试")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="逗号分隔的链接数")
+    parser.add_argument("--depth", type=int, default=1, help="subCategories 层数")
+    parser.add_argument("--fanout", type=int, default=4, help="每个分类下的子分类数")
+    parser.add_argument("--cjk-ratio", type=float, default=0.5, help="中文标题和描述的比例")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每项计时的运行次数")
+    parser.add_argument("--no-tree", action="store_true", help="不测试 Treeview")
+    parser.add_argument("--tree-limit", type=int, default=DEFAULT_TREE_LIMIT, help="超过该链接数时不测 tree_full")
+    parser.add_argument("--output", default=None, help="结果 JSON 的保存路径")
+    parser.add_argument("--baseline", default=None, help="用于比较的之前的结果 JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="视为退化的增幅（0.25 即 25%%）")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    result = run(sizes, args.depth, args.fanout, args.cjk_ratio, args.seed, args.repeat,
+                 not args.no_tree, args.tree_limit, report=lambda message: print(message, file=sys.stderr))
+    print(format_results(result))
+    if args.output:
+        write_json_atomic(args.output, result)
+        print(f"结果已保存到 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline.get("config") != result["config"]:
+            print("提示: 基准结果的生成参数不同，比较结果仅供参考")
+        regressions = compare(result, baseline, args.threshold)
+        for size, name, metric, old, new in regressions:
+            print(f"退化: {size} 个链接 {name} {_format_value(metric, old)} -> {_format_value(metric, new)}")
+        print(f"与 {args.baseline} 相比有 {len(regressions)} 项退化（阈值 {args.threshold:.0%}）")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
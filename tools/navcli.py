@@ -0,0 +1,411 @@
+"""navigation.json 命令行工具（无需图形界面）
+
+用法示例:
+    python tools/navcli.py validate
+    python tools/navcli.py apply ops.jsonl
+    python tools/navcli.py backup
+    python tools/navcli.py list-backups --filter 常用 --limit 20
+    python tools/navcli.py diff navigation_20251024_174742.json
+    python tools/navcli.py restore navigation_20251024_174742.json
+    python tools/navcli.py prune --keep 50 --max-age-days 30
+    python tools/navcli.py check-links --concurrency 32 --disable
+    python tools/navcli.py assets
+    python tools/navcli.py icons --apply --remove-unreferenced
+    python tools/navcli.py shards
+    python tools/navcli.py search 搜索引擎
+    python tools/navcli.py import bookmarks.html --category 1 --dry-run
+    python tools/navcli.py --git --git-push origin apply ops.jsonl
+    python tools/navcli.py git-commit --message "更新导航数据"
+
+ops.jsonl 每行一个操作:
+    {"op": "set", "id": "1_2", "fields": {"title": "新标题", "enabled": false}}
+    {"op": "set", "id": "1_2", "field": "href", "value": "https://example.com/"}
+    {"op": "delete", "id": "1_3"}
+    {"op": "move", "id": "1_4", "to": "8_1", "index": 0}
+    {"op": "add", "id": "8_1_9", "to": "8_1", "item": {"title": "示例", "href": "https://example.com/"}}
+"""
+import argparse
+import json
+import sys
+
+from navassets import format_summary, regenerate_metadata
+from navbackup import BackupError, RetentionPolicy
+from navcore import (DEFAULT_ASSET_CACHE, DEFAULT_ASSET_DIR, DEFAULT_BACKUP_DIR,
+                     DEFAULT_JSON_PATH, DEFAULT_LINK_CACHE, DEFAULT_METADATA_PATH,
+                     DEFAULT_PROFILE_DIR, NavigationDocument, NavigationError)
+from navdiff import diff_navigation, format_diff, summarize_change
+from navgit import GitPublishError
+from navicons import analyze, apply_remap, remove_unreferenced
+from navimport import FORMATS, apply_import, iter_candidates, plan_import
+from navindex import publish_search_index, query_search_index
+from navio import loads_json
+from navlinks import (DEFAULT_CONCURRENCY, DEFAULT_HOST_INTERVAL, DEFAULT_PER_HOST,
+                      DEFAULT_TIMEOUT, DEFAULT_TTL, LinkCache, LinkChecker,
+                      collect_links, describe_result, failed_items)
+from navprofile import format_record, profiler
+
+
+def read_ops(path):
+    # 逐行读取操作，不一次性载入整个文件
+    stream = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+    try:
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as e:
+                raise NavigationError(f"第 {line_no} 行不是有效的JSON: {e}")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def cmd_validate(document, args):
+    issues = document.check()
+    errors = sum(1 for issue in issues if issue.is_error)
+    for issue in issues:
+        if issue.is_error or not args.errors_only:
+            print(issue)
+    if issues:
+        print(f"发现 {errors} 个错误，{len(issues) - errors} 个警告")
+    else:
+        print("校验通过")
+    return 1 if errors else 0
+
+
+def cmd_apply(document, args):
+    count = 0
+    for line_no, op in read_ops(args.ops):
+        try:
+            document.apply_op(op)
+        except (NavigationError, KeyError, TypeError) as e:
+            # 任一操作失败则不保存，保证批处理要么全部生效要么都不生效
+            raise NavigationError(f"第 {line_no} 行操作失败: {e}")
+        count += 1
+
+    errors = document.validate() if document.validate_on_save else []
+    if errors:
+        for error in errors:
+            print(error)
+        raise NavigationError("应用操作后校验失败，未保存")
+
+    if args.dry_run:
+        print(f"已校验 {count} 个操作（dry run，未保存）")
+    elif document.is_dirty:
+        if document.save(backup=not args.no_backup):
+            print(f"已应用 {count} 个操作并保存 {document.json_path}")
+        else:
+            print(f"已应用 {count} 个操作，文件内容未变化")
+    else:
+        print("没有需要保存的更改")
+    return 0
+
+
+def cmd_backup(document, args):
+    print(document.create_backup())
+    return 0
+
+
+def cmd_list_backups(document, args):
+    total, entries = document.backups.query(args.filter, args.offset, args.limit)
+    for entry in entries:
+        info = entry.info
+        changes = "; ".join(summarize_change(change) for change in info.get("changes", []))
+        print(f"{entry.name}\t{info.get('created', '')}\t{info.get('size', 0)} 字节\t"
+              f"{info.get('categories')} 分类\t{info.get('items')} 链接\t{changes}")
+    print(f"共 {total} 个备份，显示 {len(entries)} 个")
+    return 0
+
+
+def cmd_diff(document, args):
+    # 显示从当前文件恢复到该备份会带来的结构变化
+    backup_data = document.backups.load_data(args.name)
+    print(format_diff(diff_navigation(document.data, backup_data), limit=args.limit))
+    return 0
+
+
+def cmd_reindex(document, args):
+    rows = document.backups.rebuild_manifest()
+    print(f"已重建备份清单，共 {len(rows)} 个备份")
+    return 0
+
+
+def cmd_restore(document, args):
+    document.restore_backup(args.name)
+    print(f"已从备份 {args.name} 恢复")
+    return 0
+
+
+def cmd_prune(document, args):
+    policy = RetentionPolicy(args.keep, args.max_age_days,
+                             int(args.max_size_mb * 1024 * 1024) if args.max_size_mb else None,
+                             include_legacy=args.include_legacy)
+    removed = document.backups.prune(policy)
+    for name in removed:
+        print(f"已删除 {name}")
+    print(f"共删除 {len(removed)} 个备份")
+    return 0
+
+
+def cmd_check_links(document, args):
+    cache = None if args.no_cache else LinkCache(args.cache, ttl=args.ttl_hours * 3600)
+    checker = LinkChecker(cache, concurrency=args.concurrency, per_host=args.per_host,
+                          host_interval=args.host_interval, timeout=args.timeout)
+    links = collect_links(document.data)
+
+    def progress(done, total):
+        print(f"\r已检查 {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    results = checker.check(links, force=args.force, progress=progress)
+    print(file=sys.stderr)
+    if cache is not None:
+        cache.discard_except(links)
+        cache.save()
+
+    failures = failed_items(links, results)
+    for item, record in failures:
+        print(f"{item.get('id')}\t{describe_result(record)}\t{item.get('href')}")
+    print(f"共检查 {len(links)} 个链接，{len(failures)} 个条目失败")
+
+    if args.disable and failures:
+        changed = document.set_enabled([item["id"] for item, _ in failures if "id" in item], False)
+        if changed and document.save():
+            print(f"已禁用 {len(changed)} 个条目并保存 {document.json_path}")
+    return 1 if failures else 0
+
+
+def cmd_assets(document, args):
+    summary = regenerate_metadata(args.metadata, args.asset_dir, None if args.no_cache else args.cache,
+                                  args.workers)
+    print(format_summary(summary))
+    return 0
+
+
+def cmd_icons(document, args):
+    report = analyze(document, args.asset_dir, args.cache)
+    print(report.format(limit=args.limit))
+
+    if args.apply and report.remap:
+        count = apply_remap(document, report.remap)
+        if document.save(backup=not args.no_backup):
+            print(f"已改写 {count} 个 icon 引用并保存 {document.json_path}")
+        # 引用改写后重复文件也成为未引用文件
+        report = analyze(document, args.asset_dir, args.cache)
+
+    if args.remove_unreferenced:
+        if report.remap and not args.apply:
+            print("提示: 重复文件仍被引用，加上 --apply 才会一并删除")
+        removed = remove_unreferenced(report, args.asset_dir, args.metadata, args.cache)
+        print(f"已删除 {len(removed)} 个未引用文件，释放 "
+              f"{sum(report.files[url][0] for url in removed) / 1024:.1f} KB")
+    return 0
+
+
+def cmd_shards(document, args):
+    written, removed = document.publish()
+    for name in written:
+        print(f"已写入 {name}")
+    for name in removed:
+        print(f"已删除 {name}")
+    print(f"写入 {len(written)} 个文件，删除 {len(removed)} 个")
+    return 0
+
+
+def cmd_search(document, args):
+    # 使用预构建的搜索索引查询，索引落后于当前数据时先重新生成
+    if publish_search_index(document.data, document.search_index_path):
+        print(f"已更新 {document.search_index_path}")
+    with open(document.search_index_path, 'rb') as file:
+        index = loads_json(file.read())
+    results = query_search_index(index, args.query, args.limit)
+    for item_id, category_index in results:
+        title = document.find(item_id).item.get("title", "")
+        print(f"{item_id}\t{index['categories'][category_index]}\t{title}")
+    print(f"找到 {len(results)} 个条目（索引共 {len(index['docs'])} 个条目、{len(index['terms'])} 个词项）")
+    return 0 if results else 1
+
+
+def cmd_import(document, args):
+    plan = plan_import(document, iter_candidates(args.source, args.format), args.category)
+    for href, existing in plan.duplicates[:args.limit]:
+        print(f"重复\t{existing}\t{href}")
+    for candidate, reason in plan.invalid[:args.limit]:
+        print(f"无效\t{reason}\t{candidate['href']}")
+    for candidate in plan.unrouted[:args.limit]:
+        print(f"无分类\t{'/'.join(candidate['route'])}\t{candidate['href']}")
+    print(plan.summary())
+    if not plan.additions or args.dry_run:
+        if plan.unrouted and args.category is None:
+            print("提示: 使用 --category 指定找不到匹配分类时放入的分类")
+        return 0
+
+    apply_import(document, plan)
+    errors = document.validate() if document.validate_on_save else []
+    if errors:
+        for error in errors:
+            print(error)
+        raise NavigationError("导入后校验失败，未保存")
+    document.save(backup=not args.no_backup)
+    print(f"已导入 {len(plan.additions)} 个链接并保存 {document.json_path}")
+    return 0
+
+
+def cmd_git_commit(document, args):
+    # 不论是否有排队的保存，都把发布目录中的全部改动提交
+    publisher = document.git_publisher or document.enable_git_publishing(args.git_branch, args.git_push)
+    print_git_changes(publisher.changes())
+    commit = publisher.commit(args.message)
+    print(f"已提交 {commit[:12]}" if commit else "发布文件没有变化，未提交")
+    return 0
+
+
+def print_git_changes(changes):
+    labels = {"add": "新增", "modify": "修改", "delete": "删除"}
+    for change in changes:
+        print(f"{labels[change.kind]}\t{change.path}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="NavSphere navigation.json 命令行工具")
+    parser.add_argument("--file", default=DEFAULT_JSON_PATH, help="navigation.json 路径")
+    parser.add_argument("--backup-dir", default=DEFAULT_BACKUP_DIR, help="备份目录")
+    parser.add_argument("--no-shards", action="store_true", help="保存时不输出按分类拆分的分片")
+    parser.add_argument("--no-search-index", action="store_true", help="保存时不更新预构建的搜索索引")
+    parser.add_argument("--no-compress", action="store_true", help="保存时不输出紧凑格式和预压缩副本")
+    parser.add_argument("--no-validate", action="store_true", help="保存前不校验数据（存在错误时仍然保存）")
+    parser.add_argument("--profile", action="store_true", help="记录各阶段耗时，结束时输出摘要")
+    parser.add_argument("--profile-capture", action="store_true",
+                        help="在 cProfile 和 tracemalloc 下运行第一次操作（通常是加载）")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR, help="耗时日志和分析结果的目录")
+    parser.add_argument("--git", action="store_true", help="命令完成后把内容和资源文件的改动提交到本地 git 仓库")
+    parser.add_argument("--git-branch", default=None, help="提交到的分支，默认为当前检出的分支")
+    parser.add_argument("--git-push", default=None, metavar="REMOTE", help="提交后推送到该远端")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    validate_parser = subparsers.add_parser("validate", help="校验数据")
+    validate_parser.add_argument("--errors-only", action="store_true", help="只列出错误，不列出警告")
+    validate_parser.set_defaults(func=cmd_validate)
+
+    apply_parser = subparsers.add_parser("apply", help="批量应用 JSONL 操作文件")
+    apply_parser.add_argument("ops", help="操作文件路径，'-' 表示标准输入")
+    apply_parser.add_argument("--dry-run", action="store_true", help="只校验不保存")
+    apply_parser.add_argument("--no-backup", action="store_true", help="保存前不创建备份")
+    apply_parser.set_defaults(func=cmd_apply)
+
+    subparsers.add_parser("backup", help="备份当前文件").set_defaults(func=cmd_backup)
+    list_parser = subparsers.add_parser("list-backups", help="列出备份")
+    list_parser.add_argument("--filter", default="", help="按名称、时间或分类标题过滤")
+    list_parser.add_argument("--offset", type=int, default=0)
+    list_parser.add_argument("--limit", type=int, default=None)
+    list_parser.set_defaults(func=cmd_list_backups)
+
+    diff_parser = subparsers.add_parser("diff", help="比较当前文件与某个备份")
+    diff_parser.add_argument("name", help="备份名")
+    diff_parser.add_argument("--limit", type=int, default=20, help="每类最多列出的 id 数")
+    diff_parser.set_defaults(func=cmd_diff)
+
+    subparsers.add_parser("reindex", help="重建备份清单").set_defaults(func=cmd_reindex)
+
+    restore_parser = subparsers.add_parser("restore", help="从备份恢复")
+    restore_parser.add_argument("name", help="备份文件名")
+    restore_parser.set_defaults(func=cmd_restore)
+
+    prune_parser = subparsers.add_parser("prune", help="按保留策略清理备份")
+    prune_parser.add_argument("--keep", type=int, default=None, help="最多保留的备份数量")
+    prune_parser.add_argument("--max-age-days", type=float, default=None, help="删除早于该天数的备份")
+    prune_parser.add_argument("--max-size-mb", type=float, default=None, help="备份总大小上限（MB）")
+    prune_parser.add_argument("--include-legacy", action="store_true",
+                              help="旧版整文件备份也按上述条件清理（默认始终保留）")
+    prune_parser.set_defaults(func=cmd_prune)
+
+    links_parser = subparsers.add_parser("check-links", help="检查所有链接是否可访问")
+    links_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同时进行的请求数")
+    links_parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="同一主机同时进行的请求数")
+    links_parser.add_argument("--host-interval", type=float, default=DEFAULT_HOST_INTERVAL, help="同一主机两次请求的最小间隔（秒）")
+    links_parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="单个请求的超时（秒）")
+    links_parser.add_argument("--cache", default=DEFAULT_LINK_CACHE, help="结果缓存文件")
+    links_parser.add_argument("--ttl-hours", type=float, default=DEFAULT_TTL / 3600, help="缓存结果的有效期（小时）")
+    links_parser.add_argument("--no-cache", action="store_true", help="不读写缓存")
+    links_parser.add_argument("--force", action="store_true", help="忽略有效期，重新检查所有链接")
+    links_parser.add_argument("--disable", action="store_true", help="将失败的条目设为 enabled: false 并保存")
+    links_parser.set_defaults(func=cmd_check_links)
+
+    assets_parser = subparsers.add_parser("assets", help="重新生成 resource-metadata.json")
+    assets_parser.add_argument("--asset-dir", default=DEFAULT_ASSET_DIR, help="资源目录")
+    assets_parser.add_argument("--metadata", default=DEFAULT_METADATA_PATH, help="资源清单路径")
+    assets_parser.add_argument("--cache", default=DEFAULT_ASSET_CACHE, help="文件状态缓存")
+    assets_parser.add_argument("--no-cache", action="store_true", help="重新计算所有文件的哈希")
+    assets_parser.add_argument("--workers", type=int, default=None, help="并行计算哈希的线程数")
+    assets_parser.set_defaults(func=cmd_assets)
+
+    icons_parser = subparsers.add_parser("icons", help="查找重复、未引用的图标文件和失效的图标引用")
+    icons_parser.add_argument("--asset-dir", default=DEFAULT_ASSET_DIR, help="资源目录")
+    icons_parser.add_argument("--metadata", default=DEFAULT_METADATA_PATH, help="资源清单路径")
+    icons_parser.add_argument("--cache", default=DEFAULT_ASSET_CACHE, help="文件状态缓存")
+    icons_parser.add_argument("--apply", action="store_true", help="将重复文件的引用改写为规范路径并保存")
+    icons_parser.add_argument("--remove-unreferenced", action="store_true", help="删除未被引用的图标文件")
+    icons_parser.add_argument("--no-backup", action="store_true", help="保存前不创建备份")
+    icons_parser.add_argument("--limit", type=int, default=50, help="每类最多列出的条目数")
+    icons_parser.set_defaults(func=cmd_icons)
+
+    subparsers.add_parser("shards", help="重新生成清单、按分类拆分的分片、搜索索引和预压缩副本").set_defaults(func=cmd_shards)
+
+    search_parser = subparsers.add_parser("search", help="使用预构建的搜索索引查询条目")
+    search_parser.add_argument("query", help="查询文本")
+    search_parser.add_argument("--limit", type=int, default=50, help="最多列出的条目数")
+    search_parser.set_defaults(func=cmd_search)
+
+    import_parser = subparsers.add_parser("import", help="从书签 HTML、CSV 或 JSONL 批量导入链接")
+    import_parser.add_argument("source", help="导入文件路径")
+    import_parser.add_argument("--format", choices=FORMATS, default=None, help="文件格式，默认按扩展名判断")
+    import_parser.add_argument("--category", default=None, help="找不到匹配分类时放入的分类 id")
+    import_parser.add_argument("--dry-run", action="store_true", help="只列出导入结果，不保存")
+    import_parser.add_argument("--no-backup", action="store_true", help="保存前不创建备份")
+    import_parser.add_argument("--limit", type=int, default=20, help="每类最多列出的跳过条目数")
+    import_parser.set_defaults(func=cmd_import)
+
+    git_parser = subparsers.add_parser("git-commit", help="把发布目录中的改动提交到本地 git 仓库")
+    git_parser.add_argument("--message", default=None, help="提交说明")
+    git_parser.set_defaults(func=cmd_git_commit)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    document = NavigationDocument(args.file, args.backup_dir)
+    document.write_shards = not args.no_shards
+    document.write_search_index = not args.no_search_index
+    document.write_compressed = not args.no_compress
+    document.validate_on_save = not args.no_validate
+    try:
+        if args.profile or args.profile_capture:
+            profiler.configure(args.profile_dir)
+            profiler.enabled = args.profile
+            if args.profile_capture:
+                profiler.capture_next()
+        if args.git:
+            document.enable_git_publishing(args.git_branch, args.git_push)
+        if args.func not in (cmd_restore, cmd_prune, cmd_list_backups, cmd_reindex, cmd_assets, cmd_git_commit):
+            document.load()
+        result = args.func(document, args)
+        # 本次命令中的多次保存合并为一次提交
+        if document.git_publisher is not None and document.git_publisher.pending:
+            commit = document.git_publisher.commit()
+            print(f"已提交 {commit[:12]}" if commit else "发布文件没有变化，未提交")
+        return result
+    except FileNotFoundError as e:
+        print(f"文件未找到: {e.filename}", file=sys.stderr)
+    except json.JSONDecodeError as e:
+        print(f"JSON解析错误: {e}", file=sys.stderr)
+    except (NavigationError, BackupError, GitPublishError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+    finally:
+        for record in profiler.recent:
+            print(f"[耗时] {format_record(record)}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""为发布的内容文件生成压缩格式和预压缩副本
+
+每个源文件（navigation.json、site.json 以及分片、搜索索引等派生文件）在输出目录中
+对应三个文件，相对路径与源文件相同：
+
+    <名称>.json      去掉缩进和空白的紧凑格式
+    <名称>.json.gz   gzip 预压缩（不写入时间戳，相同内容得到相同字节）
+    <名称>.json.br   brotli 预压缩，仅在安装了 brotli 时生成
+
+输出目录中的 etags.json 记录每个文件的强 ETag（紧凑格式内容的哈希）和各格式的
+大小，服务端可以直接返回对应的字节并据此回应 304，而不必在每次请求时重新压缩。
+源文件的 (大小, 修改时间) 和 ETag 都没有变化时跳过该文件。源文件的 (大小, 修改时间)
+只是本机的缓存，单独记在 .sources.json 中，etags.json 的内容只取决于源文件的内容。
+"""
+import gzip
+import hashlib
+import json
+import os
+
+from navio import loads_json, write_bytes_atomic
+
+try:
+    import brotli  # 可选依赖，没有时只生成 gzip
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = "etags.json"
+SOURCE_CACHE_NAME = ".sources.json"
+MANIFEST_VERSION = 2
+ETAG_LENGTH = 32
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# 输出目录中每个源文件可能对应的全部后缀（紧凑格式本身没有额外后缀）
+ALL_SUFFIXES = ("", ".gz", ".br")
+
+
+def minify(raw):
+    # 重新编码为紧凑的 JSON；无法解析的文件原样输出
+    try:
+        data = loads_json(raw)
+    except ValueError:
+        return raw
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def compute_etag(raw):
+    return '"' + hashlib.sha256(raw).hexdigest()[:ETAG_LENGTH] + '"'
+
+
+def encodings():
+    # 当前环境可以生成的预压缩格式: [(后缀, 压缩函数)]
+    formats = [(".gz", lambda raw: gzip.compress(raw, GZIP_LEVEL, mtime=0))]
+    if brotli is not None:
+        formats.append((".br", lambda raw: brotli.compress(raw, quality=BROTLI_QUALITY)))
+    return formats
+
+
+def collect_sources(content_dir, names, extra_dirs=()):
+    # 返回 {相对路径: 源文件路径}；extra_dirs 中的 .json 文件按目录名加入（如分片目录）
+    sources = {}
+    for name in names:
+        path = os.path.join(content_dir, name)
+        if os.path.isfile(path):
+            sources[name] = path
+    for directory in extra_dirs:
+        if not os.path.isdir(directory):
+            continue
+        prefix = os.path.basename(os.path.normpath(directory))
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".json"):
+                sources[f"{prefix}/{filename}"] = os.path.join(directory, filename)
+    return sources
+
+
+def _read_json(path):
+    try:
+        with open(path, 'rb') as file:
+            value = loads_json(file.read())
+    except (OSError, ValueError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _read_manifest(output_dir):
+    manifest = _read_json(os.path.join(output_dir, MANIFEST_NAME))
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("files") or {}
+
+
+def _is_complete(entry, output_dir, name, suffixes):
+    # 清单中有该文件的记录，且各格式的输出都存在
+    if not entry or not all(suffix[1:] in entry for suffix in suffixes):
+        return False
+    base = os.path.join(output_dir, *name.split("/"))
+    return all(os.path.isfile(base + suffix) for suffix in ("", *suffixes))
+
+
+def _remove_outputs(base, suffixes, keep=()):
+    for suffix in suffixes:
+        if suffix in keep:
+            continue
+        try:
+            os.remove(base + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def publish_compressed(sources, output_dir):
+    # 写入变化的文件和 etags.json，删除已不在 sources 中的输出；返回 (写入的相对路径, 删除的相对路径)
+    previous = _read_manifest(output_dir)
+    signatures = _read_json(os.path.join(output_dir, SOURCE_CACHE_NAME))
+    formats = encodings()
+    suffixes = [suffix for suffix, _ in formats]
+    files = {}
+    sources_seen = {}
+    written = []
+    for name, path in sorted(sources.items()):
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        sources_seen[name] = signature
+        entry = previous.get(name)
+        complete = _is_complete(entry, output_dir, name, suffixes)
+        # 源文件未改动时不必读取；被重新写入但内容相同时只读取和哈希，不重新压缩
+        if complete and signatures.get(name) == signature:
+            files[name] = entry
+            continue
+        with open(path, 'rb') as file:
+            raw = minify(file.read())
+        etag = compute_etag(raw)
+        if complete and entry.get("etag") == etag:
+            files[name] = entry
+            continue
+
+        base = os.path.join(output_dir, *name.split("/"))
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        write_bytes_atomic(base, [raw])
+        entry = {"etag": etag, "bytes": len(raw)}
+        for suffix, compress in formats:
+            compressed = compress(raw)
+            write_bytes_atomic(base + suffix, [compressed])
+            entry[suffix[1:]] = len(compressed)
+        _remove_outputs(base, ALL_SUFFIXES[1:], keep=suffixes)
+        files[name] = entry
+        written.append(name)
+
+    removed = []
+    for name in sorted(set(previous) - set(files)):
+        _remove_outputs(os.path.join(output_dir, *name.split("/")), ALL_SUFFIXES)
+        removed.append(name)
+
+    if files != previous or not os.path.isfile(os.path.join(output_dir, MANIFEST_NAME)):
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = {"version": MANIFEST_VERSION, "files": files}
+        write_bytes_atomic(os.path.join(output_dir, MANIFEST_NAME),
+                           [json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')])
+    if sources_seen != signatures:
+        os.makedirs(output_dir, exist_ok=True)
+        write_bytes_atomic(os.path.join(output_dir, SOURCE_CACHE_NAME),
+                           [json.dumps(sources_seen, ensure_ascii=False).encode('utf-8')])
+    return written, removed
@@ -0,0 +1,705 @@
+"""navigation.json 的加载、校验、编辑、备份和保存（不依赖任何GUI组件）"""
+import copy
+import hashlib
+import os
+import re
+
+from navbackup import BackupStore
+from navhistory import History
+from navcompress import collect_sources, publish_compressed
+from navgit import DEFAULT_EXCLUDE_DIRS, GitPublisher
+from navindex import publish_search_index, search_index_path
+from navio import OperationCancelled, loads_json, read_file_with_stat, write_json_atomic
+from navmerge import MergeError, merge, snapshot
+from navprofile import profiler
+from navpublish import publish_shards, shard_dir_for
+from navschema import Validator, validate_data
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTENT_DIR = os.path.join(PROJECT_ROOT, "navsphere", "content")
+DEFAULT_JSON_PATH = os.path.join(CONTENT_DIR, "navigation.json")
+DEFAULT_BACKUP_DIR = os.path.join(CONTENT_DIR, "backups")
+DEFAULT_LINK_CACHE = os.path.join(DEFAULT_BACKUP_DIR, "link-cache.json")
+DEFAULT_ASSET_DIR = os.path.join(PROJECT_ROOT, "public", "assets")
+DEFAULT_METADATA_PATH = os.path.join(CONTENT_DIR, "resource-metadata.json")
+DEFAULT_ASSET_CACHE = os.path.join(DEFAULT_BACKUP_DIR, "asset-cache.json")
+# 操作耗时日志和性能分析结果（见 navprofile）
+DEFAULT_PROFILE_DIR = os.path.join(DEFAULT_BACKUP_DIR, "profile")
+SITE_JSON_NAME = "site.json"
+# 紧凑格式和预压缩副本的输出目录（位于 navigation.json 所在目录下）
+DIST_DIR_NAME = "dist"
+# 管理后台新建的子分类使用 UUID 作为 id，其中的链接沿用顶级分类 id 作为前缀（如 "9_1"）
+_UUID = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-", re.IGNORECASE)
+
+
+class NavigationError(Exception):
+    pass
+
+
+def item_id_prefix(category, top_category=None):
+    # 分类中新链接 id 的前缀
+    category_id = str(category.get("id", ""))
+    if top_category is not None and _UUID.match(category_id):
+        return str(top_category.get("id", category_id))
+    return category_id
+
+
+class IdAllocator:
+    # 按 "<前缀>_<序号>" 分配新 id，序号从该前缀已用的最大序号之后开始，且全局不重复
+    def __init__(self, existing_ids):
+        self.used = set(existing_ids)
+        self.next_number = {}
+
+    def allocate(self, prefix):
+        if prefix not in self.next_number:
+            start = len(prefix) + 1
+            numbers = [int(item_id[start:]) for item_id in self.used
+                       if item_id.startswith(f"{prefix}_") and item_id[start:].isdigit()]
+            self.next_number[prefix] = max(numbers, default=0) + 1
+        number = self.next_number[prefix]
+        while f"{prefix}_{number}" in self.used:
+            number += 1
+        item_id = f"{prefix}_{number}"
+        self.used.add(item_id)
+        self.next_number[prefix] = number + 1
+        return item_id
+
+
+class ChangeJournal:
+    # 记录自上次加载/保存以来的修改，避免整棵数据树重新序列化来判断是否有变化
+    def __init__(self):
+        self._changes = {}  # 路径元组 -> 最近一次的修改类型
+
+    def record(self, path, kind="edit"):
+        # 路径使用元组，例如 ("navigationItems", 0, "items", 3, "title")
+        path = tuple(path)
+        if kind == "delete":
+            # 被删除节点下的修改已经没有意义
+            for changed in [p for p in self._changes if p[:len(path)] == path]:
+                del self._changes[changed]
+        self._changes[path] = kind
+
+    def record_many(self, paths, kind="edit"):
+        # 批量记录；删除多个节点时只遍历一次已有记录
+        paths = [tuple(path) for path in paths]
+        if kind == "delete" and self._changes:
+            deleted = set(paths)
+            for changed in [p for p in self._changes if any(p[:end] in deleted for end in range(1, len(p) + 1))]:
+                del self._changes[changed]
+        for path in paths:
+            self._changes[path] = kind
+
+    @property
+    def is_dirty(self):
+        return bool(self._changes)
+
+    def changed_paths(self):
+        return list(self._changes.items())
+
+    def clear(self):
+        self._changes.clear()
+
+    def __len__(self):
+        return len(self._changes)
+
+
+class FileState:
+    # 磁盘上文件的大小、修改时间和内容哈希，用于发现文件在外部被修改
+    __slots__ = ("size", "mtime_ns", "digest")
+
+    def __init__(self, size, mtime_ns, digest):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+
+    @classmethod
+    def from_stat(cls, stat, digest):
+        # stat 必须与 digest 属于同一版本：来自读取时同一文件描述符的 fstat，或写入时临时文件的 fstat
+        return cls(stat.st_size, stat.st_mtime_ns, digest)
+
+    @classmethod
+    def from_read(cls, raw, stat):
+        return cls.from_stat(stat, hashlib.sha256(raw).hexdigest())
+
+    def matches_stat(self, stat):
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+
+class IndexEntry:
+    # id 索引中的一项：条目所在列表、条目本身，以及该列表在数据中的路径
+    __slots__ = ("container", "item", "container_path")
+
+    def __init__(self, container, item, container_path):
+        self.container = container
+        self.item = item
+        self.container_path = container_path
+
+    @property
+    def is_category(self):
+        return self.container_path[-1] in ("navigationItems", "subCategories")
+
+    def position(self):
+        # 按对象身份查找下标，避免字典逐字段比较
+        for i, candidate in enumerate(self.container):
+            if candidate is self.item:
+                return i
+        raise NavigationError(f"条目已不在原列表中: {self.item.get('id')}")
+
+    def path(self):
+        return (*self.container_path, self.position())
+
+
+class NavigationDocument:
+    def __init__(self, json_path=DEFAULT_JSON_PATH, backup_dir=DEFAULT_BACKUP_DIR):
+        self.json_path = json_path
+        self.backups = BackupStore(backup_dir)
+        self.data = None
+        self.journal = ChangeJournal()
+        self.history = History()
+        # 按顶级分类保存检查结果，编辑后只需重新检查受影响的分类
+        self.validator = Validator()
+        # 保存前完整检查，存在错误时拒绝保存
+        self.validate_on_save = True
+        self._id_index = None
+        # 最近一次加载或保存时磁盘上的文件状态，以及作为三方合并基准的快照
+        self.disk_state = None
+        self.base = None
+        # 最近一次保存前合并外部修改产生的冲突列表；保存前文件没有外部修改时为 None
+        self.save_conflicts = None
+        # 保存时同时输出按分类拆分的分片（见 navpublish）
+        self.write_shards = True
+        # 保存时同时更新预构建的搜索索引（见 navindex）
+        self.write_search_index = True
+        # 保存时同时输出紧凑格式和预压缩副本（见 navcompress）
+        self.write_compressed = True
+        # 开启 git 发布后，保存和恢复排队等待提交（见 navgit）
+        self.git_publisher = None
+
+    # ---- 加载与校验 ----
+
+    def load(self, progress=None, cancel=None):
+        with profiler.operation("load"):
+            return self.set_data(*self.read_with_state(progress, cancel))
+
+    def read(self, progress=None, cancel=None):
+        return self.read_with_state(progress, cancel)[0]
+
+    def read_with_state(self, progress=None, cancel=None):
+        # 读取并解析文件，但不替换当前数据，可以在工作线程中调用；返回 (数据, FileState)。
+        # progress(已读字节, 总字节)；cancel 被设置时抛出 OperationCancelled
+        with profiler.stage("read") as stage:
+            raw, stat = read_file_with_stat(self.json_path, progress, cancel)
+            state = FileState.from_read(raw, stat)
+            stage.note(bytes=len(raw))
+        with profiler.stage("parse"):
+            return self._parse(raw, cancel), state
+
+    def _parse(self, raw, cancel=None):
+        data = loads_json(raw)
+        if cancel is not None and cancel.is_set():
+            raise OperationCancelled()
+        if not isinstance(data, dict) or "navigationItems" not in data:
+            raise NavigationError("未找到 'navigationItems' 字段")
+        return data
+
+    def set_data(self, data, state=None):
+        self.data = data
+        self.journal.clear()
+        self.history.clear()
+        self._id_index = None
+        self.disk_state = state
+        self._capture_base()
+        return data
+
+    def _capture_base(self, data=None):
+        # 数据中有缺少 id 或重复 id 的节点时无法合并，外部修改只能整体重新加载
+        try:
+            with profiler.stage("snapshot"):
+                self.base = snapshot(self.data if data is None else data)
+        except MergeError:
+            self.base = None
+
+    def validate(self):
+        # 返回错误列表（字符串），空列表表示通过；警告不包含在内
+        return [str(issue) for issue in self.check() if issue.is_error]
+
+    def check(self):
+        # 完整检查数据模型，返回全部问题（navschema.Issue），包括警告
+        with profiler.stage("validate"):
+            return self.validator.validate(self.data)
+
+    @property
+    def is_dirty(self):
+        return self.journal.is_dirty
+
+    @property
+    def backup_dir(self):
+        return self.backups.directory
+
+    # ---- 遍历与 id 索引 ----
+
+    def iter_entries(self):
+        # 依次产出 (路径, 条目)，覆盖分类、子分类和链接
+        def walk(container, container_path):
+            for i, item in enumerate(container):
+                if not isinstance(item, dict):
+                    continue
+                path = (*container_path, i)
+                yield path, item
+                for child_key in ("items", "subCategories"):
+                    children = item.get(child_key)
+                    if isinstance(children, list):
+                        yield from walk(children, (*path, child_key))
+
+        yield from walk(self.data.get("navigationItems", []), ("navigationItems",))
+
+    def _build_id_index(self):
+        index = {}
+        for path, item in self.iter_entries():
+            if "id" in item:
+                container = self.get_path(path[:-1])
+                index[str(item["id"])] = IndexEntry(container, item, path[:-1])
+        self._id_index = index
+        return index
+
+    def invalidate_index(self):
+        # 数据结构被直接修改（例如图形界面中删除节点）后调用，下次查找时重建
+        self._id_index = None
+
+    def find(self, item_id):
+        index = self._id_index if self._id_index is not None else self._build_id_index()
+        entry = index.get(str(item_id))
+        if entry is None:
+            raise NavigationError(f"找不到 id 为 '{item_id}' 的条目")
+        return entry
+
+    def get_path(self, path):
+        current = self.data
+        for key in path:
+            current = current[key]
+        return current
+
+    # ---- 编辑操作 ----
+
+    def category_at(self, path):
+        # 路径所在的顶级分类，用于撤销后刷新对应的标签页
+        if len(path) < 2:
+            return None
+        return self.data["navigationItems"][path[1]]
+
+    def set_fields(self, item_id, fields):
+        entry = self.find(item_id)
+        if "id" in fields and str(fields["id"]) != str(item_id):
+            raise NavigationError("不能通过 set 修改 id")
+        path = entry.path()
+        with self.history.step(f"修改 {item_id}", self.category_at(path)) as step:
+            for field, value in fields.items():
+                step.set(entry.item, field, value)
+                self.journal.record((*path, field), "edit")
+
+    def set_enabled(self, item_ids, enabled=False):
+        # 批量启用/禁用条目，返回实际发生变化的 id
+        changed = []
+        with self.history.step(f"{'启用' if enabled else '禁用'} {len(item_ids)} 个条目") as step:
+            for entry, path in self._locate(item_ids):
+                if entry.item.get("enabled", True) != enabled:
+                    step.touch(self.category_at(path))
+                    step.set(entry.item, "enabled", enabled)
+                    self.journal.record((*path, "enabled"), "edit")
+                    changed.append(entry.item["id"])
+        return changed
+
+    def delete(self, item_id):
+        entry = self.find(item_id)
+        path = entry.path()
+        with self.history.step(f"删除 {item_id}", self.category_at(path)) as step:
+            step.pop(entry.container, path[-1])
+        self.journal.record(path, "delete")
+        if entry.is_category:
+            # 分类被删除后其下所有路径都会变化
+            self._id_index = None
+        else:
+            del self._id_index[str(item_id)]
+
+    def move(self, item_id, target_id, index=None):
+        # 将链接移动到目标分类（或子分类）的 items 列表中
+        entry = self.find(item_id)
+        target = self.find(target_id)
+        if entry.is_category:
+            raise NavigationError(f"'{item_id}' 是分类，只能移动链接")
+        if not target.is_category:
+            raise NavigationError(f"'{target_id}' 不是分类")
+
+        source_path = entry.path()
+        target_path = target.path()
+        with self.history.step(f"移动 {item_id}", self.category_at(source_path)) as step:
+            step.touch(self.category_at(target_path))
+            step.pop(entry.container, source_path[-1])
+            self.journal.record(source_path, "delete")
+
+            if not isinstance(target.item.get("items"), list):
+                step.set(target.item, "items", [])
+            items = target.item["items"]
+            if index is None or index > len(items):
+                index = len(items)
+            step.insert(items, index, entry.item)
+        entry.container = items
+        entry.container_path = (*target.path(), "items")
+        self.journal.record((*entry.container_path, index), "move")
+
+    def add_item(self, target_id, item, index=None):
+        # 在目标分类（或子分类）的 items 列表中插入新链接，返回插入位置
+        target = self.find(target_id)
+        if not target.is_category:
+            raise NavigationError(f"'{target_id}' 不是分类")
+        if "id" in item and str(item["id"]) in self._id_index:
+            raise NavigationError(f"id '{item['id']}' 已存在")
+        target_path = target.path()
+        with self.history.step(f"添加 {item.get('id', '')}", self.category_at(target_path)) as step:
+            if not isinstance(target.item.get("items"), list):
+                step.set(target.item, "items", [])
+            items = target.item["items"]
+            if index is None or index > len(items):
+                index = len(items)
+            step.insert(items, index, item)
+        container_path = (*target_path, "items")
+        self.journal.record((*container_path, index), "add")
+        if "id" in item:
+            self._id_index[str(item["id"])] = IndexEntry(items, item, container_path)
+        return index
+
+    # ---- 批量编辑 ----
+
+    def _locate(self, item_ids):
+        # 按 id 找到条目及其路径: [(IndexEntry, 路径)]，重复的 id 只保留一个。
+        # 同一列表中的下标只按对象身份计算一次，而不是每个条目扫描一遍
+        entries = []
+        positions = {}  # id(列表) -> {id(条目): 下标}
+        seen = set()
+        for item_id in item_ids:
+            key = str(item_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = self.find(key)
+            index = positions.get(id(entry.container))
+            if index is None:
+                index = positions[id(entry.container)] = {id(item): i for i, item in enumerate(entry.container)}
+            if id(entry.item) not in index:
+                raise NavigationError(f"条目已不在原列表中: {key}")
+            entries.append((entry, (*entry.container_path, index[id(entry.item)])))
+        return entries
+
+    def id_prefix(self, category_id):
+        # 分类中新链接 id 的前缀，见 item_id_prefix
+        entry = self.find(category_id)
+        if not entry.is_category:
+            raise NavigationError(f"'{category_id}' 不是分类")
+        return item_id_prefix(entry.item, self.category_at(entry.path()))
+
+    def new_item_id(self, category_id):
+        # 分类中下一个可用的链接 id
+        prefix = self.id_prefix(category_id)
+        return IdAllocator(self._id_index).allocate(prefix)
+
+    def _target_items(self, step, target):
+        # 目标分类的 items 列表，没有时在 step 中创建
+        if not isinstance(target.item.get("items"), list):
+            step.set(target.item, "items", [])
+        return target.item["items"]
+
+    def delete_items(self, item_ids):
+        # 在一个撤销步骤中删除多个条目（分类或链接），返回该步
+        entries = self._locate(item_ids)
+        # 从路径靠后的条目开始删除，前面条目的下标不受影响；分类中的条目先于分类本身删除
+        entries.sort(key=lambda pair: pair[1], reverse=True)
+        with self.history.step(f"删除 {len(entries)} 个条目") as step:
+            for entry, path in entries:
+                step.touch(self.category_at(path))
+                step.pop(entry.container, path[-1])
+        self.journal.record_many([path for _, path in entries], "delete")
+        if any(entry.is_category for entry, _ in entries):
+            self._id_index = None
+        else:
+            for entry, _ in entries:
+                del self._id_index[str(entry.item["id"])]
+        return step
+
+    def move_items(self, item_ids, target_id, index=None, renumber=True):
+        # 在一个撤销步骤中把多个链接按给定顺序移动到目标分类（或子分类）的 items 列表，返回该步。
+        # renumber 时，id 为 "<原分类前缀>_<序号>" 的链接按目标分类重新分配 id
+        target = self.find(target_id)
+        if not target.is_category:
+            raise NavigationError(f"'{target_id}' 不是分类")
+        entries = self._locate(item_ids)
+        for entry, _ in entries:
+            if entry.is_category:
+                raise NavigationError(f"'{entry.item.get('id')}' 是分类，只能移动链接")
+        target_path = target.path()
+        target_list = target.item.get("items")
+
+        renames = {}
+        if renumber:
+            prefix = item_id_prefix(target.item, self.category_at(target_path))
+            allocator = IdAllocator(self._id_index)
+            for entry, path in entries:
+                if entry.container is target_list:
+                    continue
+                source_prefix = item_id_prefix(self.get_path(path[:-2]), self.category_at(path))
+                item_id = str(entry.item["id"])
+                number = item_id[len(source_prefix) + 1:]
+                if source_prefix != prefix and item_id.startswith(f"{source_prefix}_") and number.isdigit():
+                    renames[item_id] = allocator.allocate(prefix)
+
+        with self.history.step(f"移动 {len(entries)} 个链接", self.category_at(target_path)) as step:
+            for entry, path in sorted(entries, key=lambda pair: pair[1], reverse=True):
+                step.touch(self.category_at(path))
+                step.pop(entry.container, path[-1])
+                if entry.container is target_list and index is not None and path[-1] < index:
+                    index -= 1
+            items = self._target_items(step, target)
+            if index is None or index > len(items):
+                index = len(items)
+            container_path = (*target_path, "items")
+            for offset, (entry, _) in enumerate(entries):
+                step.insert(items, index + offset, entry.item)
+                old_id = str(entry.item["id"])
+                if old_id in renames:
+                    step.set(entry.item, "id", renames[old_id])
+                    del self._id_index[old_id]
+                    self._id_index[renames[old_id]] = entry
+                entry.container = items
+                entry.container_path = container_path
+        self.journal.record_many([path for _, path in entries], "delete")
+        self.journal.record_many([(*container_path, index + offset) for offset in range(len(entries))], "move")
+        return step
+
+    def paste_items(self, items, target_id, index=None):
+        # 在一个撤销步骤中把链接的副本插入目标分类，id 按目标分类重新分配，返回该步
+        target = self.find(target_id)
+        if not target.is_category:
+            raise NavigationError(f"'{target_id}' 不是分类")
+        for item in items:
+            if "items" in item or "subCategories" in item:
+                raise NavigationError(f"'{item.get('id')}' 是分类，只能粘贴链接")
+        target_path = target.path()
+        prefix = item_id_prefix(target.item, self.category_at(target_path))
+        allocator = IdAllocator(self._id_index)
+        with self.history.step(f"粘贴 {len(items)} 个链接", self.category_at(target_path)) as step:
+            target_list = self._target_items(step, target)
+            if index is None or index > len(target_list):
+                index = len(target_list)
+            container_path = (*target_path, "items")
+            for offset, item in enumerate(items):
+                item = copy.deepcopy(item)
+                if "id" in item:
+                    item["id"] = allocator.allocate(prefix)
+                else:
+                    item = {"id": allocator.allocate(prefix), **item}
+                step.insert(target_list, index + offset, item)
+                self._id_index[item["id"]] = IndexEntry(target_list, item, container_path)
+                self.journal.record((*container_path, index + offset), "add")
+        return step
+
+    def apply_op(self, op):
+        kind = op.get("op")
+        if "id" not in op:
+            raise NavigationError("操作缺少 id")
+        if kind == "set":
+            fields = op.get("fields")
+            if fields is None:
+                if "field" not in op:
+                    raise NavigationError("set 操作需要 fields 或 field/value")
+                fields = {op["field"]: op.get("value")}
+            self.set_fields(op["id"], fields)
+        elif kind == "delete":
+            self.delete(op["id"])
+        elif kind == "move":
+            if "to" not in op:
+                raise NavigationError("move 操作需要 to")
+            self.move(op["id"], op["to"], op.get("index"))
+        elif kind == "add":
+            if "to" not in op or not isinstance(op.get("item"), dict):
+                raise NavigationError("add 操作需要 to 和 item")
+            self.add_item(op["to"], dict(op["item"], id=op["id"]), op.get("index"))
+        else:
+            raise NavigationError(f"未知操作: {kind}")
+
+    def apply_ops(self, ops):
+        # 依次应用操作，返回成功应用的数量
+        count = 0
+        for op in ops:
+            self.apply_op(op)
+            count += 1
+        return count
+
+    # ---- 撤销与重做 ----
+
+    def undo(self):
+        # 撤销最近一步修改，返回该步（navhistory.Step），没有可撤销的修改时返回 None
+        return self._replay(self.history.undo())
+
+    def redo(self):
+        return self._replay(self.history.redo())
+
+    def _replay(self, step):
+        if step is not None:
+            self._id_index = None
+            # 即使撤销回保存时的状态，也仍视为有未保存的修改
+            self.journal.record(("history", step.serial), "edit")
+        return step
+
+    # ---- 外部修改 ----
+
+    def disk_changed(self):
+        # 只比较大小和修改时间，可以在主线程中频繁调用
+        if self.disk_state is None:
+            return False
+        try:
+            return not self.disk_state.matches_stat(os.stat(self.json_path))
+        except FileNotFoundError:
+            return False  # 外部程序替换文件的间隙，下次再检查
+
+    def read_external_change(self, cancel=None):
+        # 文件内容与上次加载或保存时不同则返回 (数据, FileState)，否则返回 None；
+        # 只是修改时间变化时更新记录的状态
+        known = self.disk_state
+        try:
+            raw, stat = read_file_with_stat(self.json_path, cancel=cancel)
+        except FileNotFoundError:
+            return None
+        state = FileState.from_read(raw, stat)
+        if known is not None and state.digest == known.digest:
+            if self.disk_state is known:
+                self.disk_state = state
+            return None
+        return self._parse(raw, cancel), state
+
+    def merge_external(self, remote, state):
+        # 将外部修改合并到当前数据，返回冲突列表（冲突处保留本地的值）。
+        # 没有未保存的修改时结果与外部版本相同，但未变化的分类仍是原来的对象
+        try:
+            if self.base is None:
+                raise MergeError("数据中存在缺少 id 或重复 id 的条目，无法与外部修改合并")
+            with profiler.operation("merge"):
+                merged, conflicts = merge(self.base, self.data, remote)
+        except MergeError as e:
+            if not self.is_dirty:
+                self.set_data(remote, state)
+                return []
+            raise NavigationError(str(e))
+        self.data = merged
+        self._id_index = None
+        # 合并可能替换了历史中引用的对象
+        self.history.clear()
+        self.disk_state = state
+        self._capture_base(remote)
+        if merged == remote:
+            self.journal.clear()  # 本地修改已全部包含在外部版本中
+        return conflicts
+
+    # ---- 保存与备份 ----
+
+    def save(self, backup=True, progress=None, validate=None):
+        if self.data is None:
+            raise NavigationError("没有可保存的数据")
+        with profiler.operation("save") as operation:
+            # 文件在上次检查后被外部修改时先合并，避免覆盖外部修改；无法合并时不保存
+            self.save_conflicts = None
+            if self.disk_changed():
+                with profiler.stage("read"):
+                    result = self.read_external_change()
+                if result is not None:
+                    self.save_conflicts = self.merge_external(*result)
+            if self.validate_on_save if validate is None else validate:
+                # 使用单独的 Validator，保存在工作线程中进行时不影响界面读取 self.validator
+                with profiler.stage("validate"):
+                    errors = [str(issue) for issue in validate_data(self.data) if issue.is_error]
+                if errors:
+                    shown = "\n".join(errors[:10])
+                    more = f"\n... 共 {len(errors)} 个错误" if len(errors) > 10 else ""
+                    raise NavigationError(f"校验失败，未保存:\n{shown}{more}")
+            # 备份在写入前进行，记为序列化中的一个子阶段
+            with profiler.stage("serialize"):
+                written, digest, stat = write_json_atomic(self.json_path, self.data,
+                                                          before_write=self.create_backup if backup else None,
+                                                          progress=progress)
+                self.disk_state = FileState.from_stat(stat, digest)
+            operation.note(bytes=self.disk_state.size, written=written)
+            self._capture_base()
+            # 分片和索引不存在或落后时也会补齐，因此完整文件未变化时同样调用
+            with profiler.stage("publish"):
+                self._publish(self.data)
+            self.journal.clear()
+        if self.git_publisher is not None:
+            self.git_publisher.queue(f"保存 {os.path.basename(self.json_path)}")
+        return written
+
+    @property
+    def shard_dir(self):
+        return shard_dir_for(self.json_path)
+
+    @property
+    def search_index_path(self):
+        return search_index_path(self.json_path)
+
+    @property
+    def dist_dir(self):
+        return os.path.join(os.path.dirname(os.path.abspath(self.json_path)), DIST_DIR_NAME)
+
+    def publish(self):
+        # 只根据当前数据重新生成分片、搜索索引和预压缩副本，返回 (写入的文件, 删除的文件)
+        if self.data is None:
+            raise NavigationError("没有可发布的数据")
+        return self._publish(self.data)
+
+    def _publish(self, data):
+        written, removed = [], []
+        if self.write_shards:
+            written, removed = publish_shards(data, self.shard_dir)
+        if self.write_search_index and publish_search_index(data, self.search_index_path):
+            written.append(os.path.basename(self.search_index_path))
+        if self.write_compressed:
+            # 在分片和索引之后执行，派生文件的压缩副本与它们保持一致
+            content_dir = os.path.dirname(os.path.abspath(self.json_path))
+            names = [os.path.basename(self.json_path), SITE_JSON_NAME, os.path.basename(self.search_index_path)]
+            sources = collect_sources(content_dir, names, [self.shard_dir] if self.write_shards else ())
+            compressed, stale = publish_compressed(sources, self.dist_dir)
+            written.extend(f"{DIST_DIR_NAME}/{name}" for name in compressed)
+            removed.extend(f"{DIST_DIR_NAME}/{name}" for name in stale)
+        return written, removed
+
+    def enable_git_publishing(self, branch=None, remote=None):
+        # 发布 navigation.json 所在目录（不含备份）；使用默认文件时一并发布资源目录
+        content_dir = os.path.dirname(os.path.abspath(self.json_path))
+        roots = [content_dir]
+        if content_dir == CONTENT_DIR and os.path.isdir(DEFAULT_ASSET_DIR):
+            roots.append(DEFAULT_ASSET_DIR)
+        exclude = (*DEFAULT_EXCLUDE_DIRS, os.path.basename(os.path.normpath(self.backup_dir)))
+        self.git_publisher = GitPublisher(content_dir, roots, exclude, branch, remote)
+        return self.git_publisher
+
+    def create_backup(self):
+        # 为磁盘上的当前文件创建快照（内容未变化时复用最新快照），返回备份名
+        with profiler.stage("backup"):
+            return self.backups.create(self.json_path).name
+
+    def list_backups(self):
+        # 最新的备份在前
+        return [entry.name for entry in self.backups.list()]
+
+    def restore_backup(self, backup_name):
+        entry = self.backups.get(backup_name)
+
+        with profiler.operation("restore"):
+            # 创建当前文件的备份，再将备份内容写回原始位置
+            if os.path.exists(self.json_path):
+                self.create_backup()
+            with profiler.stage("restore"):
+                self.backups.restore_to(entry, self.json_path)
+            if self.write_shards or self.write_search_index or self.write_compressed:
+                with profiler.stage("publish"):
+                    self._publish(self.backups.load_data(entry))
+        if self.git_publisher is not None:
+            self.git_publisher.queue(f"从备份 {entry.name} 恢复")
+        return entry.name
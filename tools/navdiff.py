@@ -0,0 +1,125 @@
+"""按分类和条目 id 比较两份导航数据"""
+
+
+def iter_links(category):
+    # 产出分类（含各级子分类）下的所有链接
+    for item in category.get("items") or []:
+        if isinstance(item, dict):
+            yield item
+    for sub in category.get("subCategories") or []:
+        if isinstance(sub, dict):
+            yield from iter_links(sub)
+
+
+def count_entries(data):
+    # 返回 (分类数, 链接数)，分类数包含子分类
+    categories = 0
+    links = 0
+
+    def walk(category):
+        nonlocal categories, links
+        categories += 1
+        links += sum(1 for item in category.get("items") or [] if isinstance(item, dict))
+        for sub in category.get("subCategories") or []:
+            if isinstance(sub, dict):
+                walk(sub)
+
+    for category in data.get("navigationItems") or []:
+        if isinstance(category, dict):
+            walk(category)
+    return categories, links
+
+
+def _category_fields(category):
+    return {key: value for key, value in category.items() if key not in ("items", "subCategories")}
+
+
+def _subcategory_fields(category):
+    return [(sub.get("id"), _category_fields(sub)) for sub in category.get("subCategories") or []
+            if isinstance(sub, dict)]
+
+
+def diff_category(old, new):
+    # 比较同一分类的两个版本，返回新增、删除、修改的链接 id 以及分类自身字段是否变化
+    old_links = {str(item.get("id")): item for item in iter_links(old)}
+    new_links = {str(item.get("id")): item for item in iter_links(new)}
+    return {
+        "added": [item_id for item_id in new_links if item_id not in old_links],
+        "removed": [item_id for item_id in old_links if item_id not in new_links],
+        "modified": [item_id for item_id, item in new_links.items()
+                     if item_id in old_links and old_links[item_id] != item],
+        "fields_changed": (_category_fields(old) != _category_fields(new)
+                           or _subcategory_fields(old) != _subcategory_fields(new)),
+    }
+
+
+def diff_navigation(old, new):
+    # 返回发生变化的分类列表，每项包含 id、title、status（added/removed/modified/moved）和链接变化
+    old_categories = [c for c in (old or {}).get("navigationItems") or [] if isinstance(c, dict)]
+    new_categories = [c for c in (new or {}).get("navigationItems") or [] if isinstance(c, dict)]
+    old_by_id = {str(c.get("id")): c for c in old_categories}
+    new_by_id = {str(c.get("id")): c for c in new_categories}
+    old_order = [str(c.get("id")) for c in old_categories if str(c.get("id")) in new_by_id]
+    new_order = [str(c.get("id")) for c in new_categories if str(c.get("id")) in old_by_id]
+
+    changes = []
+    for category_id, category in new_by_id.items():
+        previous = old_by_id.get(category_id)
+        if previous is None:
+            links = [str(item.get("id")) for item in iter_links(category)]
+            changes.append(_change(category, "added", links, [], []))
+        elif previous is not category and previous != category:
+            result = diff_category(previous, category)
+            changes.append(_change(category, "modified", result["added"], result["removed"],
+                                   result["modified"], result["fields_changed"]))
+    for category_id, category in old_by_id.items():
+        if category_id not in new_by_id:
+            links = [str(item.get("id")) for item in iter_links(category)]
+            changes.append(_change(category, "removed", [], links, []))
+    if old_order != new_order:
+        changes.append({"id": None, "title": "分类顺序", "status": "moved",
+                        "added": [], "removed": [], "modified": [], "fields_changed": False})
+    return changes
+
+
+def _change(category, status, added, removed, modified, fields_changed=False):
+    return {
+        "id": str(category.get("id")),
+        "title": category.get("title", ""),
+        "status": status,
+        "added": added,
+        "removed": removed,
+        "modified": modified,
+        "fields_changed": fields_changed,
+    }
+
+
+STATUS_LABELS = {"added": "新增", "removed": "删除", "modified": "修改", "moved": "调整"}
+
+
+def summarize_change(change):
+    # 例如 "常用推荐: 修改 +2 -1 ~3"；各项可以是 id 列表，也可以是清单中保存的数量
+    parts = [f"{change['title']}: {STATUS_LABELS.get(change['status'], change['status'])}"]
+    for sign, key in (("+", "added"), ("-", "removed"), ("~", "modified")):
+        count = change[key] if isinstance(change[key], int) else len(change[key])
+        if count:
+            parts.append(f"{sign}{count}")
+    return " ".join(parts)
+
+
+def format_diff(changes, limit=20):
+    # 生成可读的差异文本
+    if not changes:
+        return "没有差异"
+    lines = []
+    for change in changes:
+        lines.append(summarize_change(change))
+        if change.get("fields_changed"):
+            lines.append("  分类属性有变化")
+        for label, key in (("新增", "added"), ("删除", "removed"), ("修改", "modified")):
+            ids = change[key]
+            if ids:
+                shown = ", ".join(ids[:limit])
+                more = f" 等 {len(ids)} 项" if len(ids) > limit else ""
+                lines.append(f"  {label}: {shown}{more}")
+    return "\n".join(lines)
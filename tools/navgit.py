@@ -0,0 +1,243 @@
+"""把内容和资源文件的改动直接提交到本地 git 仓库
+
+只使用 git 的底层命令，不改动工作区，也不影响暂存区中与发布无关的内容：
+
+    1. git hash-object -w --stdin-paths   计算（并写入）发布目录下每个文件的 blob
+    2. git ls-tree -r                      与当前分支中的版本比较，得到新增、修改和删除的文件
+    3. 临时的 GIT_INDEX_FILE 上执行 read-tree、update-index --index-info 和 write-tree
+    4. git commit-tree 和 git update-ref（以旧提交为前提，分支被别人移动时失败）
+
+提交后，若分支就是当前检出的分支，把同样的条目写入仓库自己的暂存区，git status 中
+不会出现刚提交的文件。
+
+多次保存可以先排队（queue），再合并成一次提交。JSON 文件由 navio 以固定的缩进和
+键顺序写出（与管理后台的 JSON.stringify(data, null, 2) 相同），预压缩副本不含时间
+戳，因此内容不变时 blob 也不变，提交中只出现真正变化的文件。
+"""
+import os
+import subprocess
+import tempfile
+import threading
+
+# 发布目录中不提交的子目录（备份、耗时日志等本机数据）
+DEFAULT_EXCLUDE_DIRS = ("backups",)
+DEFAULT_MESSAGE = "更新导航数据"
+FILE_MODE = "100644"
+EXECUTABLE_MODE = "100755"
+ZERO_OID = "0" * 40
+
+
+class GitPublishError(Exception):
+    pass
+
+
+def run_git(repo, *args, input=None, env=None):
+    # 执行 git 命令并返回标准输出（去掉末尾换行），失败时抛出 GitPublishError
+    try:
+        result = subprocess.run(["git", *args], cwd=repo, input=input, capture_output=True,
+                                env=None if env is None else {**os.environ, **env})
+    except FileNotFoundError:
+        raise GitPublishError("找不到 git 命令")
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip() or f"退出码 {result.returncode}"
+        raise GitPublishError(f"git {args[0]} 失败: {message}")
+    return result.stdout.decode('utf-8', 'replace').rstrip("\n")
+
+
+def find_repository(path):
+    # 包含 path 的仓库根目录；不在仓库中时抛出 GitPublishError
+    directory = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+    return run_git(directory, "rev-parse", "--show-toplevel")
+
+
+class Change:
+    __slots__ = ("path", "mode", "oid", "kind")
+
+    def __init__(self, path, mode, oid, kind):
+        self.path = path  # 仓库内的相对路径（/ 分隔）
+        self.mode = mode
+        self.oid = oid
+        self.kind = kind  # "add" / "modify" / "delete"
+
+    def index_line(self):
+        # update-index --index-info 的输入行；删除用 mode 0
+        if self.kind == "delete":
+            return f"0 {ZERO_OID}\t{self.path}"
+        return f"{self.mode} {self.oid}\t{self.path}"
+
+
+class GitPublisher:
+    def __init__(self, repo, roots, exclude_dirs=DEFAULT_EXCLUDE_DIRS, branch=None, remote=None):
+        # roots: 要发布的目录或文件（绝对路径或相对仓库根目录）；branch 默认为当前检出的分支
+        self.repo = find_repository(repo)
+        self.roots = [self._relative(root) for root in roots]
+        self.exclude_dirs = tuple(exclude_dirs)
+        self.branch = branch
+        self.remote = remote
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _relative(self, path):
+        path = os.path.relpath(os.path.abspath(os.path.join(self.repo, path)), self.repo)
+        if path.startswith(".."):
+            raise GitPublishError(f"{path} 不在仓库 {self.repo} 中")
+        return path.replace(os.sep, "/")
+
+    # ---- 排队 ----
+
+    def queue(self, description):
+        # 记录一次保存，下次 commit 时一并提交
+        with self._lock:
+            self._pending.append(description)
+
+    @property
+    def pending(self):
+        with self._lock:
+            return list(self._pending)
+
+    # ---- 比较 ----
+
+    def _excluded(self, relative):
+        parts = relative.split("/")
+        # 以 . 开头的文件是本机缓存（如 dist/.sources.json）
+        return parts[-1].startswith(".") or any(part in self.exclude_dirs for part in parts[:-1])
+
+    def _working_files(self):
+        files = []
+        for root in self.roots:
+            absolute = os.path.join(self.repo, root)
+            if os.path.isfile(absolute):
+                files.append(root)
+                continue
+            for directory, dirnames, filenames in os.walk(absolute):
+                dirnames[:] = sorted(name for name in dirnames
+                                     if name not in self.exclude_dirs and not name.startswith("."))
+                for filename in sorted(filenames):
+                    path = os.path.join(directory, filename)
+                    if os.path.islink(path):
+                        continue
+                    relative = os.path.relpath(path, self.repo).replace(os.sep, "/")
+                    if not self._excluded(relative):
+                        files.append(relative)
+        return files
+
+    def _branch_ref(self):
+        if self.branch:
+            return self.branch if self.branch.startswith("refs/") else f"refs/heads/{self.branch}"
+        try:
+            return run_git(self.repo, "symbolic-ref", "-q", "HEAD")
+        except GitPublishError:
+            raise GitPublishError("HEAD 不在任何分支上，请指定要提交到的分支")
+
+    def _resolve(self, ref):
+        try:
+            return run_git(self.repo, "rev-parse", "-q", "--verify", f"{ref}^{{commit}}")
+        except GitPublishError:
+            return None  # 分支还没有提交
+
+    def _committed_files(self, commit):
+        # 提交中发布目录下的文件: 路径 -> (mode, oid)
+        if commit is None:
+            return {}
+        output = run_git(self.repo, "ls-tree", "-r", "-z", "--full-tree", commit, "--", *self.roots)
+        files = {}
+        for record in output.split("\0"):
+            if not record:
+                continue
+            meta, path = record.split("\t", 1)
+            mode, kind, oid = meta.split()
+            if kind == "blob" and not self._excluded(path):
+                files[path] = (mode, oid)
+        return files
+
+    def changes(self, commit=None):
+        # 工作区中的发布文件与提交（默认为分支最新提交）相比的改动: [Change]
+        if commit is None:
+            commit = self._resolve(self._branch_ref())
+        committed = self._committed_files(commit)
+        files = self._working_files()
+        oids = []
+        if files:
+            # 一次调用计算全部文件，同时写入对象库
+            oids = run_git(self.repo, "hash-object", "-w", "--stdin-paths",
+                           input="\n".join(files).encode('utf-8')).split("\n")
+        changes = []
+        for path, oid in zip(files, oids):
+            previous = committed.pop(path, None)
+            executable = os.access(os.path.join(self.repo, path), os.X_OK)
+            mode = EXECUTABLE_MODE if executable else FILE_MODE
+            if previous is None:
+                changes.append(Change(path, mode, oid, "add"))
+            elif previous != (mode, oid):
+                changes.append(Change(path, mode, oid, "modify"))
+        for path, (mode, oid) in sorted(committed.items()):
+            changes.append(Change(path, mode, ZERO_OID, "delete"))
+        return changes
+
+    # ---- 提交 ----
+
+    def commit(self, message=None):
+        # 把所有改动写成一次提交并移动分支，返回提交 id；没有改动时返回 None（排队的保存也会清空）
+        with self._lock:
+            pending, self._pending = self._pending, []
+        try:
+            return self._commit(pending, message)
+        except Exception:
+            with self._lock:
+                self._pending[:0] = pending  # 失败时保留，下次重试
+            raise
+
+    def _commit(self, pending, message):
+        ref = self._branch_ref()
+        parent = self._resolve(ref)
+        changes = self.changes(parent)
+        if not changes:
+            return None
+
+        index_info = "".join(f"{change.index_line()}\n" for change in changes).encode('utf-8')
+        handle, index_path = tempfile.mkstemp(prefix="navgit-index-", dir=run_git(self.repo, "rev-parse",
+                                                                                    "--absolute-git-dir"))
+        os.close(handle)
+        os.remove(index_path)  # git 需要自己创建索引文件
+        env = {"GIT_INDEX_FILE": index_path}
+        try:
+            if parent is not None:
+                run_git(self.repo, "read-tree", parent, env=env)
+            run_git(self.repo, "update-index", "--index-info", input=index_info, env=env)
+            tree = run_git(self.repo, "write-tree", env=env)
+        finally:
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+        args = ["commit-tree", tree]
+        if parent is not None:
+            args += ["-p", parent]
+        commit = run_git(self.repo, *args, input=self._message(message, pending, changes).encode('utf-8'))
+        # 以旧提交为前提更新分支，期间分支被移动时失败而不是覆盖别人的提交
+        run_git(self.repo, "update-ref", "-m", "navgit: publish", ref, commit, parent or "")
+
+        if self._is_checked_out(ref):
+            run_git(self.repo, "update-index", "--index-info", input=index_info)
+        if self.remote:
+            run_git(self.repo, "push", "--quiet", self.remote, f"{ref}:{ref}")
+        return commit
+
+    def _is_checked_out(self, ref):
+        try:
+            return run_git(self.repo, "symbolic-ref", "-q", "HEAD") == ref
+        except GitPublishError:
+            return False
+
+    @staticmethod
+    def _message(message, pending, changes):
+        if message is None:
+            message = DEFAULT_MESSAGE
+            if len(pending) > 1:
+                message += f"（{len(pending)} 次保存）"
+        counts = {}
+        for change in changes:
+            counts[change.kind] = counts.get(change.kind, 0) + 1
+        labels = {"add": "新增", "modify": "修改", "delete": "删除"}
+        lines = [message, "", "，".join(f"{labels[kind]} {count} 个文件" for kind, count in counts.items())]
+        lines.extend(f"- {description}" for description in pending)
+        return "\n".join(lines) + "\n"
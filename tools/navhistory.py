@@ -0,0 +1,192 @@
+"""撤销/重做历史
+
+每一步记录的是逆操作所需的最少信息：被修改的容器（dict 或 list）、键或下标，以及
+修改前后的值。值直接引用数据中的对象而不是深拷贝——被删除的节点本身就保存在历史
+中，撤销时原样放回——因此撤销一次修改的开销与文件大小无关。
+
+历史占用的内存按各步涉及的值估算，超过上限时丢弃最早的步骤（最新的一步总是保留）。
+"""
+import sys
+from collections import deque
+
+DEFAULT_MEMORY_LIMIT = 32 * 1024 * 1024
+_MISSING = object()
+
+
+def estimate_size(value):
+    # 粗略估算值占用的内存（字节），只遍历该值本身
+    size = 0
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            stack.extend(current)
+    return size
+
+
+def _set(container, key, value):
+    if value is _MISSING:
+        del container[key]
+    else:
+        container[key] = value
+
+
+def _insert_key(mapping, position, key, value):
+    # 按原来的位置放回字典的键，保持保存后的字段顺序不变
+    items = list(mapping.items())
+    items.insert(position, (key, value))
+    mapping.clear()
+    mapping.update(items)
+
+
+class Step:
+    # 一步可撤销的修改，由若干个基本修改组成，撤销时逆序执行
+    def __init__(self, description, serial):
+        self.description = description
+        self.serial = serial
+        self.changes = []
+        self.categories = []  # 涉及的顶级分类对象，界面据此刷新对应的标签页
+        self.size = 0
+
+    def touch(self, category):
+        if category is not None and not any(c is category for c in self.categories):
+            self.categories.append(category)
+
+    def set(self, container, key, value, previous=_MISSING, applied=False):
+        # 设置 container[key]；applied 为 True 表示调用方已经写入，previous 是写入前的值
+        if not applied:
+            previous = container[key] if (isinstance(container, list) or key in container) else _MISSING
+            container[key] = value
+        self.changes.append(("set", container, key, previous, value))
+        self.size += estimate_size(previous) + sys.getsizeof(value) + 64
+
+    def pop(self, container, key):
+        # 删除列表元素或字典的键，返回被删除的值
+        if isinstance(container, list):
+            value = container.pop(key)
+            self.changes.append(("pop", container, key, value, None))
+        else:
+            position = list(container).index(key)
+            value = container.pop(key)
+            self.changes.append(("pop", container, key, value, position))
+        self.size += estimate_size(value) + 64
+        return value
+
+    def insert(self, container, index, value):
+        container.insert(index, value)
+        self.changes.append(("insert", container, index, value, None))
+        self.size += estimate_size(value) + 64
+
+    def undo(self):
+        for kind, container, key, old, extra in reversed(self.changes):
+            if kind == "set":
+                _set(container, key, old)
+            elif kind == "pop":
+                if isinstance(container, list):
+                    container.insert(key, old)
+                else:
+                    _insert_key(container, extra, key, old)
+            else:
+                del container[key]
+
+    def redo(self):
+        for kind, container, key, value, extra in self.changes:
+            if kind == "set":
+                _set(container, key, extra)
+            elif kind == "pop":
+                del container[key]
+            else:
+                container.insert(key, value)
+
+
+class History:
+    def __init__(self, memory_limit=DEFAULT_MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self._undo = deque()
+        self._redo = []
+        self._open = None
+        self._depth = 0
+        self._serial = 0
+        self.size = 0
+
+    def step(self, description, category=None):
+        # 用 with 包住一组修改；嵌套调用时并入最外层的一步
+        return _StepScope(self, description, category)
+
+    def _begin(self, description, category):
+        if self._open is None:
+            self._serial += 1
+            self._open = Step(description, self._serial)
+        self._depth += 1
+        self._open.touch(category)
+        return self._open
+
+    def _end(self):
+        self._depth -= 1
+        if self._depth:
+            return
+        step, self._open = self._open, None
+        if not step.changes:
+            return
+        self._undo.append(step)
+        self.size += step.size
+        for dropped in self._redo:
+            self.size -= dropped.size
+        self._redo.clear()
+        self._evict()
+
+    def _evict(self):
+        while self.size > self.memory_limit and len(self._undo) > 1:
+            self.size -= self._undo.popleft().size
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self):
+        # 撤销最近一步并返回它，没有可撤销的步骤时返回 None
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        step.undo()
+        self._redo.append(step)
+        return step
+
+    def redo(self):
+        if not self._redo:
+            return None
+        step = self._redo.pop()
+        step.redo()
+        self._undo.append(step)
+        return step
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._undo)
+
+
+class _StepScope:
+    def __init__(self, history, description, category):
+        self.history = history
+        self.description = description
+        self.category = category
+
+    def __enter__(self):
+        return self.history._begin(self.description, self.category)
+
+    def __exit__(self, exc_type, exc, tb):
+        # 出错时保留已经执行的部分，仍可撤销
+        self.history._end()
+        return False
@@ -0,0 +1,175 @@
+"""图标资源去重与清理
+
+按内容哈希找出 public/assets 中完全相同的图标文件，把导航数据中的 icon 引用
+统一改为同组中的一个规范路径；同时列出没有被任何内容文件引用的图标文件，以及
+指向不存在文件的引用。只比较字节完全相同的文件。
+"""
+import os
+
+from navassets import ASSET_URL_PREFIX, AssetIndex, regenerate_metadata
+from navcore import (CONTENT_DIR, DEFAULT_ASSET_CACHE, DEFAULT_ASSET_DIR,
+                     DEFAULT_METADATA_PATH)
+from navio import loads_json
+
+# 参与去重的图标目录（相对于资源目录）及文件名前缀，None 表示目录中的所有文件
+ICON_DIRS = (
+    ("", ("favicon_", "img_")),
+    ("images/logos", None),
+)
+# 除正在编辑的导航数据外，这些内容文件中的引用也会保留对应的文件
+REFERENCE_FILES = ("navigation-default.json", "site.json")
+
+
+def _iter_strings(node):
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, dict):
+        for value in node.values():
+            yield from _iter_strings(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _iter_strings(value)
+
+
+def url_to_path(url, asset_dir=DEFAULT_ASSET_DIR):
+    # "/assets/images/logos/a.png" -> <资源目录>/images/logos/a.png，其他地址返回 None
+    if not isinstance(url, str) or not url.startswith(ASSET_URL_PREFIX):
+        return None
+    relative = url[len(ASSET_URL_PREFIX):].split("?", 1)[0].split("#", 1)[0]
+    parts = [part for part in relative.split("/") if part]
+    if not parts or ".." in parts:
+        return None
+    return os.path.join(asset_dir, *parts)
+
+
+def scan_icon_files(asset_dir=DEFAULT_ASSET_DIR, cache_path=DEFAULT_ASSET_CACHE):
+    # 返回 url -> (大小, 哈希)
+    files = {}
+    for subdir, prefixes in ICON_DIRS:
+        directory = os.path.join(asset_dir, *subdir.split("/")) if subdir else asset_dir
+        if not os.path.isdir(directory):
+            continue
+        index = AssetIndex(directory, cache_path)
+        index.refresh()
+        for name, (size, _, _, digest) in index.files.items():
+            if prefixes is None or name.startswith(prefixes):
+                files[f"{ASSET_URL_PREFIX}{subdir + '/' if subdir else ''}{name}"] = (size, digest)
+    return files
+
+
+def external_references(content_dir=CONTENT_DIR):
+    # 其他内容文件中出现的 /assets/ 地址
+    urls = set()
+    for filename in REFERENCE_FILES:
+        try:
+            with open(os.path.join(content_dir, filename), 'rb') as file:
+                data = loads_json(file.read())
+        except (OSError, ValueError):
+            continue
+        urls.update(text for text in _iter_strings(data) if text.startswith(ASSET_URL_PREFIX))
+    return urls
+
+
+class IconReport:
+    def __init__(self, files, remap, groups, unreferenced, dangling, external=()):
+        self.files = files                # url -> (大小, 哈希)
+        self.remap = remap                # 重复文件 url -> 规范 url
+        self.groups = groups              # [(规范 url, [重复 url], 单个文件大小)]
+        self.unreferenced = unreferenced  # 当前没有被任何内容文件引用的图标文件 url
+        self.dangling = dangling          # 指向不存在文件的 url -> [引用它的条目 id]
+        self.external = set(external)     # 其他内容文件中的引用
+
+    @property
+    def total_bytes(self):
+        return sum(size for size, _ in self.files.values())
+
+    @property
+    def removable_bytes(self):
+        return sum(self.files[url][0] for url in self.unreferenced)
+
+    @property
+    def redundant(self):
+        # 改写引用并保存后才会变为未引用的重复文件
+        return [url for url in self.remap if url not in self.unreferenced and url not in self.external]
+
+    def format(self, limit=50):
+        lines = [f"图标文件 {len(self.files)} 个，共 {self.total_bytes / 1024:.1f} KB",
+                 f"重复文件 {len(self.groups)} 组，可改写引用 {len(self.remap)} 个路径"]
+        for canonical, duplicates, size in self.groups[:limit]:
+            lines.append(f"  {canonical} <- {', '.join(duplicates)}（{size} 字节）")
+        lines.append(f"未被引用的文件 {len(self.unreferenced)} 个，共 {self.removable_bytes / 1024:.1f} KB")
+        lines.extend(f"  {url}" for url in self.unreferenced[:limit])
+        lines.append(f"失效引用 {len(self.dangling)} 个")
+        for url, item_ids in list(self.dangling.items())[:limit]:
+            lines.append(f"  {url}: {', '.join(item_ids)}")
+        redundant = self.redundant
+        remaining = len(self.files) - len(self.unreferenced) - len(redundant)
+        remaining_bytes = self.total_bytes - self.removable_bytes - sum(self.files[url][0] for url in redundant)
+        lines.append(f"改写引用并删除未引用文件后: {remaining} 个文件，{remaining_bytes / 1024:.1f} KB")
+        return "\n".join(lines)
+
+
+def analyze(document, asset_dir=DEFAULT_ASSET_DIR, cache_path=DEFAULT_ASSET_CACHE, content_dir=CONTENT_DIR):
+    files = scan_icon_files(asset_dir, cache_path)
+
+    # 导航数据中的 icon 引用: url -> [条目 id]
+    icon_refs = {}
+    for _, item in document.iter_entries():
+        icon = item.get("icon")
+        if isinstance(icon, str) and icon.startswith(ASSET_URL_PREFIX):
+            icon_refs.setdefault(icon, []).append(str(item.get("id", "")))
+    other_refs = external_references(content_dir)
+
+    # 按哈希分组；引用最多的路径作为规范路径，相同时取路径最小的
+    by_digest = {}
+    for url, (size, digest) in files.items():
+        by_digest.setdefault(digest, []).append(url)
+    remap = {}
+    groups = []
+    for urls in by_digest.values():
+        if len(urls) < 2:
+            continue
+        urls.sort(key=lambda url: (-len(icon_refs.get(url, ())), url))
+        canonical = urls[0]
+        duplicates = urls[1:]
+        groups.append((canonical, duplicates, files[canonical][0]))
+        for url in duplicates:
+            remap[url] = canonical
+    groups.sort(key=lambda group: group[0])
+
+    # 未引用的判断基于磁盘和内存中当前的引用，重复文件要等引用改写并保存后才能删除
+    referenced = set(icon_refs) | other_refs
+    unreferenced = sorted(url for url in files if url not in referenced)
+    dangling = {url: item_ids for url, item_ids in sorted(icon_refs.items())
+                if url not in files and not os.path.isfile(url_to_path(url, asset_dir) or "")}
+    return IconReport(files, remap, groups, unreferenced, dangling, other_refs)
+
+
+def apply_remap(document, remap):
+    # 将 icon 引用改写为规范路径，返回改写的条目数
+    count = 0
+    with document.history.step("改写重复图标引用") as step:
+        for path, item in document.iter_entries():
+            icon = item.get("icon")
+            if isinstance(icon, str) and icon in remap:
+                step.touch(document.category_at(path))
+                step.set(item, "icon", remap[icon])
+                document.journal.record((*path, "icon"), "edit")
+                count += 1
+    return count
+
+
+def remove_unreferenced(report, asset_dir=DEFAULT_ASSET_DIR, metadata_path=DEFAULT_METADATA_PATH,
+                        cache_path=DEFAULT_ASSET_CACHE):
+    # 删除未被引用的图标文件并更新资源清单，返回删除的 url 列表
+    removed = []
+    for url in report.unreferenced:
+        path = url_to_path(url, asset_dir)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed.append(url)
+    if removed and os.path.exists(metadata_path):
+        regenerate_metadata(metadata_path, asset_dir, cache_path)
+    return removed
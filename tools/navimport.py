@@ -0,0 +1,265 @@
+"""批量导入候选链接（浏览器书签 HTML、CSV、JSONL）
+
+输入逐块读取和解析，不会整体载入内存。每个候选链接按 navschema.normalize_url 规范化
+后与已有链接的哈希索引比较，重复的跳过；其余按所在书签文件夹或 category 列路由到
+标题或 id 匹配的分类，找不到时放入默认分类。新条目的 id 按 "<分类id>_<序号>" 分配。
+
+导入分两步：plan_import 只读取数据、生成计划，可以在工作线程中执行；apply_import
+在一个撤销步骤中插入全部条目。
+"""
+import csv
+import os
+import re
+from html.parser import HTMLParser
+
+from navcore import IdAllocator, NavigationError, item_id_prefix
+from navio import READ_CHUNK_SIZE, OperationCancelled, loads_json
+from navschema import normalize_url
+
+FORMATS = ("html", "csv", "jsonl")
+FORMAT_EXTENSIONS = {".html": "html", ".htm": "html", ".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# 各字段在 CSV 表头或 JSONL 对象中可以使用的名称
+FIELD_ALIASES = {
+    "href": ("href", "url", "link", "链接", "网址"),
+    "title": ("title", "name", "标题", "名称"),
+    "description": ("description", "desc", "描述", "简介"),
+    "icon": ("icon", "图标"),
+    "category": ("category", "folder", "分类", "文件夹"),
+}
+_LINK_SCHEME = re.compile(r"^https?://", re.IGNORECASE)
+
+
+def detect_format(path):
+    fmt = FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise NavigationError(f"无法根据扩展名判断格式: {path}（可选格式: {', '.join(FORMATS)}）")
+    return fmt
+
+
+_ALIAS_FIELDS = {alias.casefold(): field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+
+def _field_keys(keys):
+    # 记录中的键 -> {字段: 键}，同一字段有多个别名时取第一个出现的
+    mapping = {}
+    for key in keys:
+        field = _ALIAS_FIELDS.get(str(key).strip().casefold())
+        if field is not None:
+            mapping.setdefault(field, key)
+    return mapping
+
+
+# ---- 解析 ----
+
+class _BookmarkParser(HTMLParser):
+    # Netscape 书签格式：<DT><H3>文件夹</H3><DL> ... <DT><A HREF=...>标题</A><DD>描述 ... </DL>
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.folders = []       # 当前所在的文件夹（None 表示没有标题的 DL）
+        self.pending_folder = None
+        self.capture = None     # 正在收集文本的目标: "folder" / "title" / "description"
+        self.text = []
+        self.link = None
+        self.ready = []
+
+    def _flush(self):
+        text = "".join(self.text).strip()
+        self.text = []
+        if self.capture == "folder":
+            self.pending_folder = text
+        elif self.capture == "title" and self.link is not None:
+            self.link["title"] = text
+        elif self.capture == "description" and self.ready and text:
+            self.ready[-1]["description"] = text
+        self.capture = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.capture == "description":
+            self._flush()
+        if tag == "h3":
+            self.capture = "folder"
+        elif tag == "dl":
+            self.folders.append(self.pending_folder)
+            self.pending_folder = None
+        elif tag == "a":
+            attrs = dict(attrs)
+            self.link = {"href": (attrs.get("href") or "").strip(), "title": "",
+                         "folders": [folder for folder in self.folders if folder]}
+            self.capture = "title"
+        elif tag == "dd":
+            self.capture = "description"
+
+    def handle_endtag(self, tag):
+        if tag in ("h3", "a") and self.capture in ("folder", "title"):
+            self._flush()
+        if tag == "a" and self.link is not None:
+            self.ready.append(self.link)
+            self.link = None
+        elif tag == "dl":
+            if self.capture == "description":
+                self._flush()
+            if self.folders:
+                self.folders.pop()
+
+    def handle_data(self, data):
+        if self.capture is not None:
+            self.text.append(data)
+
+
+def iter_bookmarks_html(stream, chunk_size=READ_CHUNK_SIZE):
+    parser = _BookmarkParser()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        parser.feed(chunk)
+        # 最后一个链接的描述可能还没读完，先保留
+        while len(parser.ready) > 1:
+            yield _bookmark(parser.ready.pop(0))
+    parser.close()
+    if parser.capture == "description":
+        parser._flush()
+    for link in parser.ready:
+        yield _bookmark(link)
+
+
+def _bookmark(link):
+    return {"href": link["href"], "title": link["title"], "description": link.get("description", ""),
+            "icon": "", "route": list(reversed(link["folders"]))}
+
+
+def iter_csv(stream):
+    reader = csv.DictReader(stream)
+    fields = _field_keys(reader.fieldnames or ())  # 表头只解析一次
+    for record in reader:
+        yield _candidate(record, fields)
+
+
+def iter_jsonl(stream):
+    layouts = {}
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            record = loads_json(line)
+        except ValueError as e:
+            raise NavigationError(f"第 {line_no} 行不是有效的 JSON: {e}")
+        if not isinstance(record, dict):
+            raise NavigationError(f"第 {line_no} 行应为 JSON 对象")
+        keys = tuple(record)
+        fields = layouts.get(keys)
+        if fields is None:
+            fields = layouts[keys] = _field_keys(keys)
+        yield _candidate(record, fields)
+
+
+def _candidate(record, fields, folders=()):
+    values = {}
+    for field in FIELD_ALIASES:
+        value = record.get(fields[field]) if field in fields else None
+        values[field] = "" if value is None else str(value).strip()
+    category = values.pop("category")
+    # 路由时从最内层的文件夹开始匹配
+    values["route"] = [category] if category else list(reversed(folders))
+    return values
+
+
+def iter_candidates(path, fmt=None):
+    # 逐个产出候选链接: {"href", "title", "description", "icon", "route": [分类名称...]}
+    fmt = fmt or detect_format(path)
+    parsers = {"html": iter_bookmarks_html, "csv": iter_csv, "jsonl": iter_jsonl}
+    if fmt not in parsers:
+        raise NavigationError(f"不支持的格式: {fmt}")
+    stream = open(path, 'r', encoding='utf-8-sig', newline='' if fmt == "csv" else None)
+    with stream:
+        yield from parsers[fmt](stream)
+
+
+# ---- 计划与应用 ----
+
+class ImportPlan:
+    def __init__(self):
+        self.additions = []   # [(目标分类 id, 新条目)]
+        self.duplicates = []  # [(链接, 与之重复的已有条目 id 或 "本次导入")]
+        self.invalid = []     # [(原始记录, 原因)]
+        self.unrouted = []    # 找不到目标分类的候选链接
+
+    @property
+    def total(self):
+        return len(self.additions) + len(self.duplicates) + len(self.invalid) + len(self.unrouted)
+
+    def summary(self):
+        return (f"共 {self.total} 个候选链接：新增 {len(self.additions)}，重复 {len(self.duplicates)}，"
+                f"无效 {len(self.invalid)}，无法确定分类 {len(self.unrouted)}")
+
+
+def plan_import(document, candidates, default_category=None, cancel=None):
+    # 只读取当前数据；default_category 是找不到匹配分类时使用的分类 id
+    plan = ImportPlan()
+    known = {}       # 规范化后的链接 -> 已有条目的 id
+    ids = []
+    categories = {}  # 分类 id 或标题（不区分大小写） -> 分类 id
+    prefixes = {}    # 分类 id -> 新条目 id 的前缀
+    for path, node in document.iter_entries():
+        if "id" in node:
+            ids.append(str(node["id"]))
+        if path[-2] in ("navigationItems", "subCategories"):
+            if "id" in node:
+                node_id = str(node["id"])
+                for key in (node_id, str(node.get("title", ""))):
+                    categories.setdefault(key.casefold(), node_id)
+                prefixes[node_id] = item_id_prefix(node, document.category_at(path))
+        elif isinstance(node.get("href"), str):
+            known.setdefault(normalize_url(node["href"]), str(node.get("id", "")))
+    if default_category is not None and not document.find(default_category).is_category:
+        raise NavigationError(f"'{default_category}' 不是分类")
+    default = str(default_category) if default_category is not None else None
+    allocator = IdAllocator(ids)
+
+    for count, candidate in enumerate(candidates):
+        if cancel is not None and count % 1000 == 0 and cancel.is_set():
+            raise OperationCancelled()
+        href = candidate["href"]
+        if not href:
+            plan.invalid.append((candidate, "缺少链接"))
+            continue
+        if not _LINK_SCHEME.match(href):
+            plan.invalid.append((candidate, "不是 http(s) 链接"))
+            continue
+        key = normalize_url(href)
+        if key in known:
+            plan.duplicates.append((href, known[key] or "本次导入"))
+            continue
+        target = next((categories[name.casefold()] for name in candidate["route"]
+                       if name.casefold() in categories), default)
+        if target is None:
+            plan.unrouted.append(candidate)
+            continue
+        known[key] = ""
+        item = {
+            "id": allocator.allocate(prefixes.get(target, target)),
+            "title": candidate["title"] or _host(href),
+            "href": href,
+            "description": candidate["description"],
+            "icon": candidate["icon"],
+            "enabled": True,
+        }
+        plan.additions.append((target, item))
+    return plan
+
+
+def _host(href):
+    return re.sub(r"^https?://(www\.)?", "", href, flags=re.IGNORECASE).split("/", 1)[0]
+
+
+def apply_import(document, plan):
+    # 在一个撤销步骤中插入全部条目，返回该步（navhistory.Step），没有新增条目时返回 None
+    if not plan.additions:
+        return None
+    # 图形界面中直接修改数据后 id 索引可能已过期
+    document.invalidate_index()
+    with document.history.step(f"导入 {len(plan.additions)} 个链接") as step:
+        for target, item in plan.additions:
+            document.add_item(target, item)
+    return step
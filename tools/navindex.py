@@ -0,0 +1,185 @@
+"""发布时生成的紧凑搜索索引文件（navigation.search.json）
+
+网站端不必再扫描完整的导航数据：索引把词项映射到压缩后的文档号列表，
+文档号对应 docs 中的 [条目 id, 顶级分类下标]。
+
+分词规则（网站端查询时需保持一致）：
+    文本先做 NFKC 规范化并转为小写；
+    连续的拉丁字母和数字组成一个词；
+    连续的中日韩字符产出每个单字和每对相邻双字。
+查询时拉丁词按前缀匹配所有以它开头的词项，中日韩文本取其双字（单字时取单字），
+各部分的结果取交集。
+
+文档号列表先做差分，再按变长编码写成字符串：每个字符取 POSTING_ALPHABET
+中的位置，低 5 位是数据（低位在前），第 6 位表示后面还有字符。
+
+索引以相关字段（id、标题、描述、链接和分类结构）的哈希作为版本，
+这些字段没有变化时不重新生成。
+"""
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+from navio import loads_json, write_bytes_atomic
+
+INDEX_VERSION = 1
+INDEXED_FIELDS = ("title", "description", "href")
+POSTING_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ-_"
+_CJK = "぀-ヿ㐀-䶿一-鿿가-힯豈-﫿"
+_TOKEN = re.compile(f"[a-z0-9]+|[{_CJK}]+")
+_CJK_RUN = re.compile(f"[{_CJK}]")
+_DECODE = {char: value for value, char in enumerate(POSTING_ALPHABET)}
+# 链接只索引主机名和路径，协议和 www. 前缀对检索没有意义
+_URL_PREFIX = re.compile(r"^[a-z][a-z0-9+.-]*://(www\.)?")
+
+
+def search_index_path(json_path):
+    # navigation.json -> 同目录下的 navigation.search.json
+    return os.path.splitext(os.path.abspath(json_path))[0] + ".search.json"
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", str(text)).casefold()
+
+
+def tokenize(text):
+    # 返回文本中的词项集合
+    terms = set()
+    for token in _TOKEN.findall(normalize(text)):
+        if _CJK_RUN.match(token):
+            terms.update(token)
+            terms.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            terms.add(token)
+    return terms
+
+
+def encode_postings(numbers):
+    # 升序文档号 -> 差分变长编码字符串
+    chars = []
+    previous = -1
+    for number in numbers:
+        delta = number - previous - 1
+        previous = number
+        while True:
+            low = delta & 31
+            delta >>= 5
+            chars.append(POSTING_ALPHABET[low | 32 if delta else low])
+            if not delta:
+                break
+    return "".join(chars)
+
+
+def decode_postings(text):
+    numbers = []
+    previous = -1
+    value = 0
+    shift = 0
+    for char in text:
+        code = _DECODE[char]
+        value |= (code & 31) << shift
+        if code & 32:
+            shift += 5
+            continue
+        previous += value + 1
+        numbers.append(previous)
+        value = 0
+        shift = 0
+    return numbers
+
+
+def _categories(data):
+    return [category for category in data.get("navigationItems") or [] if isinstance(category, dict)]
+
+
+def _category_ids(data):
+    return [str(category.get("id", "")) for category in _categories(data)]
+
+
+def _iter_documents(data):
+    # 产出 (顶级分类下标, 链接)，下标对应索引中的 categories 列表；分类和子分类本身不作为结果
+    for category_index, category in enumerate(_categories(data)):
+        stack = [category]
+        while stack:
+            node = stack.pop(0)
+            for item in node.get("items") or []:
+                if isinstance(item, dict):
+                    yield category_index, item
+            stack.extend(sub for sub in node.get("subCategories") or [] if isinstance(sub, dict))
+
+
+def content_version(data):
+    # 只覆盖影响索引的字段：顶级分类 id 列表和链接的索引字段；
+    # 其他字段（如图标、启用状态）的修改不会使索引失效
+    digest = hashlib.sha256()
+    digest.update("\x1f".join(_category_ids(data)).encode('utf-8'))
+    digest.update(b"\x1d")
+    for category_index, item in _iter_documents(data):
+        fields = [str(category_index), str(item.get("id", ""))]
+        fields.extend(str(item.get(field) or "") for field in INDEXED_FIELDS)
+        digest.update("\x1f".join(fields).encode('utf-8'))
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:16]
+
+
+def build_search_index(data, version=None):
+    docs = []
+    postings = {}
+    for number, (category_index, item) in enumerate(_iter_documents(data)):
+        docs.append([str(item.get("id", "")), category_index])
+        terms = set()
+        for field in INDEXED_FIELDS:
+            value = item.get(field)
+            if value and field == "href":
+                value = _URL_PREFIX.sub("", normalize(value))
+            if value:
+                terms |= tokenize(value)
+        for term in terms:
+            postings.setdefault(term, []).append(number)
+    return {
+        "version": INDEX_VERSION,
+        "source": version or content_version(data),
+        "categories": _category_ids(data),
+        "docs": docs,
+        "terms": {term: encode_postings(postings[term]) for term in sorted(postings)},
+    }
+
+
+def publish_search_index(data, path):
+    # 相关字段没有变化时不重建也不写入，返回是否写入
+    version = content_version(data)
+    try:
+        with open(path, 'rb') as file:
+            existing = loads_json(file.read())
+        if (isinstance(existing, dict) and existing.get("version") == INDEX_VERSION
+                and existing.get("source") == version):
+            return False
+    except (OSError, ValueError):
+        pass
+    index = build_search_index(data, version)
+    raw = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    write_bytes_atomic(path, [raw])
+    return True
+
+
+def query_search_index(index, text, limit=50):
+    # 查询规则的参考实现，返回 docs 中的 [条目 id, 分类下标] 列表
+    terms = index["terms"]
+    result = None
+    for token in _TOKEN.findall(normalize(text)):
+        if _CJK_RUN.match(token):
+            grams = [token] if len(token) == 1 else [token[i:i + 2] for i in range(len(token) - 1)]
+            for gram in grams:
+                numbers = set(decode_postings(terms.get(gram, "")))
+                result = numbers if result is None else result & numbers
+        else:
+            numbers = set()
+            for term, packed in terms.items():
+                if term.startswith(token):
+                    numbers.update(decode_postings(packed))
+            result = numbers if result is None else result & numbers
+        if not result:
+            return []
+    return [index["docs"][number] for number in sorted(result or ())[:limit]]
@@ -0,0 +1,196 @@
+"""原子写入、分块读取与JSON编解码等文件I/O工具"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+try:
+    import orjson  # 可选依赖，解析速度是标准库的数倍
+except ImportError:
+    orjson = None
+
+# 流式写入时每次写入磁盘的字节数
+WRITE_CHUNK_SIZE = 64 * 1024
+# 分块读取时每次读取的字节数，两次读取之间检查是否被取消
+READ_CHUNK_SIZE = 1024 * 1024
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+_LONG_NUMBER = re.compile(rb"\d{20}")
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+def loads_json(raw):
+    # 解析 bytes 或 str。安装了 orjson 时优先使用；出错时交给标准库重新解析，
+    # 错误类型和信息与标准库一致。orjson 会把超出 64 位的整数转成浮点数，
+    # 出现 20 位以上的数字时也使用标准库，保证保存后内容不变
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    if orjson is not None and not _LONG_NUMBER.search(raw):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw.decode('utf-8'))
+
+
+def read_file(path, progress=None, cancel=None, chunk_size=READ_CHUNK_SIZE):
+    # 分块读取整个文件；progress(已读字节, 总字节)，cancel 被设置时抛出 OperationCancelled
+    return read_file_with_stat(path, progress, cancel, chunk_size)[0]
+
+
+def read_file_with_stat(path, progress=None, cancel=None, chunk_size=READ_CHUNK_SIZE):
+    # 同 read_file，另外返回读取前对同一文件描述符的 fstat 结果，
+    # 文件在读取后被替换时大小和修改时间仍属于读到的版本
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        total = stat.st_size
+        buffer = bytearray()
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise OperationCancelled()
+            block = file.read(chunk_size)
+            if not block:
+                break
+            buffer += block
+            if progress is not None:
+                progress(len(buffer), total)
+    return bytes(buffer), stat
+
+
+def iter_json_chunks(data, indent=2, chunk_size=WRITE_CHUNK_SIZE):
+    # 将编码结果按块产出，不在内存中拼接完整的字符串
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=indent)
+    pending = []
+    size = 0
+    for piece in encoder.iterencode(data):
+        pending.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(pending).encode('utf-8')
+            pending = []
+            size = 0
+    if pending:
+        yield "".join(pending).encode('utf-8')
+
+
+def write_json_atomic(path, data, indent=2, before_write=None, progress=None):
+    # 流式写入同目录下的临时文件，fsync 后原子替换目标文件。
+    # 编码结果与磁盘上的内容逐块比较，完全一致时不写入任何内容。
+    # progress(已编码字节) 在每个块之后调用。
+    # 返回 (是否写入, 内容的 SHA-256, stat)：stat 是替换前临时文件的 fstat，
+    # 未写入时是旧文件的 fstat，不需要重新读取文件就能记录磁盘上的版本
+    directory = os.path.dirname(os.path.abspath(path))
+    existing = open(path, 'rb') if os.path.exists(path) else None
+    digest = hashlib.sha256()
+    matched = 0
+    encoded = 0
+    tmp_file = None
+    tmp_path = None
+    try:
+        for chunk in iter_json_chunks(data, indent):
+            encoded += len(chunk)
+            digest.update(chunk)
+            if progress is not None:
+                progress(encoded)
+            if tmp_file is None and existing is not None:
+                if existing.read(len(chunk)) == chunk:
+                    matched += len(chunk)
+                    continue
+            if tmp_file is None:
+                tmp_file, tmp_path = _open_temp(directory, path, existing, matched, before_write)
+            tmp_file.write(chunk)
+
+        if tmp_file is None:
+            if existing is not None and not existing.read(1):
+                return False, digest.hexdigest(), os.fstat(existing.fileno())  # 内容未变化
+            # 新内容是旧文件的前缀（或目标文件不存在）
+            tmp_file, tmp_path = _open_temp(directory, path, existing, matched, before_write)
+
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+        if existing is not None:
+            existing.close()
+            shutil.copymode(path, tmp_path)
+        else:
+            _set_default_mode(tmp_path)
+        # 修改权限不影响大小和修改时间；重命名后的文件可能已被外部程序替换，因此在替换前取得
+        stat = os.fstat(tmp_file.fileno())
+        tmp_file.close()
+        os.replace(tmp_path, path)
+        tmp_path = None
+        _fsync_directory(directory)
+        return True, digest.hexdigest(), stat
+    finally:
+        if existing is not None:
+            existing.close()
+        if tmp_file is not None and not tmp_file.closed:
+            tmp_file.close()
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_bytes_atomic(path, chunks):
+    # 将字节块写入临时文件后原子替换目标文件
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            for chunk in chunks:
+                tmp_file.write(chunk)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            _set_default_mode(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(directory)
+
+
+def _open_temp(directory, path, existing, matched, before_write):
+    if before_write is not None and existing is not None:
+        before_write()
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    tmp_file = os.fdopen(fd, 'wb')
+    if matched:
+        # 已经比较过的前缀与旧文件相同，直接从旧文件复制
+        existing.seek(0)
+        remaining = matched
+        while remaining:
+            block = existing.read(min(remaining, WRITE_CHUNK_SIZE))
+            tmp_file.write(block)
+            remaining -= len(block)
+    return tmp_file, tmp_path
+
+
+def _current_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# 进程启动时读取一次；mkstemp 创建的文件权限为 0600，新文件改为普通文件的默认权限
+_UMASK = _current_umask()
+
+
+def _set_default_mode(path):
+    os.chmod(path, 0o666 & ~_UMASK)
+
+
+def _fsync_directory(directory):
+    # 确保重命名本身落盘（Windows 不支持对目录 fsync）
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,310 @@
+"""导航链接的可用性检查
+
+用有限并发的 asyncio 任务检查所有 href：每个主机有单独的并发上限和最小请求
+间隔，同一主机的 keep-alive 连接在工作线程之间复用。结果按 URL 缓存到磁盘，
+在有效期内不再请求；过期后带上 ETag / Last-Modified 做条件请求，未变化的
+链接只需要一个 304 响应。
+"""
+import asyncio
+import http.client
+import json
+import os
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+from navdiff import iter_links
+from navio import write_json_atomic
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST = 2
+DEFAULT_HOST_INTERVAL = 0.25
+DEFAULT_TIMEOUT = 10
+MAX_REDIRECTS = 5
+GET_READ_LIMIT = 64 * 1024
+USER_AGENT = "NavSphere-LinkChecker/1.0"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# 部分服务器不支持 HEAD，遇到这些状态码时改用 GET 再试一次
+HEAD_FALLBACK_STATUSES = (400, 403, 405, 501)
+CACHE_VERSION = 1
+
+
+def is_http_url(url):
+    return urlsplit(url).scheme in ("http", "https")
+
+
+def collect_links(data):
+    # 返回 href -> 使用该链接的条目列表
+    links = {}
+    for category in (data or {}).get("navigationItems") or []:
+        if not isinstance(category, dict):
+            continue
+        for item in iter_links(category):
+            href = item.get("href")
+            if isinstance(href, str) and href.strip():
+                links.setdefault(href.strip(), []).append(item)
+    return links
+
+
+def failed_items(links, results):
+    # 返回检查失败的 (条目, 结果) 列表，links 为 collect_links 的返回值
+    failures = []
+    for url, items in links.items():
+        record = results.get(url)
+        if record is not None and not record.get("ok"):
+            failures.extend((item, record) for item in items)
+    return failures
+
+
+def describe_result(record):
+    if record.get("skipped"):
+        return "已跳过"
+    if record.get("error"):
+        return record["error"]
+    text = f"HTTP {record.get('status')}"
+    if record.get("final_url") and record["final_url"] != record.get("url"):
+        text += f" -> {record['final_url']}"
+    return text
+
+
+class LinkCache:
+    # 按 URL 保存检查结果，ttl 秒内的结果直接复用
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        self._dirty = False
+        if path:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except (ValueError, OSError):
+            # 缓存损坏时当作没有缓存，下次保存会覆盖
+            data = {}
+        entries = data.get("links") if isinstance(data, dict) and data.get("version") == CACHE_VERSION else None
+        self.entries = entries if isinstance(entries, dict) else {}
+        self._dirty = False
+
+    def get(self, url):
+        return self.entries.get(url)
+
+    def is_fresh(self, record, now=None):
+        if record is None:
+            return False
+        now = time.time() if now is None else now
+        return now - record.get("checked", 0) < self.ttl
+
+    def put(self, record):
+        self.entries[record["url"]] = record
+        self._dirty = True
+
+    def discard_except(self, urls):
+        # 删除已不在导航数据中的链接
+        urls = set(urls)
+        for url in [url for url in self.entries if url not in urls]:
+            del self.entries[url]
+            self._dirty = True
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        write_json_atomic(self.path, {"version": CACHE_VERSION, "links": self.entries})
+        self._dirty = False
+        return True
+
+
+class _ConnectionPool:
+    # 按 (协议, 主机, 端口) 保存空闲连接，供工作线程复用
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def acquire(self, key):
+        # 返回 (连接, 是否为复用的连接)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self._ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def release(self, key, connection):
+        with self._lock:
+            self._idle.setdefault(key, []).append(connection)
+
+    def close(self):
+        with self._lock:
+            connections = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+class _HostLimiter:
+    # 限制同一主机的并发数，并让相邻两次请求的开始时间至少间隔 interval 秒
+    def __init__(self, limit, interval):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._interval = interval
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._next_start)
+        self._next_start = start + self._interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+class LinkChecker:
+    def __init__(self, cache=None, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 host_interval=DEFAULT_HOST_INTERVAL, timeout=DEFAULT_TIMEOUT):
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.host_interval = host_interval
+        self.timeout = timeout
+
+    def check(self, urls, force=False, progress=None, cancel=None):
+        # 同步入口，返回 url -> 结果；progress(已完成, 总数) 在事件循环线程中调用，
+        # cancel 为 threading.Event，设置后不再发起新的请求
+        return asyncio.run(self.check_async(urls, force, progress, cancel))
+
+    async def check_async(self, urls, force=False, progress=None, cancel=None):
+        urls = list(dict.fromkeys(urls))
+        results = {}
+        pending = []
+        now = time.time()
+        for url in urls:
+            if not is_http_url(url):
+                results[url] = {"url": url, "ok": True, "skipped": True, "status": None, "checked": now}
+                continue
+            cached = self.cache.get(url) if self.cache is not None else None
+            if not force and self.cache is not None and self.cache.is_fresh(cached, now):
+                results[url] = cached
+            else:
+                pending.append((url, cached))
+
+        total = len(urls)
+        done = len(results)
+        if progress is not None:
+            progress(done, total)
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiters = {}
+        pool = _ConnectionPool(self.timeout)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="linkcheck")
+
+        async def run(url, cached):
+            nonlocal done
+            host = urlsplit(url).netloc.lower()
+            limiter = limiters.get(host)
+            if limiter is None:
+                limiter = limiters[host] = _HostLimiter(self.per_host, self.host_interval)
+            # 先占用主机名额再占用全局名额，慢主机不会拖住其他主机的请求
+            async with limiter:
+                async with semaphore:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    record = await loop.run_in_executor(executor, self._check_url, pool, url, cached)
+            results[url] = record
+            if self.cache is not None:
+                self.cache.put(record)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+
+        try:
+            await asyncio.gather(*(run(url, cached) for url, cached in pending))
+        finally:
+            executor.shutdown(wait=True)
+            pool.close()
+            if self.cache is not None:
+                self.cache.save()
+        return results
+
+    # ---- 以下在工作线程中执行 ----
+
+    def _check_url(self, pool, url, cached):
+        record = {"url": url, "checked": time.time()}
+        headers = {"User-Agent": USER_AGENT, "Accept": "*/*"}
+        if cached and cached.get("ok") and not cached.get("skipped"):
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        started = time.perf_counter()
+        try:
+            status, response_headers, final_url = self._follow(pool, url, headers)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            record.update(ok=False, status=None, error=str(e) or e.__class__.__name__)
+            return record
+        record["elapsed"] = round((time.perf_counter() - started) * 1000, 1)
+
+        if status == 304 and cached:
+            # 条件请求命中，沿用上次的结果
+            record.update(ok=True, status=cached.get("status"), final_url=cached.get("final_url", url),
+                          etag=cached.get("etag"), last_modified=cached.get("last_modified"), revalidated=True)
+            return record
+        record.update(ok=200 <= status < 400, status=status, final_url=final_url,
+                      etag=response_headers.get("ETag"), last_modified=response_headers.get("Last-Modified"))
+        return record
+
+    def _follow(self, pool, url, headers):
+        # 跟随重定向，返回 (状态码, 响应头, 最终 URL)
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers = self._request(pool, "HEAD", url, headers)
+            if status in HEAD_FALLBACK_STATUSES:
+                status, response_headers = self._request(pool, "GET", url, headers)
+            location = response_headers.get("Location")
+            if status not in REDIRECT_STATUSES or not location:
+                return status, response_headers, url
+            url = urljoin(url, location)
+            if not is_http_url(url):
+                raise ValueError(f"重定向到不支持的地址: {url}")
+        raise http.client.HTTPException("重定向次数过多")
+
+    def _request(self, pool, method, url, headers):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            connection, reused = pool.acquire(key)
+            try:
+                connection.request(method, target, headers=headers)
+                response = connection.getresponse()
+                # GET 只读取开头一部分，读不完的连接直接关闭而不复用
+                response.read(GET_READ_LIMIT if method == "GET" else None)
+            except (ConnectionResetError, BrokenPipeError, http.client.BadStatusLine):
+                connection.close()
+                if reused:
+                    # 空闲连接可能已被服务器关闭，换新连接重试
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            if response.isclosed() and not response.will_close:
+                pool.release(key, connection)
+            else:
+                connection.close()
+            return response.status, response.msg
@@ -0,0 +1,232 @@
+"""外部修改的三方合并
+
+同一个 navigation.json 也会被管理后台（PUT /api/navigation）修改。加载时记录
+每个节点（分类、子分类、链接，按 id 区分）各字段的哈希、所在位置以及每个列表中
+的 id 顺序作为基准；文件在外部被修改后，把磁盘上的新版本与本地尚未保存的数据
+按节点和字段合并：
+
+    只有一方修改的字段、位置或列表顺序采用修改后的值；
+    双方都修改且结果不同的记为冲突，保留本地的值；
+    远端新增的节点加入，远端删除且本地未修改的节点删除。
+
+冲突时远端版本不会丢失：保存前会先为磁盘上的文件创建备份。
+"""
+import hashlib
+import json
+
+CHILD_KEYS = ("subCategories", "items")
+ROOT = None  # 根节点（navigationItems 以外的顶级字段）在快照中的 id
+
+
+class MergeError(Exception):
+    pass
+
+
+class Conflict:
+    def __init__(self, node_id, title, field, message):
+        self.node_id = node_id
+        self.title = title
+        self.field = field
+        self.message = message
+
+    def __str__(self):
+        target = f"{self.title}（{self.node_id}）" if self.node_id is not None else "顶级字段"
+        return f"{target} {self.field}: {self.message}" if self.field else f"{target}: {self.message}"
+
+
+def _value_hash(value):
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class _Tree:
+    # 把嵌套数据展开为 id -> 节点、id -> (父 id, 所在列表的键) 和 (父 id, 键) -> [子 id]
+    def __init__(self, data):
+        self.nodes = {ROOT: data}
+        self.location = {}
+        self.children = {}
+        self._walk(ROOT, "navigationItems", data.get("navigationItems"))
+
+    def _walk(self, parent_id, key, container):
+        if not isinstance(container, list):
+            return
+        ids = []
+        for node in container:
+            node_id = node.get("id") if isinstance(node, dict) else None
+            if node_id is None:
+                raise MergeError("存在没有 id 的条目，无法自动合并")
+            node_id = str(node_id)
+            if node_id in self.nodes:
+                raise MergeError(f"id '{node_id}' 重复，无法自动合并")
+            self.nodes[node_id] = node
+            self.location[node_id] = (parent_id, key)
+            ids.append(node_id)
+            for child_key in CHILD_KEYS:
+                self._walk(node_id, child_key, node.get(child_key))
+        self.children[(parent_id, key)] = ids
+
+    def fields(self, node_id):
+        skip = ("navigationItems",) if node_id is ROOT else CHILD_KEYS
+        return {key: value for key, value in self.nodes[node_id].items() if key not in skip}
+
+
+def snapshot(data):
+    # 合并的基准：{"fields": id -> {字段: 哈希}, "location": ..., "children": ...}
+    tree = _Tree(data)
+    return {
+        "fields": {node_id: {key: _value_hash(value) for key, value in tree.fields(node_id).items()}
+                   for node_id in tree.nodes},
+        "location": dict(tree.location),
+        "children": {parent: list(ids) for parent, ids in tree.children.items()},
+    }
+
+
+def _title(tree, node_id):
+    node = tree.nodes.get(node_id)
+    return node.get("title", "") if isinstance(node, dict) else ""
+
+
+def _merge_fields(node_id, base, local, remote, conflicts, title):
+    # 返回合并后的字段字典，键顺序沿用本地
+    base = base or {}
+    merged = {}
+    for key in [*local, *(key for key in remote if key not in local)]:
+        in_local, in_remote = key in local, key in remote
+        local_hash = _value_hash(local[key]) if in_local else None
+        remote_hash = _value_hash(remote[key]) if in_remote else None
+        base_hash = base.get(key)
+        if local_hash == remote_hash or remote_hash == base_hash:
+            chosen = "local"
+        elif local_hash == base_hash:
+            chosen = "remote"
+        else:
+            conflicts.append(Conflict(node_id, title, key, "双方都修改了该字段，保留本地的值"))
+            chosen = "local"
+        if chosen == "local" and in_local:
+            merged[key] = local[key]
+        elif chosen == "remote" and in_remote:
+            merged[key] = remote[key]
+    return merged
+
+
+def _merge_order(base, local, remote, members):
+    # 本地未调整顺序时以远端顺序为主，否则以本地为主；另一方独有的 id 按其原位置插入
+    if [i for i in local if i in base] == [i for i in base if i in local]:
+        primary, secondary = remote, local
+    else:
+        primary, secondary = local, remote
+    order = [i for i in primary if i in members]
+    placed = set(order)
+    for index, node_id in enumerate(secondary):
+        if node_id in members and node_id not in placed:
+            order.insert(min(index, len(order)), node_id)
+            placed.add(node_id)
+    order.extend(sorted(members - placed))
+    return order
+
+
+def merge(base, local_data, remote_data):
+    # 返回 (合并后的数据, [Conflict])；未变化的分支直接复用本地对象
+    local = _Tree(local_data)
+    remote = _Tree(remote_data)
+    base_fields = base["fields"]
+    conflicts = []
+
+    # 1. 决定保留哪些节点
+    keep = {}
+    for node_id in [*local.nodes, *(i for i in remote.nodes if i not in local.nodes)]:
+        in_local, in_remote = node_id in local.nodes, node_id in remote.nodes
+        in_base = node_id in base_fields
+        title = _title(local if in_local else remote, node_id)
+        if in_local and in_remote:
+            keep[node_id] = _merge_fields(node_id, base_fields.get(node_id), local.fields(node_id),
+                                          remote.fields(node_id), conflicts, title)
+        elif in_local:
+            # 远端删除：本地修改过时保留并报告冲突
+            if in_base and _hashes(local.fields(node_id)) == base_fields[node_id]:
+                continue
+            if in_base:
+                conflicts.append(Conflict(node_id, title, None, "远端已删除，本地有修改，保留本地条目"))
+            keep[node_id] = local.fields(node_id)
+        else:
+            # 本地删除：远端修改过时报告冲突，仍按本地删除
+            if in_base and _hashes(remote.fields(node_id)) != base_fields[node_id]:
+                conflicts.append(Conflict(node_id, title, None, "本地已删除，远端有修改，保持删除"))
+            if not in_base:
+                keep[node_id] = remote.fields(node_id)
+
+    # 2. 决定每个节点的位置
+    location = {}
+    for node_id in keep:
+        if node_id is ROOT:
+            continue
+        base_at = base["location"].get(node_id)
+        local_at = local.location.get(node_id)
+        remote_at = remote.location.get(node_id)
+        if local_at is None:
+            chosen = remote_at
+        elif remote_at is None or remote_at == local_at or remote_at == base_at:
+            chosen = local_at
+        elif local_at == base_at:
+            chosen = remote_at
+        else:
+            conflicts.append(Conflict(node_id, _title(local, node_id), None, "双方都移动了该条目，保留本地位置"))
+            chosen = local_at
+        location[node_id] = chosen
+
+    # 父节点不存在时退回另一方的位置，仍不存在则无法放置
+    for node_id in list(location):
+        parent_id = location[node_id][0]
+        if parent_id is ROOT or parent_id in keep:
+            continue
+        fallback = local.location.get(node_id) or remote.location.get(node_id)
+        if fallback and (fallback[0] is ROOT or fallback[0] in keep):
+            location[node_id] = fallback
+        else:
+            conflicts.append(Conflict(node_id, _title(local if node_id in local.nodes else remote, node_id),
+                                      None, "所在分类已被删除，无法放置"))
+            del location[node_id]
+    placed = {ROOT} | set(location)
+    # 放置失败的节点的子节点同样无法放置
+    changed = True
+    while changed:
+        changed = False
+        for node_id, (parent_id, _) in list(location.items()):
+            if parent_id is not ROOT and parent_id not in placed:
+                del location[node_id]
+                placed.discard(node_id)
+                changed = True
+
+    # 3. 列表顺序
+    members = {}
+    for node_id, container in location.items():
+        members.setdefault(container, set()).add(node_id)
+    children = {container: _merge_order(base["children"].get(container, []),
+                                        local.children.get(container, []),
+                                        remote.children.get(container, []), ids)
+                for container, ids in members.items()}
+
+    # 4. 重新组装，内容与本地相同的节点复用本地对象
+    def build(node_id):
+        source = local.nodes.get(node_id) if node_id in local.nodes else remote.nodes[node_id]
+        fields = keep[node_id]
+        child_keys = ("navigationItems",) if node_id is ROOT else CHILD_KEYS
+        node = {}
+        for key in source:
+            if key in child_keys:
+                node[key] = [build(child) for child in children.get((node_id, key), [])]
+            elif key in fields:
+                node[key] = fields[key]
+        for key, value in fields.items():
+            node.setdefault(key, value)
+        for key in child_keys:
+            if key not in node and (node_id, key) in children:
+                node[key] = [build(child) for child in children[(node_id, key)]]
+        original = local.nodes.get(node_id)
+        return original if original == node else node
+
+    return build(ROOT), conflicts
+
+
+def _hashes(fields):
+    return {key: _value_hash(value) for key, value in fields.items()}
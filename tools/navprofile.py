@@ -0,0 +1,237 @@
+"""操作计时与性能分析
+
+加载、保存等操作由若干阶段组成（读取、解析、校验、序列化、备份、发布、填充树等）。
+用 profiler.operation() 包住一次操作、profiler.stage() 包住其中的阶段，操作结束后
+生成一条结构化记录：
+
+    {"time": ..., "operation": "save", "thread": ..., "ms": 412.3,
+     "stages": [{"name": "serialize", "ms": 230.1, "self_ms": 110.0, "depth": 0}, ...],
+     "fields": {...}}
+
+记录写入按大小轮转的日志文件（每行一个 JSON），最近的记录保留在内存中供界面显示。
+capture_next() 之后的下一次操作在 cProfile 和 tracemalloc 下运行，结果写入日志目录。
+
+未启用时 operation() 和 stage() 只判断一次开关并返回同一个空对象，几乎没有开销。
+阶段按线程归入该线程中正在进行的操作；不在任何操作中的阶段单独成为一条记录。
+"""
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+LOG_NAME = "timings.log"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 5
+RECENT_LIMIT = 50
+# 内存分析结果中列出的分配位置数
+MEMORY_TOP = 30
+
+# 单独记录的阶段沿用 STAGE_LABELS
+OPERATION_LABELS = {"load": "加载", "save": "保存", "restore": "恢复", "tabs": "创建标签页", "merge": "合并外部修改"}
+STAGE_LABELS = {"read": "读取", "parse": "解析", "validate": "校验", "serialize": "序列化",
+                "backup": "备份", "publish": "发布", "restore": "恢复", "populate_tree": "填充树",
+                "dirty_check": "检查修改", "merge": "合并", "snapshot": "记录合并基准"}
+
+
+class _NullScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def note(self, **fields):
+        pass
+
+
+_NULL = _NullScope()
+
+
+class _Stage:
+    __slots__ = ("operation", "name", "depth", "start", "children_time")
+
+    def __init__(self, operation, name):
+        self.operation = operation
+        self.name = name
+
+    def __enter__(self):
+        operation = self.operation
+        self.depth = len(operation.open_stages)
+        self.children_time = 0.0
+        operation.open_stages.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        operation = self.operation
+        operation.open_stages.pop()
+        if operation.open_stages:
+            operation.open_stages[-1].children_time += elapsed
+        operation.stages.append({"name": self.name, "ms": round(elapsed * 1000, 3),
+                                 "self_ms": round((elapsed - self.children_time) * 1000, 3), "depth": self.depth})
+        return False
+
+    def note(self, **fields):
+        self.operation.fields.update(fields)
+
+
+class _Operation:
+    def __init__(self, profiler, name, fields, capture):
+        self.profiler = profiler
+        self.name = name
+        self.fields = dict(fields)
+        self.capture = capture
+        self.stages = []
+        self.open_stages = []
+
+    def __enter__(self):
+        self.profiler._local.operation = self
+        if self.capture:
+            with self.profiler._lock:
+                self.profiler._active_captures += 1
+            self.profile = cProfile.Profile()
+            self.traced = tracemalloc.is_tracing()
+            if not self.traced:
+                tracemalloc.start()
+            self.profile.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.profiler._local.operation = None
+        capture_files = None
+        if self.capture:
+            try:
+                capture_files = self._finish_capture()
+            finally:
+                with self.profiler._lock:
+                    self.profiler._active_captures -= 1
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "operation": self.name,
+            "thread": threading.current_thread().name,
+            "ms": round(elapsed * 1000, 3),
+            "stages": self.stages,
+            "fields": self.fields,
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if capture_files:
+            record["capture"] = capture_files
+        self.profiler._emit(record)
+        return False
+
+    def note(self, **fields):
+        self.fields.update(fields)
+
+    def _finish_capture(self):
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if not self.traced:
+            tracemalloc.stop()
+        directory = self.profiler.log_dir
+        if directory is None:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{time.strftime('%Y%m%d_%H%M%S')}_{self.name}")
+        self.profile.dump_stats(base + ".prof")
+        with open(base + ".memory.txt", 'w', encoding='utf-8') as file:
+            file.write(f"{self.name}: 内存峰值 {peak / 1048576:.1f} MB\n\n")
+            for stat in snapshot.statistics("lineno")[:MEMORY_TOP]:
+                file.write(f"{stat}\n")
+        return [base + ".prof", base + ".memory.txt"]
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.log_dir = None
+        self.recent = deque(maxlen=RECENT_LIMIT)
+        self._capture_pending = False
+        self._active_captures = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._logger = None
+
+    def configure(self, log_dir):
+        # 设置日志目录并开始写入 timings.log（按大小轮转）
+        self.log_dir = log_dir
+        os.makedirs(log_dir, exist_ok=True)
+        logger = logging.getLogger(f"navsphere.profile.{id(self)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        handler = RotatingFileHandler(os.path.join(log_dir, LOG_NAME), maxBytes=LOG_MAX_BYTES,
+                                      backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        self._logger = logger
+
+    def capture_next(self):
+        # 下一次操作在 cProfile 和 tracemalloc 下运行（即使没有开启计时）
+        with self._lock:
+            self._capture_pending = True
+
+    @property
+    def capturing(self):
+        # 有等待分析或正在分析的操作
+        return self._capture_pending or self._active_captures > 0
+
+    def operation(self, name, **fields):
+        if not (self.enabled or self._capture_pending):
+            return _NULL
+        if getattr(self._local, "operation", None) is not None:
+            # 嵌套的操作（例如界面保存时调用 navcore 的保存）作为外层操作的一个阶段
+            return self.stage(name)
+        capture = False
+        if self._capture_pending:
+            with self._lock:
+                capture, self._capture_pending = self._capture_pending, False
+        return _Operation(self, name, fields, capture)
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL
+        operation = getattr(self._local, "operation", None)
+        if operation is None:
+            # 单独的阶段（例如定时的修改检查）记为一次操作，但不占用待分析的名额
+            return _Operation(self, name, {}, False)
+        return _Stage(operation, name)
+
+    def _emit(self, record):
+        self.recent.append(record)
+        if self._logger is not None:
+            self._logger.info(json.dumps(record, ensure_ascii=False))
+
+    @property
+    def last(self):
+        return self.recent[-1] if self.recent else None
+
+
+def format_record(record, limit=3):
+    # 用于状态栏："保存 412 ms（序列化 120 ms，备份 95 ms，发布 80 ms）"
+    label = OPERATION_LABELS.get(record["operation"], STAGE_LABELS.get(record["operation"], record["operation"]))
+    text = f"{label} {record['ms']:.0f} ms"
+    stages = sorted(record["stages"], key=lambda stage: stage["self_ms"], reverse=True)[:limit]
+    if stages:
+        text += "（" + "，".join(f"{STAGE_LABELS.get(stage['name'], stage['name'])} {stage['self_ms']:.0f} ms"
+                                for stage in stages) + "）"
+    if "capture" in record:
+        text += f"，分析结果: {os.path.basename(record['capture'][0])}"
+    return text
+
+
+# 各模块共用的实例，由界面或命令行开启
+profiler = Profiler()
@@ -0,0 +1,139 @@
+"""按顶级分类拆分输出 navigation.json
+
+在完整的 navigation.json 之外，生成一个小的清单文件和每个顶级分类一个分片：
+
+    navigation/manifest.json   分类 id、标题、图标、数量和各分片的内容哈希
+    navigation/<分类id>.json    单个分类（紧凑格式）
+
+内容没有变化的分片保持原哈希且不会重写，因此只修改一个分类时，其余分片的
+CDN 缓存仍然有效。清单最后写入，读取方不会看到指向未写完分片的清单。
+"""
+import hashlib
+import json
+import os
+import re
+
+from navdiff import iter_links
+from navio import loads_json, write_bytes_atomic
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 16
+
+
+def shard_dir_for(json_path):
+    # navigation.json -> 同目录下的 navigation/
+    return os.path.splitext(os.path.abspath(json_path))[0]
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def _shard_name(category_id, used):
+    base = re.sub(r"[^A-Za-z0-9_-]", "_", str(category_id)) or "category"
+    name = base
+    counter = 2
+    while name.lower() in used or name.lower() == os.path.splitext(MANIFEST_NAME)[0]:
+        name = f"{base}_{counter}"
+        counter += 1
+    used.add(name.lower())
+    return f"{name}.json"
+
+
+def _read_manifest(shard_dir):
+    try:
+        with open(os.path.join(shard_dir, MANIFEST_NAME), 'rb') as file:
+            manifest = loads_json(file.read())
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and manifest.get("version") == MANIFEST_VERSION else None
+
+
+def _existing_hash(path):
+    # 分片文件当前内容的哈希，文件不存在时返回 None
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()[:HASH_LENGTH]
+    except FileNotFoundError:
+        return None
+
+
+def build_shards(data):
+    # 返回 (清单, {文件名: 分片字节})，不访问磁盘
+    categories = []
+    shards = {}
+    used = set()
+    for category in data.get("navigationItems") or []:
+        if not isinstance(category, dict):
+            continue
+        raw = _encode(category)
+        name = _shard_name(category.get("id", ""), used)
+        shards[name] = raw
+        categories.append({
+            "id": category.get("id"),
+            "title": category.get("title", ""),
+            "icon": category.get("icon", ""),
+            "enabled": category.get("enabled", True),
+            "subCategories": len(category.get("subCategories") or []),
+            "items": sum(1 for _ in iter_links(category)),
+            "file": name,
+            "bytes": len(raw),
+            "hash": hashlib.sha256(raw).hexdigest()[:HASH_LENGTH],
+        })
+    manifest = {"version": MANIFEST_VERSION, "categories": categories}
+    # 保留 navigationItems 以外的顶级字段，读取方只需清单即可还原完整结构
+    extra = {key: value for key, value in data.items() if key != "navigationItems"}
+    if extra:
+        manifest["meta"] = extra
+    return manifest, shards
+
+
+def publish_shards(data, shard_dir):
+    # 写入变化的分片和清单，删除已不存在的分类的分片；返回 (写入的文件名列表, 删除的文件名列表)
+    manifest, shards = build_shards(data)
+    os.makedirs(shard_dir, exist_ok=True)
+    previous = _read_manifest(shard_dir)
+    previous_hashes = {entry.get("file"): entry.get("hash") for entry in (previous or {}).get("categories", [])}
+
+    written = []
+    for entry in manifest["categories"]:
+        name = entry["file"]
+        path = os.path.join(shard_dir, name)
+        # 清单中的哈希只用来快速跳过；文件缺失或被改动时仍然重写
+        if previous_hashes.get(name) == entry["hash"] and _existing_hash(path) == entry["hash"]:
+            continue
+        write_bytes_atomic(path, [shards[name]])
+        written.append(name)
+
+    manifest_raw = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+    manifest_path = os.path.join(shard_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'rb') as file:
+            manifest_changed = file.read() != manifest_raw
+    except FileNotFoundError:
+        manifest_changed = True
+    if manifest_changed:
+        write_bytes_atomic(manifest_path, [manifest_raw])
+        written.append(MANIFEST_NAME)
+
+    removed = []
+    for filename in sorted(os.listdir(shard_dir)):
+        if filename.endswith(".json") and filename != MANIFEST_NAME and filename not in shards:
+            os.remove(os.path.join(shard_dir, filename))
+            removed.append(filename)
+    return written, removed
+
+
+def load_sharded(shard_dir):
+    # 由清单和分片还原完整数据，用于校验和测试
+    manifest = _read_manifest(shard_dir)
+    if manifest is None:
+        raise FileNotFoundError(os.path.join(shard_dir, MANIFEST_NAME))
+    data = dict(manifest.get("meta") or {})
+    items = []
+    for entry in manifest["categories"]:
+        with open(os.path.join(shard_dir, entry["file"]), 'rb') as file:
+            items.append(loads_json(file.read()))
+    data["navigationItems"] = items
+    return data
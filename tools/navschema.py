@@ -0,0 +1,299 @@
+"""navigation.json 的数据模型校验
+
+字段规则以声明方式写在 SCHEMA 中，模块加载时编译为每类节点的检查函数列表，逐个节点
+检查时不再解释规则。除节点自身的字段外还维护两个全局索引：
+
+    id 索引       所有分类、子分类和链接的 id 必须唯一（错误）
+    链接索引      规范化后相同的链接（警告，例如 http/https、末尾斜杠或 www. 的差异）
+
+Validator 按顶级分类保存检查结果；编辑后只需重新检查受影响的分类，全局索引由各分类
+的结果合并得到。
+"""
+import functools
+import re
+from urllib.parse import parse_qsl, urlencode
+
+ERROR = "error"
+WARNING = "warning"
+SEVERITY_LABELS = {ERROR: "错误", WARNING: "警告"}
+
+# 规范化链接时去掉的跟踪参数
+TRACKING_PARAMS = re.compile(r"^(utm_[a-z]+|spm|from|ref|fbclid|gclid)$", re.IGNORECASE)
+DEFAULT_PORTS_TEXT = ("80", "443")
+_URL = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*)://([^/?#]*)([^?#]*)(?:\?([^#]*))?(?:#(.*))?$", re.DOTALL)
+_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+
+# 节点类型 -> {字段: (允许的类型, 是否必填)}
+SCHEMA = {
+    "category": {
+        "id": (str, True),
+        "title": (str, True),
+        "description": (str, False),
+        "icon": (str, False),
+        "enabled": (bool, False),
+        "items": (list, False),
+        "subCategories": (list, False),
+    },
+    "subcategory": {
+        "id": (str, True),
+        "title": (str, True),
+        "description": (str, False),
+        "icon": (str, False),
+        "enabled": (bool, False),
+        "items": (list, False),
+    },
+    "item": {
+        "id": (str, True),
+        "title": (str, True),
+        "href": (str, True),
+        "description": (str, False),
+        "icon": (str, False),
+        "enabled": (bool, False),
+    },
+}
+TYPE_NAMES = {str: "字符串", bool: "布尔值", list: "数组", dict: "对象"}
+TRUE_TEXTS = ("true", "yes", "1", "y", "t")
+FALSE_TEXTS = ("false", "no", "0", "n", "f")
+
+
+def field_type(field):
+    # 字段在各类节点中约定的类型，用于编辑时转换输入；没有约定时返回 None
+    for fields in SCHEMA.values():
+        if field in fields:
+            return fields[field][0]
+    return None
+
+
+def normalize_url(url):
+    # 用于判断两个链接是否指向同一页面；无法解析时返回去掉首尾空白的原文
+    return _normalize_url(str(url or "").strip())
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _normalize_url(text):
+    # 编辑后重新检查分类时，大部分链接未变化，直接命中缓存
+    match = _URL.match(text)
+    if match is None:
+        return text  # 站内路径等非绝对链接
+    scheme, host, path, query, fragment = match.groups()
+    scheme = scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    host = host.rsplit("@", 1)[-1].lower()
+    if host.startswith("www."):
+        host = host[4:]
+    name, _, port = host.rpartition(":")
+    if name and port in DEFAULT_PORTS_TEXT:
+        host = name
+    path = path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    if query:
+        query = urlencode(sorted((key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+                                 if not TRACKING_PARAMS.match(key)))
+    result = f"{scheme}://{host}{path}"
+    if query:
+        result += f"?{query}"
+    # "#/" 这类前端路由保留，空锚点去掉
+    if fragment and fragment != "/":
+        result += f"#{fragment}"
+    return result
+
+
+class Issue:
+    __slots__ = ("severity", "path", "message", "node")
+
+    def __init__(self, severity, path, message, node=None):
+        self.severity = severity
+        self.path = path
+        self.message = message
+        self.node = node  # 出问题的节点（dict），界面据此标记对应的行
+
+    @property
+    def is_error(self):
+        return self.severity == ERROR
+
+    def __str__(self):
+        return f"[{SEVERITY_LABELS[self.severity]}] {format_path(self.path)}: {self.message}"
+
+
+def format_path(path):
+    # ("navigationItems", 0, "items", 3) -> "navigationItems[0].items[3]"
+    text = ""
+    for key in path:
+        text += f"[{key}]" if isinstance(key, int) else (f".{key}" if text else str(key))
+    return text
+
+
+def _compile_field(field, expected, required):
+    type_name = TYPE_NAMES[expected]
+
+    def check(node, path, issues):
+        if field not in node:
+            if required:
+                issues.append(Issue(ERROR, path, f"缺少 {field}", node))
+            return
+        value = node[field]
+        # bool 是 int 的子类，这里按严格类型比较
+        if type(value) is not expected:
+            issues.append(Issue(ERROR, (*path, field), f"{field} 应为{type_name}，实际为 {value!r}", node))
+        elif required and expected is str and not value.strip():
+            issues.append(Issue(ERROR, (*path, field), f"{field} 不能为空", node))
+    return check
+
+
+def _check_href(node, path, issues):
+    href = node.get("href")
+    if not isinstance(href, str) or not href.strip():
+        return
+    if href != href.strip():
+        issues.append(Issue(WARNING, (*path, "href"), "href 首尾有空白", node))
+    match = _SCHEME.match(href.strip())
+    scheme = match.group(1).lower() if match else ""
+    if not href.strip().startswith("/") and scheme not in ("http", "https"):
+        issues.append(Issue(ERROR, (*path, "href"), f"href 不是 http(s) 链接或站内路径: {href!r}", node))
+
+
+def compile_schema(schema):
+    compiled = {kind: [_compile_field(field, expected, required)
+                       for field, (expected, required) in fields.items()]
+                for kind, fields in schema.items()}
+    compiled["item"].append(_check_href)
+    return compiled
+
+
+CHECKS = compile_schema(SCHEMA)
+
+
+class _CategoryResult:
+    # 单个顶级分类的检查结果：节点自身的问题，以及参与全局索引的 (id, 路径, 节点) 和 (链接, 路径, 节点)
+    __slots__ = ("issues", "ids", "urls")
+
+    def __init__(self):
+        self.issues = []
+        self.ids = []
+        self.urls = []
+
+
+def _check_node(kind, node, path, result):
+    for check in CHECKS[kind]:
+        check(node, path, result.issues)
+    node_id = node.get("id")
+    if isinstance(node_id, str) and node_id.strip():
+        result.ids.append((node_id, path, node))
+    if kind == "item" and isinstance(node.get("href"), str) and node["href"].strip():
+        result.urls.append((normalize_url(node["href"]), path, node))
+
+
+def _check_list(kind, container, path, result):
+    for i, node in enumerate(container):
+        child_path = (*path, i)
+        if not isinstance(node, dict):
+            result.issues.append(Issue(ERROR, child_path, f"应为对象，实际为 {node!r}"))
+            continue
+        _check_node(kind, node, child_path, result)
+        if isinstance(node.get("items"), list):
+            _check_list("item", node["items"], (*child_path, "items"), result)
+        subcategories = node.get("subCategories")
+        if isinstance(subcategories, list):
+            if kind != "category":
+                result.issues.append(Issue(WARNING, (*child_path, "subCategories"),
+                                           "网站只显示两级分类，更深层的子分类不会显示", node))
+            _check_list("subcategory", subcategories, (*child_path, "subCategories"), result)
+
+
+def _check_category_at(category, index, result):
+    path = ("navigationItems", index)
+    if not isinstance(category, dict):
+        result.issues.append(Issue(ERROR, path, f"应为对象，实际为 {category!r}"))
+        return
+    _check_node("category", category, path, result)
+    if isinstance(category.get("items"), list):
+        _check_list("item", category["items"], (*path, "items"), result)
+    if isinstance(category.get("subCategories"), list):
+        _check_list("subcategory", category["subCategories"], (*path, "subCategories"), result)
+
+
+class Validator:
+    def __init__(self):
+        self._results = []     # 与 navigationItems 一一对应的 _CategoryResult
+        self._categories = []  # 检查时的分类对象，用于判断列表结构是否变化
+        self._root_issues = []
+        self._issues = None
+        self._flagged = None
+
+    def validate(self, data):
+        # 完整检查，返回全部问题
+        self._root_issues = []
+        items = data.get("navigationItems") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            self._root_issues.append(Issue(ERROR, ("navigationItems",), "'navigationItems' 必须是数组"))
+            items = []
+        self._categories = list(items)
+        self._results = []
+        for index, category in enumerate(items):
+            result = _CategoryResult()
+            _check_category_at(category, index, result)
+            self._results.append(result)
+        self._issues = None
+        self._flagged = None
+        return self.issues
+
+    def update(self, data, categories):
+        # 只重新检查给定的顶级分类；分类本身被增删或调整顺序时退回完整检查
+        items = data.get("navigationItems") if isinstance(data, dict) else None
+        if not isinstance(items, list) or len(items) != len(self._categories) \
+                or any(a is not b for a, b in zip(items, self._categories)):
+            return self.validate(data)
+        for index, category in enumerate(items):
+            if any(category is touched for touched in categories):
+                result = _CategoryResult()
+                _check_category_at(category, index, result)
+                self._results[index] = result
+        self._issues = None
+        self._flagged = None
+        return self.issues
+
+    @property
+    def issues(self):
+        if self._issues is None:
+            issues = list(self._root_issues)
+            for result in self._results:
+                issues.extend(result.issues)
+            issues.extend(self._global_issues())
+            self._issues = issues
+        return self._issues
+
+    def _global_issues(self):
+        issues = []
+        seen_ids = {}
+        seen_urls = {}
+        for result in self._results:
+            for node_id, path, node in result.ids:
+                first = seen_ids.setdefault(node_id, path)
+                if first is not path:
+                    issues.append(Issue(ERROR, (*path, "id"), f"id '{node_id}' 与 {format_path(first)} 重复", node))
+            for url, path, node in result.urls:
+                first = seen_urls.setdefault(url, path)
+                if first is not path:
+                    issues.append(Issue(WARNING, (*path, "href"),
+                                        f"链接与 {format_path(first)} 重复（{url}）", node))
+        return issues
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue.is_error]
+
+    def node_issues(self, node):
+        # 与节点相关的问题，用于在树和表格中标记
+        if self._flagged is None:
+            flagged = {}
+            for issue in self.issues:
+                if issue.node is not None:
+                    flagged.setdefault(id(issue.node), []).append(issue)
+            self._flagged = flagged
+        return self._flagged.get(id(node), [])
+
+
+def validate_data(data):
+    return Validator().validate(data)
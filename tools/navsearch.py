@@ -0,0 +1,166 @@
+"""导航条目的全文检索索引（支持前缀、子串和中文检索）
+
+对标题、描述、链接和 id 建立双字 n-gram 倒排索引。查询时取最稀有的 n-gram
+对应的候选集合，再用子串匹配确认，因此中文（无分词）和英文前缀、子串都能
+命中。编辑后只需重新索引被修改的条目。
+"""
+import unicodedata
+
+INDEXED_FIELDS = ("title", "description", "href", "id")
+FIELD_SEPARATOR = "\x00"
+# 失效的倒排记录超过存活文档数的一半（且不少于此数）时清理，编辑器长时间打开也不会持续变大
+COMPACT_MIN_STALE = 64
+
+
+def normalize_text(text):
+    # 全角转半角并忽略大小写
+    return unicodedata.normalize("NFKC", str(text)).casefold()
+
+
+def text_grams(text):
+    # 文本中所有相邻双字；跨越空白或字段分隔符的组合不会被查询到，保留也无妨
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class SearchIndex:
+    def __init__(self):
+        self._docs = {}      # 文档号 -> 条目对象
+        self._texts = {}     # 文档号 -> 规范化后的字段文本
+        self._doc_numbers = {}  # id(条目对象) -> 文档号
+        self._postings = {}  # n-gram -> 文档号列表（可能含已失效的文档号，查询时校验）
+        self._next_number = 0
+        self._stale = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ---- 建立与更新 ----
+
+    def build(self, data):
+        self.__init__()
+        for category in (data or {}).get("navigationItems") or []:
+            self._add_tree(category)
+        return self
+
+    def _add_tree(self, node):
+        if isinstance(node, dict):
+            if any(field in node for field in INDEXED_FIELDS):
+                self.add(node)
+            for child_key in ("items", "subCategories"):
+                for child in node.get(child_key) or []:
+                    self._add_tree(child)
+
+    def _doc_text(self, item):
+        return FIELD_SEPARATOR.join(normalize_text(item[field]) for field in INDEXED_FIELDS
+                                    if item.get(field) not in (None, ""))
+
+    def add(self, item):
+        key = id(item)
+        if key in self._doc_numbers:
+            self.update(item)
+            return
+        number = self._next_number
+        self._next_number += 1
+        text = self._doc_text(item)
+        self._docs[number] = item
+        self._texts[number] = text
+        self._doc_numbers[key] = number
+        postings = self._postings
+        for gram in text_grams(text):
+            if gram in postings:
+                postings[gram].append(number)
+            else:
+                postings[gram] = [number]
+
+    def update(self, item):
+        # 条目字段被编辑后重新索引；旧的倒排记录在查询时被过滤
+        key = id(item)
+        number = self._doc_numbers.get(key)
+        if number is None:
+            if any(field in item for field in INDEXED_FIELDS):
+                self.add(item)
+            return
+        text = self._doc_text(item)
+        if text == self._texts[number]:
+            return
+        old_grams = text_grams(self._texts[number])
+        self._texts[number] = text
+        for gram in text_grams(text) - old_grams:
+            self._postings.setdefault(gram, []).append(number)
+        self._stale += 1
+        self._maybe_compact()
+
+    def remove(self, item):
+        number = self._doc_numbers.pop(id(item), None)
+        if number is not None:
+            del self._docs[number]
+            del self._texts[number]
+            self._stale += 1
+            self._maybe_compact()
+
+    def remove_tree(self, node):
+        # 删除整个子树（分类、子分类或条目列表）中的所有条目
+        if isinstance(node, dict):
+            self.remove(node)
+            node = [node.get("items"), node.get("subCategories")]
+        if isinstance(node, list):
+            for child in node:
+                if isinstance(child, (dict, list)):
+                    self.remove_tree(child)
+
+    def _maybe_compact(self):
+        if self._stale > max(COMPACT_MIN_STALE, len(self._docs) // 2):
+            self.compact()
+
+    def compact(self):
+        # 去掉已删除的文档和编辑后不再包含的 n-gram 对应的倒排记录
+        live = self._texts
+        postings = {}
+        for gram, numbers in self._postings.items():
+            kept = [number for number in numbers if number in live and gram in live[number]]
+            if kept:
+                postings[gram] = kept
+        self._postings = postings
+        self._stale = 0
+
+    # ---- 查询 ----
+
+    def search(self, query, limit=200):
+        # 返回匹配的条目列表；多个词之间为“且”关系，标题以第一个词开头的排在前面
+        terms = [normalize_text(term) for term in query.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return []
+
+        candidates = None
+        for term in sorted(terms, key=len, reverse=True):
+            if len(term) < 2:
+                continue
+            lists = sorted((self._postings.get(term[i:i + 2], ()) for i in range(len(term) - 1)), key=len)
+            if not lists[0]:
+                return []
+            if candidates is None:
+                candidates = lists[0]
+            elif len(lists[0]) < len(candidates):
+                candidates = lists[0]
+        if candidates is None:
+            # 全部是单字查询，直接扫描所有文档
+            candidates = self._texts.keys()
+        elif self._stale:
+            candidates = dict.fromkeys(candidates)  # 更新过的文档可能出现多次
+
+        texts = self._texts
+        first = terms[0]
+        leading = []
+        others = []
+        for number in candidates:
+            text = texts.get(number)
+            if text is None or not all(term in text for term in terms):
+                continue
+            if text.startswith(first):
+                leading.append(number)
+                if len(leading) >= limit:
+                    break
+            elif len(others) < limit:
+                others.append(number)
+        return [self._docs[number] for number in (leading + others)[:limit]]
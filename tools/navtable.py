@@ -0,0 +1,322 @@
+"""分类链接的虚拟化表格视图
+
+表格只创建可视区域所需的行，滚动时原地替换这些行的内容，因此无论列表多长，
+Tk 中的条目数量都保持不变。排序只重排下标数组，编辑直接写回原始数据。
+多选按条目对象记录（Ctrl 单击切换、Shift 单击或 Shift+方向键扩展、Ctrl+A 全选），
+滚动和排序后仍然有效。
+"""
+import tkinter as tk
+from tkinter import ttk, simpledialog, messagebox
+
+from navschema import FALSE_TEXTS, TRUE_TEXTS, field_type
+
+TABLE_COLUMNS = (
+    ("id", "id", 110),
+    ("title", "标题", 180),
+    ("href", "链接", 280),
+    ("description", "描述", 300),
+    ("icon", "图标", 200),
+    ("enabled", "启用", 60),
+)
+
+
+def _sort_key(value):
+    # 混合类型也能比较：None 排最后，布尔和数字按数值，其余按不区分大小写的文本
+    if value is None:
+        return (2, "")
+    if isinstance(value, (bool, int, float)):
+        return (0, float(value))
+    return (1, str(value).casefold())
+
+
+def coerce_value(text, old_value, field=None):
+    # 按字段约定的类型（没有约定时按原值类型）转换输入，无法转换时抛出 ValueError
+    expected = field_type(field) or type(old_value)
+    if expected is bool:
+        value = text.strip().lower()
+        if value in TRUE_TEXTS:
+            return True
+        if value in FALSE_TEXTS:
+            return False
+        raise ValueError(f"“{text}”不是布尔值，请输入 true 或 false")
+    if expected in (int, float):
+        try:
+            return int(text) if '.' not in text else float(text)
+        except ValueError:
+            raise ValueError("输入的值无法转换为数字")
+    return text
+
+
+class VirtualItemTable(ttk.Frame):
+    def __init__(self, parent, on_edit=None, is_flagged=None, can_edit=None):
+        super().__init__(parent)
+        self.on_edit = on_edit  # 回调: on_edit(item, field, new_value)，由回调写入数据
+        self.is_flagged = is_flagged  # is_flagged(item) 为真的行标红，例如失效链接
+        self.can_edit = can_edit  # can_edit() 为假时不允许编辑，例如正在后台保存
+        self.items = []
+        self.order = []
+        self.offset = 0
+        self.visible_rows = 0
+        self.sort_column = None
+        self.sort_reverse = False
+        self.selected_index = None  # 光标所在的位置（order 中的下标）
+        self.selected = {}  # 选中的条目: id(条目) -> 条目
+        self.anchor = None  # Shift 扩展选择的起点
+        self._updating_selection = False
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _, _ in TABLE_COLUMNS],
+                                 show='headings', selectmode='extended')
+        self.yscroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.yscroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        for name, title, width in TABLE_COLUMNS:
+            self.tree.heading(name, text=title, command=lambda column=name: self.sort_by(column))
+            self.tree.column(name, width=width, minwidth=50, stretch=name in ("title", "href", "description"))
+        self.tree.tag_configure("flagged", foreground="red")
+
+        self.row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self._move_selection(-max(1, self.visible_rows - 1)))
+        self.tree.bind("<Next>", lambda event: self._move_selection(max(1, self.visible_rows - 1)))
+        self.tree.bind("<Shift-Up>", lambda event: self._move_selection(-1, extend=True))
+        self.tree.bind("<Shift-Down>", lambda event: self._move_selection(1, extend=True))
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<Control-Button-1>", lambda event: self._on_click(event, "toggle"))
+        self.tree.bind("<Shift-Button-1>", lambda event: self._on_click(event, "extend"))
+        self.tree.bind("<Control-a>", lambda event: self.select_all())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Double-1>", self._on_double_click)
+
+    # ---- 数据 ----
+
+    def set_items(self, items):
+        # items 是 navigation_data 中的原始列表，编辑会直接写回
+        self.items = items
+        self.offset = 0
+        self.selected_index = None
+        self.selected = {}
+        self.anchor = None
+        self._rebuild_order()
+        self.render()
+
+    def refresh(self):
+        # 数据在其他地方被修改后重新排序并渲染
+        if len(self.order) != len(self.items):
+            self.selected_index = None
+            self.anchor = None
+        if self.selected:
+            # 去掉已不在列表中的条目
+            present = {id(item) for item in self.items}
+            self.selected = {key: item for key, item in self.selected.items() if key in present}
+        self._rebuild_order()
+        self.render()
+
+    def _rebuild_order(self):
+        self.order = list(range(len(self.items)))
+        if self.sort_column is not None:
+            self._apply_sort()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        selected_item = self._selected_item()
+        self._apply_sort()
+        for name, title, _ in TABLE_COLUMNS:
+            arrow = (" ▼" if self.sort_reverse else " ▲") if name == column else ""
+            self.tree.heading(name, text=title + arrow)
+        if selected_item is not None:
+            self.selected_index = next((pos for pos, index in enumerate(self.order)
+                                        if self.items[index] is selected_item), None)
+        self.anchor = self.selected_index
+        self.render()
+
+    def _apply_sort(self):
+        items = self.items
+        column = self.sort_column
+        self.order.sort(key=lambda index: _sort_key(items[index].get(column) if isinstance(items[index], dict) else None),
+                        reverse=self.sort_reverse)
+
+    def _selected_item(self):
+        if self.selected_index is None or self.selected_index >= len(self.order):
+            return None
+        return self.items[self.order[self.selected_index]]
+
+    def selected_items(self):
+        # 选中的条目，按在列表中的顺序
+        if not self.selected:
+            return []
+        return [item for item in self.items if id(item) in self.selected]
+
+    def select_all(self):
+        self.selected = {id(item): item for item in self.items}
+        self.render()
+        return "break"
+
+    def _select_position(self, position, mode=None):
+        # mode: None 只选中该行；"toggle" 切换该行；"extend" 选中从锚点到该行的范围
+        item = self.items[self.order[position]]
+        if mode == "extend" and self.anchor is not None:
+            low, high = sorted((self.anchor, position))
+            self.selected = {id(self.items[index]): self.items[index] for index in self.order[low:high + 1]}
+        elif mode == "toggle":
+            if self.selected.pop(id(item), None) is None:
+                self.selected[id(item)] = item
+            self.anchor = position
+        else:
+            self.selected = {id(item): item}
+            self.anchor = position
+        self.selected_index = position
+
+    # ---- 渲染与滚动 ----
+
+    def _on_resize(self, event):
+        rows = max(1, (event.height - self.row_height) // self.row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def render(self):
+        total = len(self.order)
+        rows = max(1, self.visible_rows)
+        self.offset = max(0, min(self.offset, total - rows))
+
+        # 行数固定，只在行数变化时增删Tk条目
+        existing = self.tree.get_children()
+        needed = min(rows, total)
+        if len(existing) > needed:
+            self.tree.delete(*existing[needed:])
+        for row in range(len(existing), needed):
+            self.tree.insert("", "end", iid=f"row{row}")
+
+        selected_rows = []
+        for row in range(needed):
+            position = self.offset + row
+            item = self.items[self.order[position]]
+            if not isinstance(item, dict):
+                item = {}
+            values = []
+            for name, _, _ in TABLE_COLUMNS:
+                value = item.get(name)
+                values.append("" if value is None else str(value))
+            flagged = self.is_flagged is not None and self.is_flagged(item)
+            self.tree.item(f"row{row}", values=values, tags=("flagged",) if flagged else ())
+            if id(item) in self.selected:
+                selected_rows.append(f"row{row}")
+
+        # 程序设置选中行时不触发 _on_select
+        self._updating_selection = True
+        self.tree.selection_set(selected_rows)
+        self._updating_selection = False
+
+        if total:
+            self.yscroll.set(self.offset / total, min(1.0, (self.offset + needed) / total))
+        else:
+            self.yscroll.set(0.0, 1.0)
+
+    def yview(self, *args):
+        total = len(self.order)
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            step = max(1, self.visible_rows - 1) if args[2] == "pages" else 1
+            self.offset += amount * step
+        self.render()
+
+    def scroll(self, rows):
+        self.offset += rows
+        self.render()
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _on_select(self, event):
+        # 可视区域中的选择被 Tk 改变（例如键盘操作）时同步到 selected
+        if self._updating_selection:
+            return
+        selection = self.tree.selection()
+        for row, row_id in enumerate(self.tree.get_children()):
+            item = self.items[self.order[self.offset + row]]
+            if row_id in selection:
+                self.selected[id(item)] = item
+            else:
+                self.selected.pop(id(item), None)
+        if selection:
+            self.selected_index = self.offset + self.tree.index(selection[0])
+
+    def _on_click(self, event, mode=None):
+        # 自行处理行的选择，表头的单击仍交给 Tk（排序）
+        if self.tree.identify_region(event.x, event.y) not in ("cell", "tree"):
+            return None
+        self.tree.focus_set()
+        row_id = self.tree.identify_row(event.y)
+        if row_id:
+            self._select_position(self.offset + self.tree.index(row_id), mode)
+            self.render()
+        return "break"
+
+    def _move_selection(self, step, extend=False):
+        if not self.order:
+            return "break"
+        current = self.selected_index if self.selected_index is not None else self.offset - (1 if step > 0 else -1)
+        if extend and self.anchor is None:
+            self.anchor = max(0, min(len(self.order) - 1, current))
+        position = max(0, min(len(self.order) - 1, current + step))
+        self._select_position(position, "extend" if extend else None)
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.visible_rows:
+            self.offset = position - self.visible_rows + 1
+        self.render()
+        return "break"
+
+    # ---- 编辑 ----
+
+    def _on_double_click(self, event):
+        row_id = self.tree.identify_row(event.y)
+        column_id = self.tree.identify_column(event.x)
+        if not row_id or not column_id:
+            return
+        position = self.offset + self.tree.index(row_id)
+        column = TABLE_COLUMNS[int(column_id[1:]) - 1][0]
+        self.edit_cell(position, column)
+
+    def edit_cell(self, position, column):
+        item = self.items[self.order[position]]
+        if not isinstance(item, dict) or (self.can_edit is not None and not self.can_edit()):
+            return
+        old_value = item.get(column)
+        if column == "enabled" and old_value is None:
+            # 没有 enabled 字段表示启用，只用于对话框的初始值和类型转换
+            old_value = True
+
+        text = simpledialog.askstring("编辑值", f"编辑 {column} 的值:",
+                                      initialvalue="" if old_value is None else str(old_value), parent=self)
+        if text is None:  # 用户取消
+            return
+        try:
+            new_value = coerce_value(text, old_value, column)
+        except ValueError as e:
+            messagebox.showerror("类型错误", str(e), parent=self)
+            return
+        if new_value == old_value and column in item:
+            return
+
+        if self.on_edit is not None:
+            # 交给回调写入，撤销时才能知道字段原本是否存在
+            self.on_edit(item, column, new_value)
+        else:
+            item[column] = new_value
+        if column == self.sort_column:
+            self._apply_sort()
+        self.render()
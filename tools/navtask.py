@@ -0,0 +1,76 @@
+"""在工作线程中执行耗时操作，并把进度和结果交回 Tk 主线程
+
+Tk 不是线程安全的：工作线程只向队列写消息，主线程用 after() 轮询队列并调用
+回调，因此回调中可以直接更新界面。
+"""
+import queue
+import threading
+
+POLL_INTERVAL_MS = 50
+
+
+class BackgroundTask:
+    def __init__(self, widget, description, func, on_done=None, on_error=None, on_progress=None):
+        # func(report, cancel) 在工作线程中执行：report(*args) 会在主线程中转发给
+        # on_progress（同一轮询周期内只保留最新一次），cancel 是 threading.Event
+        self.widget = widget
+        self.description = description
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.cancel_event = threading.Event()
+        self.finished = False
+        self._messages = queue.Queue()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def start(self):
+        threading.Thread(target=self._run, name=f"task-{self.description}", daemon=True).start()
+        self.widget.after(POLL_INTERVAL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _report(self, *args):
+        self._messages.put(("progress", args))
+
+    def _run(self):
+        try:
+            result = self.func(self._report, self.cancel_event)
+        except BaseException as e:
+            self._messages.put(("error", e))
+        else:
+            self._messages.put(("done", result))
+
+    def _poll(self):
+        progress = None
+        outcome = None
+        while outcome is None:
+            try:
+                kind, value = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                progress = value
+            else:
+                outcome = (kind, value)
+
+        if progress is not None and self.on_progress is not None:
+            self.on_progress(*progress)
+        if outcome is None:
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+            return
+
+        self.finished = True
+        kind, value = outcome
+        if kind == "done":
+            if self.on_done is not None:
+                self.on_done(value)
+        elif self.on_error is not None:
+            self.on_error(value)
+        else:
+            raise value
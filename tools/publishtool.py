@@ -1,10 +1,34 @@
+import copy
 import json
 import os
-import shutil
-import datetime
+import time
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox, filedialog
 
+from navassets import format_summary, regenerate_metadata
+from navcore import (DEFAULT_BACKUP_DIR, DEFAULT_JSON_PATH, DEFAULT_LINK_CACHE, DEFAULT_PROFILE_DIR,
+                     NavigationDocument, NavigationError, OperationCancelled)
+from navdiff import diff_navigation, format_diff, summarize_change
+from navgit import GitPublishError
+from navicons import analyze, apply_remap, remove_unreferenced
+from navimport import apply_import, iter_candidates, plan_import
+from navio import JSON_BACKEND
+from navprofile import format_record, profiler
+from navlinks import LinkCache, LinkChecker, collect_links, describe_result, failed_items
+from navschema import SEVERITY_LABELS, format_path
+from navsearch import SearchIndex
+from navtable import VirtualItemTable, coerce_value
+from navtask import BackgroundTask
+
+# 检查 navigation.json 是否被外部程序（如管理后台）修改的间隔
+WATCH_INTERVAL_MS = 2000
+# 开启计时后刷新状态栏中耗时摘要的间隔
+TIMING_POLL_MS = 500
+# 开启 git 发布后，最后一次保存之后等待的时间；期间的多次保存合并为一次提交
+GIT_COMMIT_DELAY_MS = 30000
+# 存放分类或链接的列表，其中的元素是可以批量操作的条目
+ENTRY_LISTS = ("navigationItems", "subCategories", "items")
+
 class NavigationEditor:
     def __init__(self, root):
         self.root = root
@@ -18,13 +42,21 @@ class NavigationEditor:
         self.style.configure("TLabel", font=("SimHei", 10))
         self.style.configure("TButton", font=("SimHei", 10))
         
-        # 数据存储
-        self.navigation_data = None
-        self.original_data = None  # 用于检测变化
-        self.json_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                                     "navsphere", "content", "navigation.json")
-        self.backup_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-                                     "navsphere", "content", "backups")
+        # 数据存储（加载、编辑、备份和保存由 navcore 负责）
+        self.document = NavigationDocument(DEFAULT_JSON_PATH, DEFAULT_BACKUP_DIR)
+        self.search_index = None  # 加载后在空闲时建立
+        self.search_window = None
+        # 链接检查结果: href -> 结果，失败的条目在树和表格中标红
+        self.link_results = {}
+        self.link_check = None  # 正在进行的链接检查（BackgroundTask）
+        # 正在后台执行的文件操作（加载、保存、备份、恢复），同一时间只允许一个
+        self.task = None
+        self.link_window = None
+        self.watch_task = None  # 正在读取外部修改后的文件（BackgroundTask）
+        self.git_commit_timer = None  # 等待提交到 git 的 after() 标识
+        # 复制或剪切的链接: ("copy", [副本]) 或 ("cut", [id])
+        self.clipboard = None
+        self.backup_dir = self.document.backup_dir
         
         # 创建备份目录
         if not os.path.exists(self.backup_dir):
@@ -44,12 +76,36 @@ class NavigationEditor:
         self.notebook = ttk.Notebook(self.main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True, pady=5)
         
+        # 懒加载模式：标签页首次显示时才创建Treeview，节点展开时才插入子节点
+        self.lazy_load = True
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        
         # 尝试加载JSON文件
         self.load_navigation_json()
         
+        # 定期检查文件是否在外部被修改
+        self.root.after(WATCH_INTERVAL_MS, self._watch_file)
+        
         # 窗口关闭时检查是否保存
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    @property
+    def navigation_data(self):
+        return self.document.data
+    
+    @property
+    def journal(self):
+        # 用于检测变化
+        return self.document.journal
+    
+    @property
+    def json_path(self):
+        return self.document.json_path
+    
+    @json_path.setter
+    def json_path(self, path):
+        self.document.json_path = path
+    
     def create_menu(self):
         # 创建菜单栏
         menubar = tk.Menu(self.root)
@@ -60,18 +116,40 @@ class NavigationEditor:
         file_menu.add_command(label="保存", command=self.save_json, accelerator="Ctrl+S")
         file_menu.add_command(label="备份当前文件", command=self.backup_current_file)
         file_menu.add_command(label="从备份恢复", command=self.restore_from_backup)
+        file_menu.add_command(label="更新资源清单", command=self.update_resource_metadata)
+        file_menu.add_command(label="图标去重与清理", command=self.dedupe_icons)
+        file_menu.add_command(label="导入链接", command=self.import_links)
+        file_menu.add_separator()
+        self.git_enabled = tk.BooleanVar(value=False)
+        file_menu.add_checkbutton(label="保存后提交到 git", variable=self.git_enabled,
+                                  command=self.toggle_git_publishing)
+        file_menu.add_command(label="立即提交到 git", command=self.commit_to_git)
+        file_menu.add_command(label="校验数据", command=self.show_validation)
         file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.on_closing)
         menubar.add_cascade(label="文件", menu=file_menu)
         
         # 编辑菜单
         edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="撤销", command=self.undo, accelerator="Ctrl+Z")
+        edit_menu.add_command(label="重做", command=self.redo, accelerator="Ctrl+Y")
+        edit_menu.add_separator()
         edit_menu.add_command(label="添加项目", command=self.add_item)
-        edit_menu.add_command(label="删除项目", command=self.delete_item)
-        edit_menu.add_command(label="复制项目", command=self.copy_item)
-        edit_menu.add_command(label="粘贴项目", command=self.paste_item)
+        edit_menu.add_command(label="删除项目", command=self.delete_item, accelerator="Delete")
+        edit_menu.add_command(label="复制项目", command=self.copy_item, accelerator="Ctrl+C")
+        edit_menu.add_command(label="剪切项目", command=self.cut_item, accelerator="Ctrl+X")
+        edit_menu.add_command(label="粘贴项目", command=self.paste_item, accelerator="Ctrl+V")
+        edit_menu.add_command(label="移动到...", command=self.move_item)
+        edit_menu.add_command(label="启用/禁用", command=self.toggle_item)
         menubar.add_cascade(label="编辑", menu=edit_menu)
         
+        # 诊断菜单
+        self.timing_enabled = tk.BooleanVar(value=False)
+        diagnose_menu = tk.Menu(menubar, tearoff=0)
+        diagnose_menu.add_checkbutton(label="记录操作耗时", variable=self.timing_enabled, command=self.toggle_timing)
+        diagnose_menu.add_command(label="分析下一次操作", command=self.capture_next_operation)
+        menubar.add_cascade(label="诊断", menu=diagnose_menu)
+        
         # 帮助菜单
         help_menu = tk.Menu(menubar, tearoff=0)
         help_menu.add_command(label="关于", command=self.show_about)
@@ -82,6 +160,10 @@ class NavigationEditor:
         
         # 绑定快捷键
         self.root.bind("<Control-s>", lambda event: self.save_json())
+        self.root.bind("<Escape>", self.cancel_task)
+        self.root.bind("<Control-z>", lambda event: self.undo())
+        self.root.bind("<Control-y>", lambda event: self.redo())
+        self.root.bind("<Control-Z>", lambda event: self.redo())
     
     def create_toolbar(self):
         # 创建顶部操作栏
@@ -101,25 +183,53 @@ class NavigationEditor:
         restore_btn.pack(side=tk.LEFT, padx=5)
         
         # 刷新按钮
-        refresh_btn = ttk.Button(toolbar, text="刷新", command=self.load_navigation_json)
+        refresh_btn = ttk.Button(toolbar, text="刷新", command=self.refresh_from_disk)
         refresh_btn.pack(side=tk.LEFT, padx=5)
         
+        # 树/表格视图切换
+        table_btn = ttk.Button(toolbar, text="表格/树视图", command=self.toggle_table_view)
+        table_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 链接检查按钮
+        links_btn = ttk.Button(toolbar, text="检查链接", command=self.check_links)
+        links_btn.pack(side=tk.LEFT, padx=5)
+        
+        # 搜索框
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(toolbar, textvariable=self.search_var, width=30)
+        search_entry.pack(side=tk.LEFT, padx=(15, 5))
+        search_entry.bind("<Return>", lambda event: self.search_items())
+        search_btn = ttk.Button(toolbar, text="搜索", command=self.search_items)
+        search_btn.pack(side=tk.LEFT, padx=5)
+        self.root.bind("<Control-f>", lambda event: search_entry.focus_set())
+        
         # 状态栏
         self.status_var = tk.StringVar()
         self.status_var.set("就绪")
+        # 最近一次操作的耗时摘要，开启计时后显示
+        self.timing_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.timing_var, anchor=tk.E).pack(side=tk.RIGHT, padx=5)
         status_bar = ttk.Label(toolbar, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(side=tk.RIGHT, fill=tk.X, expand=True, padx=5)
+        self.shown_timing = None
+        self.timing_poll = None
     
     def open_file_dialog(self):
+        if self._is_busy():
+            return
+        
         # 检查是否有未保存的更改
         if self.has_unsaved_changes():
             response = messagebox.askyesnocancel("未保存的更改", 
                                                "您有未保存的更改。是否保存当前内容？")
             if response is None:  # 取消操作
                 return
-            if response:  # 保存更改
-                self.save_json()
-        
+            if response:  # 保存完成后再选择文件
+                self.save_json(then=self._choose_file)
+                return
+        self._choose_file()
+    
+    def _choose_file(self):
         # 打开文件对话框
         file_path = filedialog.askopenfilename(
             title="打开JSON文件",
@@ -130,44 +240,419 @@ class NavigationEditor:
             self.json_path = file_path
             self.load_navigation_json()
     
-    def load_navigation_json(self):
-        try:
-            with open(self.json_path, 'r', encoding='utf-8') as file:
-                self.navigation_data = json.load(file)
-                # 深拷贝原始数据用于比较
-                self.original_data = json.dumps(self.navigation_data, ensure_ascii=False)
-                
-            # 清除现有的标签页
+    def load_navigation_json(self, then=None):
+        # 在工作线程中读取和解析文件（按 Esc 取消），完成后在主线程中替换数据和标签页
+        file_name = os.path.basename(self.json_path)
+        
+        def read(report, cancel):
+            def progress(done, total):
+                report(f"正在读取 {file_name}: {done / 1048576:.1f}/{total / 1048576:.1f} MB（按 Esc 取消）")
+            
+            with profiler.operation("load"):
+                result = self.document.read_with_state(progress, cancel)
+            report(f"正在解析 {file_name}...")
+            return result
+        
+        def on_loaded(result):
+            # 重新加载后没有未保存的修改
+            self.document.set_data(*result)
+            self._reset_tabs()
+            self.status_var.set(f"已加载文件: {file_name}（{JSON_BACKEND}）")
+            if then is not None:
+                then()
+        
+        def on_error(error):
+            if isinstance(error, NavigationError):
+                self.show_error("JSON格式错误", str(error))
+            elif isinstance(error, FileNotFoundError):
+                self.show_error("文件未找到", f"无法找到文件: {self.json_path}")
+            elif isinstance(error, json.JSONDecodeError):
+                self.show_error("JSON解析错误", f"解析JSON文件时出错: {str(error)}")
+            else:
+                self.show_error("加载错误", f"加载文件时出错: {str(error)}")
+        
+        self._start_task("加载文件", read, on_loaded, on_error)
+    
+    def _reset_tabs(self):
+        # 清除现有的标签页并按当前数据重新创建；先完整校验一次，树中的问题行随之标记
+        with profiler.operation("tabs"):
+            self._revalidate()
             for tab in self.notebook.tabs():
                 self.notebook.forget(tab)
-            
-            # 处理导航数据
-            if "navigationItems" in self.navigation_data:
-                self._create_tabs_from_navigation(self.navigation_data["navigationItems"])
-                self.status_var.set(f"已加载文件: {os.path.basename(self.json_path)}")
+            self._create_tabs_from_navigation(self.navigation_data["navigationItems"])
+        
+        # 窗口响应后再建立搜索索引
+        self.search_index = None
+        self.root.after_idle(self._ensure_search_index)
+    
+    def refresh_from_disk(self):
+        # 没有未保存的修改时整体重新加载；有修改时与磁盘上的版本合并，不丢弃本地修改
+        if not self.has_unsaved_changes():
+            self.load_navigation_json()
+            return
+        
+        def on_read(result):
+            if result is None:
+                self.status_var.set("文件没有外部修改，保留当前未保存的修改")
             else:
-                self.show_error("JSON格式错误", "未找到 'navigationItems' 字段")
-                
-        except FileNotFoundError:
-            self.show_error("文件未找到", f"无法找到文件: {self.json_path}")
-        except json.JSONDecodeError as e:
-            self.show_error("JSON解析错误", f"解析JSON文件时出错: {str(e)}")
-        except Exception as e:
-            self.show_error("加载错误", f"加载文件时出错: {str(e)}")
+                self._apply_external_change(result)
+        
+        self._start_task("读取文件", lambda report, cancel: self.document.read_external_change(cancel), on_read,
+                         lambda e: self.show_error("刷新错误", f"读取文件时出错: {str(e)}"))
+    
+    def _watch_file(self):
+        # 只比较大小和修改时间；有变化时在工作线程中读取并比较内容哈希
+        self.root.after(WATCH_INTERVAL_MS, self._watch_file)
+        if self.task is not None or self.watch_task is not None or not self.navigation_data:
+            return
+        if not self.document.disk_changed():
+            return
+        known = self.document.disk_state
+        
+        def on_read(result):
+            self.watch_task = None
+            # 读取期间保存或重新加载过文件时，结果已经过期
+            if result is None or self.task is not None or self.document.disk_state is not known:
+                return
+            self._apply_external_change(result)
+        
+        def on_error(error):
+            self.watch_task = None
+            # 外部程序可能正在写入，下次再检查
+            self.status_var.set(f"检查外部修改时出错: {error}")
+        
+        self.watch_task = BackgroundTask(self.root, "检查外部修改",
+                                         lambda report, cancel: self.document.read_external_change(cancel),
+                                         on_read, on_error).start()
+    
+    def _apply_external_change(self, result):
+        # 合并外部修改，只重建发生变化的标签页
+        remote, state = result
+        file_name = os.path.basename(self.json_path)
+        had_changes = self.has_unsaved_changes()
+        try:
+            conflicts = self.document.merge_external(remote, state)
+        except NavigationError as e:
+            if messagebox.askyesno("外部修改", f"{file_name} 已在外部被修改，但无法与未保存的修改合并：\n{e}\n\n"
+                                               "是否放弃本地修改并重新加载？"):
+                self.document.set_data(remote, state)
+                self._reset_tabs()
+            else:
+                # 不再提示同一版本，保存时会覆盖外部修改（覆盖前创建备份）
+                self.document.disk_state = state
+            return
+        
+        rebuilt = self._refresh_changed_tabs()
+        message = f"{file_name} 已在外部被修改，更新了 {rebuilt} 个分类"
+        if had_changes:
+            message += "，已与未保存的修改合并"
+        self.status_var.set(message)
+        self._show_merge_conflicts(conflicts, "（外部版本会在保存前备份）")
+    
+    def _show_merge_conflicts(self, conflicts, note):
+        if not conflicts:
+            return
+        shown = "\n".join(str(conflict) for conflict in conflicts[:20])
+        more = f"\n... 共 {len(conflicts)} 处" if len(conflicts) > 20 else ""
+        messagebox.showwarning("合并冲突", f"以下修改与外部修改冲突，已保留本地的值{note}：\n\n{shown}{more}")
+    
+    def _refresh_changed_tabs(self, touched=()):
+        # 分类对象未变化且不在 touched 中的标签页保持原样；分类的增删或顺序变化时重建全部标签页。
+        # 返回更新的分类数
+        old_categories = [self.notebook.nametowidget(tab_id).nav_item for tab_id in self.notebook.tabs()]
+        new_categories = self.navigation_data["navigationItems"]
+        if [c.get("id") for c in old_categories] != [c.get("id") for c in new_categories]:
+            current = self.notebook.index(self.notebook.select()) if self.notebook.select() else 0
+            self._reset_tabs()
+            if self.notebook.tabs():
+                self.notebook.select(min(current, len(self.notebook.tabs()) - 1))
+            return len(new_categories)
+        
+        changed = [(tab_id, category) for tab_id, category in zip(self.notebook.tabs(), new_categories)
+                   if self.notebook.nametowidget(tab_id).nav_item is not category
+                   or any(c is category for c in touched)]
+        self._revalidate([category for _, category in changed])
+        rebuilt = len(changed)
+        for tab_id, category in changed:
+            tab_frame = self.notebook.nametowidget(tab_id)
+            tab_frame.nav_item = category
+            self.notebook.tab(tab_id, text=category.get("title", "未命名"))
+            if tab_frame.tree is None:
+                continue
+            tab_frame.tree_stale = True
+            if tab_frame.view == "tree":
+                self._show_tree_view(tab_frame)
+            else:
+                tab_frame.table_view.reload()
+        if rebuilt:
+            self.search_index = None
+            self.root.after_idle(self._ensure_search_index)
+        return rebuilt
+    
+    def _revalidate(self, categories=None):
+        # 重新检查给定的顶级分类（None 表示完整检查），返回全部问题
+        with profiler.stage("validate"):
+            if categories is None:
+                return self.document.validator.validate(self.navigation_data)
+            return self.document.validator.update(self.navigation_data, categories)
+    
+    def show_validation(self):
+        # 完整检查并列出全部问题，双击定位到对应条目
+        issues = self._revalidate()
+        self._rebuild_loaded_tabs()
+        errors = sum(1 for issue in issues if issue.is_error)
+        if not issues:
+            messagebox.showinfo("校验通过", "没有发现问题")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"校验结果（{errors} 个错误，{len(issues) - errors} 个警告）")
+        window.geometry("900x450")
+        window.transient(self.root)
+        
+        list_frame = ttk.Frame(window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        issue_tree = ttk.Treeview(list_frame, columns=('severity', 'path', 'message'), show='headings')
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=issue_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        issue_tree.pack(fill=tk.BOTH, expand=True)
+        issue_tree.config(yscrollcommand=scrollbar.set)
+        for column, title, width in (('severity', '级别', 60), ('path', '位置', 300), ('message', '问题', 500)):
+            issue_tree.heading(column, text=title)
+            issue_tree.column(column, width=width, minwidth=50)
+        issue_tree.tag_configure("error", foreground="red")
+        
+        rows = {}
+        for issue in sorted(issues, key=lambda issue: not issue.is_error):
+            row_id = issue_tree.insert("", "end", values=(SEVERITY_LABELS[issue.severity], format_path(issue.path),
+                                                         issue.message),
+                                       tags=(issue.severity,))
+            rows[row_id] = issue
+        
+        def on_open(event):
+            selection = issue_tree.selection()
+            if selection and rows[selection[0]].node is not None:
+                self.reveal_item(rows[selection[0]].node)
+        
+        issue_tree.bind("<Double-1>", on_open)
+        ttk.Button(window, text="关闭", command=window.destroy).pack(pady=(0, 10))
+    
+    def _start_task(self, description, func, on_done, on_error=None):
+        # 在后台执行文件操作；已有操作在进行时拒绝并返回 None
+        if self._is_busy():
+            return None
+        
+        def finish(result):
+            self.task = None
+            on_done(result)
+        
+        def fail(error):
+            self.task = None
+            if isinstance(error, OperationCancelled):
+                self.status_var.set(f"已取消{description}")
+            elif on_error is not None:
+                on_error(error)
+            else:
+                self.show_error(f"{description}出错", str(error))
+        
+        self.status_var.set(f"正在{description}...")
+        self.task = BackgroundTask(self.root, description, func, finish, fail, self.status_var.set).start()
+        return self.task
+    
+    def _is_busy(self):
+        # 后台文件操作进行时不允许修改数据或开始另一个文件操作
+        if self.task is None:
+            return False
+        self.status_var.set(f"正在{self.task.description}，请稍候")
+        return True
+    
+    def cancel_task(self, event=None):
+        if self.task is not None:
+            self.task.cancel()
     
     def _create_tabs_from_navigation(self, navigation_items):
         # 为每个导航项创建标签页
-        for nav_item in navigation_items:
+        for nav_index, nav_item in enumerate(navigation_items):
             # 创建标签页内容框架
             tab_frame = ttk.Frame(self.notebook)
             tab_frame.pack_propagate(False)
             
+            # 记录标签页对应的数据，Treeview在首次显示时再创建
+            tab_frame.nav_item = nav_item
+            tab_frame.nav_index = nav_index
+            tab_frame.tree = None
+            tab_frame.view = "tree"
+            tab_frame.table_view = None
+            tab_frame.tree_stale = False
+            
             # 设置标签页名称
             tab_title = nav_item.get("title", "未命名")
             self.notebook.add(tab_frame, text=tab_title)
             
-            # 在标签页中创建Treeview
-            self._create_treeview(tab_frame, nav_item, nav_item)
+            if not self.lazy_load:
+                self._ensure_tab_tree(tab_frame)
+        
+        # 当前显示的标签页需要立即创建
+        current_tab = self.notebook.select()
+        if current_tab:
+            self._ensure_tab_tree(self.notebook.nametowidget(current_tab))
+    
+    def _ensure_tab_tree(self, tab_frame):
+        # 在标签页中创建Treeview（只创建一次）
+        if getattr(tab_frame, "tree", None) is None and hasattr(tab_frame, "nav_item"):
+            with profiler.stage("populate_tree"):
+                tab_frame.tree = self._create_treeview(tab_frame, tab_frame.nav_item, tab_frame.nav_item)
+            tab_frame.tree.root_path = ("navigationItems", tab_frame.nav_index)
+        return getattr(tab_frame, "tree", None)
+    
+    def toggle_table_view(self):
+        # 在当前标签页的树视图和表格视图之间切换
+        current_tab = self.notebook.select()
+        if not current_tab:
+            return
+        tab_frame = self.notebook.nametowidget(current_tab)
+        if tab_frame.view == "table":
+            self._show_tree_view(tab_frame)
+        else:
+            self._show_table_view(tab_frame)
+    
+    def _show_tree_view(self, tab_frame):
+        if tab_frame.table_view is not None:
+            tab_frame.table_view.pack_forget()
+        open_paths = []
+        if tab_frame.tree_stale and tab_frame.tree is not None:
+            # 表格中的编辑可能使已展开的节点过期，重新按需填充，并恢复展开的节点
+            open_paths = self._open_paths(tab_frame.tree)
+            tab_frame.tree.master.destroy()
+            tab_frame.tree = None
+            tab_frame.tree_stale = False
+        tree = self._ensure_tab_tree(tab_frame)
+        if open_paths:
+            self._reopen_paths(tree, open_paths)
+        if not tree.master.winfo_ismapped():
+            tree.master.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tab_frame.view = "tree"
+    
+    def _open_paths(self, tree):
+        # 已展开节点相对于标签页分类的键路径
+        paths = []
+        stack = list(tree.get_children(""))
+        while stack:
+            row = stack.pop()
+            if row in tree.node_index and tree.item(row, "open"):
+                paths.append(self._node_path(tree, row)[len(tree.root_path):])
+                stack.extend(tree.get_children(row))
+        return paths
+    
+    def _reopen_paths(self, tree, paths):
+        # 按路径重新展开节点（数据变化后不存在的路径跳过）
+        rows = {(): ""}
+        for path in sorted(paths, key=len):
+            parent = rows.get(path[:-1])
+            if parent is None:
+                continue
+            for row in tree.get_children(parent):
+                if tree.node_index.get(row, (None, None))[1] == path[-1]:
+                    self._expand_node(tree, row)
+                    tree.item(row, open=True)
+                    rows[path] = row
+                    break
+    
+    def _show_table_view(self, tab_frame):
+        tree = self._ensure_tab_tree(tab_frame)
+        tree.master.pack_forget()
+        if tab_frame.table_view is None:
+            tab_frame.table_view = self._create_table_view(tab_frame)
+        else:
+            # 树视图中可能增删了条目或子分类，重新收集列表
+            tab_frame.table_view.reload()
+        tab_frame.table_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tab_frame.view = "table"
+    
+    def _iter_item_lists(self, category, path, label=""):
+        # 产出分类及其子分类中的链接列表: (显示名称, 列表, 列表路径)
+        label = f"{label} / {category.get('title', '未命名')}" if label else category.get("title", "未命名")
+        if isinstance(category.get("items"), list):
+            yield f"{label} ({len(category['items'])} 项)", category["items"], (*path, "items")
+        for i, sub in enumerate(category.get("subCategories") or []):
+            if isinstance(sub, dict):
+                yield from self._iter_item_lists(sub, (*path, "subCategories", i), label)
+    
+    def _create_table_view(self, tab_frame):
+        view = ttk.Frame(tab_frame)
+        
+        # 选择要显示的链接列表
+        selector_frame = ttk.Frame(view)
+        selector_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(selector_frame, text="列表:").pack(side=tk.LEFT)
+        selector = ttk.Combobox(selector_frame, state="readonly", width=60)
+        selector.pack(side=tk.LEFT, padx=5)
+        item_lists = []
+        
+        def can_edit():
+            return not self._is_busy()
+        
+        def on_edit(item, field, new_value):
+            # 写入表格中的编辑并记录修改；step.set 自己记录原值，字段原本不存在时撤销会删除它
+            items, list_path = view.current_list
+            position = next(i for i, candidate in enumerate(items) if candidate is item)
+            with self.document.history.step(f"编辑 {field}", tab_frame.nav_item) as step:
+                step.set(item, field, new_value)
+            self.journal.record((*list_path, position, field), "edit")
+            if self.search_index is not None:
+                self.search_index.update(item)
+            self._revalidate([tab_frame.nav_item])
+            tab_frame.tree_stale = True
+            self._set_modified_status(item)
+        
+        table = VirtualItemTable(view, on_edit=on_edit, is_flagged=self._is_flagged, can_edit=can_edit)
+        table.pack(fill=tk.BOTH, expand=True)
+        view.table = table
+        view.current_list = ([], ())
+        # 右键菜单和编辑快捷键与树视图共用，据此找到所在的表格视图
+        table.tree.table_view = view
+        table.tree.bind("<Button-3>", self.show_context_menu)
+        self._bind_edit_keys(table.tree)
+        
+        def on_list_selected(event=None):
+            _, items, list_path = item_lists[selector.current()]
+            view.current_list = (items, list_path)
+            table.set_items(items)
+        
+        def reload():
+            current = view.current_list[0] if item_lists else None
+            item_lists[:] = self._iter_item_lists(tab_frame.nav_item, ("navigationItems", tab_frame.nav_index))
+            selector["values"] = [label for label, _, _ in item_lists]
+            if not item_lists:
+                selector.set("")
+                table.set_items([])
+                return
+            positions = [i for i, (_, items, _) in enumerate(item_lists) if items is current]
+            if positions:
+                # 仍是同一个列表时保留排序和滚动位置
+                selector.current(positions[0])
+                view.current_list = item_lists[positions[0]][1:]
+                table.refresh()
+            else:
+                # 默认显示链接最多的列表
+                selector.current(max(range(len(item_lists)), key=lambda i: len(item_lists[i][1])))
+                on_list_selected()
+        
+        selector.bind("<<ComboboxSelected>>", on_list_selected)
+        view.reload = reload
+        reload()
+        return view
+    
+    def _get_current_tree(self):
+        # 获取当前选中标签页中的Treeview组件
+        current_tab = self.notebook.select()
+        if not current_tab:
+            return None
+        return self._ensure_tab_tree(self.notebook.nametowidget(current_tab))
+    
+    def on_tab_changed(self, event):
+        # 切换到尚未创建Treeview的标签页时再填充
+        self._get_current_tree()
     
     def _create_treeview(self, parent_frame, data_item, parent_data=None, parent_id=""):
         # 创建框架来容纳Treeview和滚动条
@@ -202,75 +687,123 @@ class NavigationEditor:
         tree.heading('key', text='键')
         tree.heading('value', text='值')
         tree.heading('type', text='类型')
+        tree.tag_configure("broken", foreground="red")
+        tree.tag_configure("invalid", background="#fde2e1")
         
         # 存储对数据的引用
         tree.data_item = data_item
         tree.parent_data = parent_data
+        # 节点索引: item_id -> (所在容器, 键/下标)，编辑和删除直接定位数据
+        tree.node_index = {}
+        # 尚未展开的容器节点
+        tree.pending_nodes = set()
+        tree.root_path = ()
         
-        # 填充Treeview - 使用空字符串作为根节点
+        # 填充Treeview - 使用空字符串作为根节点（懒加载时只插入第一层）
         self._populate_tree(tree, "", data_item, "")
         
+        # 绑定展开事件用于按需填充子节点
+        tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+        
         # 绑定双击事件用于编辑
         tree.bind("<Double-1>", self.on_item_double_click)
         
-        # 绑定右键菜单
+        # 绑定右键菜单和编辑快捷键
         tree.bind("<Button-3>", self.show_context_menu)
+        self._bind_edit_keys(tree)
+        
+        return tree
+    
+    def _bind_edit_keys(self, widget):
+        # 只在树或表格有焦点时生效，不影响搜索框中的复制粘贴
+        widget.bind("<Delete>", lambda event: self.delete_selected_item(event.widget))
+        widget.bind("<Control-c>", lambda event: self.copy_selected_item(event.widget))
+        widget.bind("<Control-x>", lambda event: self.cut_selected_item(event.widget))
+        widget.bind("<Control-v>", lambda event: self.paste_item_to_selected(event.widget))
+    
+    def _describe_value(self, value):
+        # 确定值的显示文本和类型
+        if isinstance(value, dict):
+            return ("{...}" if value else "{}"), "对象"
+        if isinstance(value, list):
+            return f"[{len(value)} 项]", "数组"
+        value_text = str(value) if value is not None else ""
+        if isinstance(value, str):
+            value_type = "字符串"
+        elif isinstance(value, bool):
+            value_type = "布尔值"
+        elif isinstance(value, (int, float)):
+            value_type = "数字"
+        else:
+            value_type = "None"
+        return value_text, value_type
+    
+    def _child_path(self, path, key):
+        # 生成子节点的显示路径
+        if isinstance(key, int):
+            return f"{path}[{key}]"
+        return f"{path}.{key}" if path else key
+    
+    def _key_text(self, key):
+        return f"[{key}]" if isinstance(key, int) else key
     
     def _populate_tree(self, tree, parent_id, data, path):
         if isinstance(data, dict):
-            for key, value in data.items():
-                # 创建新节点
-                item_id = f"{parent_id}_{key}" if parent_id else key
-                new_path = f"{path}.{key}" if path else key
-                
-                # 确定值的显示文本
-                if isinstance(value, dict):
-                    value_text = "{...}"
-                    value_type = "对象"
-                elif isinstance(value, list):
-                    value_text = f"[{len(value)} 项]"
-                    value_type = "数组"
+            keys = data.keys()
+        elif isinstance(data, list):
+            keys = range(len(data))
+        else:
+            return
+        
+        for key in keys:
+            value = data[key]
+            new_path = self._child_path(path, key)
+            value_text, value_type = self._describe_value(value)
+            
+            # 插入节点（由Treeview自动分配唯一ID）并记录到索引
+            item_id = tree.insert(parent_id, "end", text=new_path,
+                                  values=(self._key_text(key), value_text, value_type),
+                                  tags=self._row_tags(value))
+            tree.node_index[item_id] = (data, key)
+            
+            # 容器节点：懒加载时只插入占位行，展开时再填充
+            if isinstance(value, (dict, list)) and value:
+                if self.lazy_load:
+                    tree.pending_nodes.add(item_id)
+                    tree.insert(item_id, "end", text="...")
                 else:
-                    value_text = str(value) if value is not None else ""
-                    value_type = "字符串" if isinstance(value, str) else "布尔值" if isinstance(value, bool) else "数字" if isinstance(value, (int, float)) else "None"
-                
-                # 插入节点
-                tree.insert(parent_id, "end", item_id, text=new_path, values=(key, value_text, value_type))
-                
-                # 递归填充子节点
-                if isinstance(value, (dict, list)):
                     self._populate_tree(tree, item_id, value, new_path)
+    
+    def on_tree_open(self, event):
+        # 节点首次展开时用真实子节点替换占位行
+        tree = event.widget
+        self._expand_node(tree, tree.focus())
+    
+    def _expand_node(self, tree, item_id):
+        # 填充尚未加载的容器节点
+        if item_id not in tree.pending_nodes:
+            return
         
-        elif isinstance(data, list):
-            for i, item in enumerate(data):
-                # 创建新节点
-                item_id = f"{parent_id}_{i}" if parent_id else str(i)
-                new_path = f"{path}[{i}]"
-                
-                # 确定值的显示文本
-                if isinstance(item, dict):
-                    value_text = "{...}" if item else "{}"
-                    value_type = "对象"
-                elif isinstance(item, list):
-                    value_text = f"[{len(item)} 项]"
-                    value_type = "数组"
-                else:
-                    value_text = str(item) if item is not None else ""
-                    value_type = "字符串" if isinstance(item, str) else "布尔值" if isinstance(value, bool) else "数字" if isinstance(value, (int, float)) else "None"
-                
-                # 插入节点
-                tree.insert(parent_id, "end", item_id, text=new_path, values=(f"[{i}]", value_text, value_type))
-                
-                # 递归填充子节点
-                if isinstance(item, (dict, list)):
-                    self._populate_tree(tree, item_id, item, new_path)
+        tree.pending_nodes.discard(item_id)
+        container, key = tree.node_index[item_id]
+        tree.delete(*tree.get_children(item_id))
+        with profiler.stage("populate_tree"):
+            self._populate_tree(tree, item_id, container[key], tree.item(item_id, "text"))
+    
+    def _node_path(self, tree, item_id):
+        # 沿父节点收集键，得到从 navigation_data 根节点开始的路径元组
+        keys = []
+        while item_id:
+            keys.append(tree.node_index[item_id][1])
+            item_id = tree.parent(item_id)
+        return (*tree.root_path, *reversed(keys))
     
     def on_item_double_click(self, event):
         # 获取双击的项
         tree = event.widget
         item_id = tree.identify_row(event.y)
         
-        if item_id:
+        if item_id and not self._is_busy():
             # 获取项的值
             values = tree.item(item_id, "values")
             if not values:
@@ -282,52 +815,265 @@ class NavigationEditor:
             if value_type in ["对象", "数组"]:
                 return
             
-            # 获取该项的数据路径
-            path = tree.item(item_id, "text")
-            
             # 显示编辑对话框
             new_value = simpledialog.askstring("编辑值", f"编辑 {key} 的值:", initialvalue=current_value)
             
             if new_value is not None:  # 用户没有取消
-                # 根据类型转换值
-                if value_type == "布尔值":
-                    new_value = new_value.lower() in ('true', 'yes', '1', 'y', 't')
-                elif value_type == "数字":
-                    try:
-                        new_value = int(new_value) if '.' not in new_value else float(new_value)
-                    except ValueError:
-                        messagebox.showerror("类型错误", "输入的值无法转换为数字")
-                        return
+                # 按字段约定的类型（没有约定时按原值类型）转换
+                container, data_key = tree.node_index[item_id]
+                try:
+                    new_value = coerce_value(new_value, container[data_key],
+                                             data_key if isinstance(data_key, str) else None)
+                except ValueError as e:
+                    messagebox.showerror("类型错误", str(e))
+                    return
                 
                 # 更新Treeview中的显示
-                tree.item(item_id, values=(key, str(new_value), value_type))
+                tree.item(item_id, values=(key, *self._describe_value(new_value)))
                 
                 # 更新数据对象
-                self._update_data_at_path(tree.data_item, path, new_value)
+                self._update_node_value(tree, item_id, new_value)
+                self.journal.record(self._node_path(tree, item_id), "edit")
                 
-                # 更新状态
-                self.status_var.set("数据已修改（未保存）")
-    
-    def _update_data_at_path(self, data, path, new_value):
-        # 解析路径并更新数据
-        parts = path.split('.')
-        current = data
-        
-        # 处理路径的每个部分
-        for i, part in enumerate(parts):
-            # 检查是否是数组索引
-            if part.startswith('[') and part.endswith(']'):
-                index = int(part[1:-1])
-                if i == len(parts) - 1:  # 最后一部分
-                    current[index] = new_value
-                else:
-                    current = current[index]
-            else:
-                # 普通键
-                if i == len(parts) - 1:  # 最后一部分
-                    current[part] = new_value
-                else:
-                    current = current[part]
+                # 重新检查所在分类，并标记所在节点
+                self._revalidate([self._tree_category(tree)])
+                parent_row = tree.parent(item_id)
+                if parent_row:
+                    tree.item(parent_row, tags=self._row_tags(container))
+                self._set_modified_status(container)
+    
+    def _set_modified_status(self, node=None):
+        status = f"数据已修改（未保存，{len(self.journal)} 处更改）"
+        issues = self.document.validator.node_issues(node) if node is not None else []
+        if issues:
+            status += f"；{issues[0].message}"
+        elif self.document.validator.errors:
+            status += f"；数据中有 {len(self.document.validator.errors)} 个错误"
+        self.status_var.set(status)
+    
+    def _tree_category(self, tree):
+        # 树所在标签页对应的顶级分类
+        return self.navigation_data["navigationItems"][tree.root_path[1]]
+    
+    def _update_node_value(self, tree, item_id, new_value):
+        # 通过索引直接写入所在容器，并记入撤销历史
+        container, key = tree.node_index[item_id]
+        with self.document.history.step(f"编辑 {self._key_text(key)}", self._tree_category(tree)) as step:
+            step.set(container, key, new_value)
+        if self.search_index is not None and isinstance(container, dict):
+            self.search_index.update(container)
+    
+    def _ensure_search_index(self):
+        if self.search_index is None and self.navigation_data:
+            self.search_index = SearchIndex().build(self.navigation_data)
+        return self.search_index
+    
+    def search_items(self):
+        query = self.search_var.get().strip()
+        index = self._ensure_search_index()
+        if not query or index is None:
+            return
+        
+        started = time.perf_counter()
+        results = index.search(query)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.status_var.set(f"搜索 “{query}”: {len(results)} 项（{elapsed:.1f} 毫秒）")
+        self._show_search_results(results)
+    
+    def _show_search_results(self, results):
+        # 复用同一个结果窗口
+        if self.search_window is None or not self.search_window.winfo_exists():
+            self.search_window = tk.Toplevel(self.root)
+            self.search_window.title("搜索结果")
+            self.search_window.geometry("800x400")
+            self.search_window.transient(self.root)
+            
+            result_tree = ttk.Treeview(self.search_window, columns=('title', 'href', 'id'),
+                                       show='headings', selectmode='browse')
+            scrollbar = ttk.Scrollbar(self.search_window, orient=tk.VERTICAL, command=result_tree.yview)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            result_tree.pack(fill=tk.BOTH, expand=True)
+            result_tree.config(yscrollcommand=scrollbar.set)
+            for column, title, width in (('title', '标题', 220), ('href', '链接', 420), ('id', 'id', 120)):
+                result_tree.heading(column, text=title)
+                result_tree.column(column, width=width, minwidth=60)
+            
+            def on_open(event):
+                selection = result_tree.selection()
+                if selection:
+                    self.reveal_item(result_tree.result_items[selection[0]])
+            
+            result_tree.bind("<Double-1>", on_open)
+            result_tree.bind("<Return>", on_open)
+            self.search_window.result_tree = result_tree
+        
+        result_tree = self.search_window.result_tree
+        result_tree.delete(*result_tree.get_children())
+        result_tree.result_items = {}
+        for item in results:
+            row_id = result_tree.insert("", "end", values=(item.get("title", ""), item.get("href", ""), item.get("id", "")))
+            result_tree.result_items[row_id] = item
+        self.search_window.deiconify()
+        self.search_window.lift()
+    
+    def reveal_item(self, item):
+        # 切换到条目所在标签页，逐级展开并选中对应节点
+        for path, entry in self.document.iter_entries():
+            if entry is item:
+                break
+        else:
+            self.status_var.set("该条目已不存在")
+            return
+        
+        tab_id = self.notebook.tabs()[path[1]]
+        self.notebook.select(tab_id)
+        tab_frame = self.notebook.nametowidget(tab_id)
+        self._show_tree_view(tab_frame)
+        tree = tab_frame.tree
+        
+        node = ""
+        for key in path[2:]:
+            if node:
+                self._expand_node(tree, node)
+                tree.item(node, open=True)
+            node = next((child for child in tree.get_children(node)
+                         if child in tree.node_index and tree.node_index[child][1] == key), None)
+            if node is None:
+                return
+        
+        tree.selection_set(node)
+        tree.focus(node)
+        tree.see(node)
+    
+    def _is_broken_link(self, item):
+        href = item.get("href") if isinstance(item, dict) else None
+        if not isinstance(href, str):
+            return False
+        record = self.link_results.get(href.strip())
+        return record is not None and not record.get("ok")
+    
+    def _row_tags(self, value):
+        tags = []
+        if self.link_results and self._is_broken_link(value):
+            tags.append("broken")
+        if isinstance(value, dict) and self.document.validator.node_issues(value):
+            tags.append("invalid")
+        return tuple(tags)
+    
+    def _is_flagged(self, item):
+        # 表格中标红的行：失效链接或校验不通过的条目
+        return self._is_broken_link(item) or bool(self.document.validator.node_issues(item))
+    
+    def check_links(self):
+        # 在后台线程中检查所有链接；再次点击则取消正在进行的检查
+        if self.link_check is not None:
+            self.link_check.cancel()
+            self.status_var.set("正在取消链接检查...")
+            return
+        if not self.navigation_data:
+            return
+        
+        links = collect_links(self.navigation_data)
+        
+        def check(report, cancel):
+            checker = LinkChecker(LinkCache(DEFAULT_LINK_CACHE))
+            return checker.check(list(links), cancel=cancel, progress=report)
+        
+        def on_progress(done, total):
+            self.status_var.set(f"正在检查链接: {done}/{total}（再次点击“检查链接”取消）")
+        
+        def on_done(results):
+            self.link_check = None
+            self.link_results = results
+            failures = failed_items(links, results)
+            state = "已取消" if task.cancelled else "完成"
+            self.status_var.set(f"链接检查{state}: {len(results)}/{len(links)} 个链接，{len(failures)} 个条目失败")
+            self._flag_broken_links()
+            self._show_link_failures(failures)
+        
+        def on_error(error):
+            self.link_check = None
+            self.show_error("链接检查失败", str(error))
+        
+        task = BackgroundTask(self.root, "检查链接", check, on_done, on_error, on_progress)
+        self.link_check = task.start()
+    
+    def _flag_broken_links(self):
+        # 更新已加载的树节点和表格中的标记
+        for tab_id in self.notebook.tabs():
+            tab_frame = self.notebook.nametowidget(tab_id)
+            tree = getattr(tab_frame, "tree", None)
+            if tree is not None:
+                for item_id, (container, key) in tree.node_index.items():
+                    tree.item(item_id, tags=self._row_tags(container[key]))
+            if getattr(tab_frame, "table_view", None) is not None:
+                tab_frame.table_view.table.render()
+    
+    def _show_link_failures(self, failures):
+        if self.link_window is not None and self.link_window.winfo_exists():
+            self.link_window.destroy()
+        if not failures:
+            return
+        
+        self.link_window = tk.Toplevel(self.root)
+        self.link_window.title(f"失效链接（{len(failures)} 项）")
+        self.link_window.geometry("900x450")
+        self.link_window.transient(self.root)
+        
+        list_frame = ttk.Frame(self.link_window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        failure_tree = ttk.Treeview(list_frame, columns=('id', 'title', 'href', 'result'), show='headings')
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=failure_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        failure_tree.pack(fill=tk.BOTH, expand=True)
+        failure_tree.config(yscrollcommand=scrollbar.set)
+        for column, title, width in (('id', 'id', 90), ('title', '标题', 180), ('href', '链接', 360), ('result', '结果', 220)):
+            failure_tree.heading(column, text=title)
+            failure_tree.column(column, width=width, minwidth=60)
+        
+        rows = {}
+        for item, record in failures:
+            row_id = failure_tree.insert("", "end", values=(item.get("id", ""), item.get("title", ""),
+                                                           item.get("href", ""), describe_result(record)))
+            rows[row_id] = item
+        
+        def on_open(event):
+            selection = failure_tree.selection()
+            if selection:
+                self.reveal_item(rows[selection[0]])
+        
+        def on_disable(selected_only):
+            row_ids = failure_tree.selection() if selected_only else failure_tree.get_children()
+            item_ids = [rows[row_id]["id"] for row_id in row_ids if "id" in rows[row_id]]
+            if not item_ids:
+                return
+            self.disable_items(item_ids)
+        
+        failure_tree.bind("<Double-1>", on_open)
+        
+        btn_frame = ttk.Frame(self.link_window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(btn_frame, text="禁用所选", command=lambda: on_disable(True)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="全部禁用", command=lambda: on_disable(False)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="关闭", command=self.link_window.destroy).pack(side=tk.LEFT, padx=5)
+    
+    def disable_items(self, item_ids):
+        # 批量设置 enabled: false，并刷新受影响的标签页
+        if self._is_busy():
+            return
+        try:
+            self.document.invalidate_index()
+            changed = self.document.set_enabled(item_ids, False)
+        except NavigationError as e:
+            self.show_error("禁用失败", str(e))
+            return
+        if not changed:
+            self.status_var.set("所选条目均已禁用")
+            return
+        
+        self._revalidate()
+        self._rebuild_loaded_tabs()
+        self.status_var.set(f"已禁用 {len(changed)} 个条目（尚未保存）")
     
     def show_context_menu(self, event):
         # 创建右键菜单
@@ -335,12 +1081,22 @@ class NavigationEditor:
         context_menu.add_command(label="编辑", command=lambda: self.edit_selected_item(event.widget))
         context_menu.add_command(label="删除", command=lambda: self.delete_selected_item(event.widget))
         context_menu.add_command(label="复制", command=lambda: self.copy_selected_item(event.widget))
+        context_menu.add_command(label="剪切", command=lambda: self.cut_selected_item(event.widget))
         context_menu.add_command(label="粘贴", command=lambda: self.paste_item_to_selected(event.widget))
+        context_menu.add_command(label="移动到...", command=lambda: self.move_selected_items(event.widget))
+        context_menu.add_command(label="启用/禁用", command=lambda: self.toggle_selected_items(event.widget))
         
         # 显示菜单
         context_menu.post(event.x_root, event.y_root)
     
     def edit_selected_item(self, tree):
+        view = getattr(tree, "table_view", None)
+        if view is not None:
+            # 表格中编辑光标所在行的标题
+            if view.table.selected_index is not None:
+                view.table.edit_cell(view.table.selected_index, "title")
+            return
+        
         # 获取选中的项
         selected = tree.selection()
         if selected:
@@ -361,204 +1117,789 @@ class NavigationEditor:
                 self.on_item_double_click(mock_event)
     
     def delete_selected_item(self, tree):
-        # 获取选中的项
-        selected = tree.selection()
-        if selected:
-            item_id = selected[0]
-            path = tree.item(item_id, "text")
-            
-            # 确认删除
-            if messagebox.askyesno("确认删除", f"确定要删除 {path} 吗？"):
-                # 从Treeview中删除
-                tree.delete(item_id)
-                
-                # 从数据中删除
-                self._delete_data_at_path(tree.data_item, path)
+        # 选中的多个分类和链接在一个撤销步骤中删除，随后只刷新涉及的标签页；
+        # 树视图中只选中一个节点或选中了字段等其他节点时，直接在树中逐个删除
+        if self._is_busy():
+            return "break"
+        entries = self._selected_entries(tree)
+        if getattr(tree, "table_view", None) is not None:
+            rows = None
+            entries = [(path, item) for path, item in entries if "id" in item]
+            if not entries:
+                return "break"
+            label = entries[0][1].get("title", entries[0][1]["id"])
+        else:
+            rows = [row for row in tree.selection() if row in tree.node_index]  # 不含占位行
+            if not rows:
+                return "break"
+            label = tree.item(rows[0], "text")
+            if len(rows) > 1 and len(entries) == len(rows) and all("id" in item for _, item in entries):
+                rows = None
+        
+        # 确认删除
+        count = len(entries) if rows is None else len(rows)
+        question = f"确定要删除 {label} 吗？" if count == 1 else f"确定要删除所选的 {count} 项吗？"
+        if not messagebox.askyesno("确认删除", question):
+            return "break"
+        
+        if rows is None:
+            self.document.invalidate_index()
+            try:
+                step = self.document.delete_items([item["id"] for _, item in entries])
+            except NavigationError as e:
+                self.show_error("删除失败", str(e))
+                return "break"
+            self._apply_bulk_step(step)
+            return "break"
+        
+        # 跳过会随选中的祖先节点一起删除的节点
+        chosen = set(rows)
+        
+        def has_chosen_ancestor(row):
+            parent = tree.parent(row)
+            while parent:
+                if parent in chosen:
+                    return True
+                parent = tree.parent(parent)
+            return False
+        
+        rows = [row for row in rows if not has_chosen_ancestor(row)]
+        with self.document.history.step(f"删除 {label if len(rows) == 1 else f'{len(rows)} 项'}",
+                                        self._tree_category(tree)):
+            for row in rows:
+                self.journal.record(self._node_path(tree, row), "delete")
                 
-                # 更新状态
-                self.status_var.set("数据已修改（未保存）")
-    
-    def _delete_data_at_path(self, data, path):
-        # 解析路径并删除数据
-        parts = path.split('.')
-        current = data
-        parent = None
-        last_key = None
-        
-        # 遍历路径，找到要删除的项的父级
-        for i, part in enumerate(parts):
-            parent = current
-            
-            if part.startswith('[') and part.endswith(']'):
-                last_key = int(part[1:-1])
-                if i < len(parts) - 1:  # 不是最后一部分
-                    current = current[last_key]
-            else:
-                last_key = part
-                if i < len(parts) - 1:  # 不是最后一部分
-                    current = current[part]
+                # 从数据和Treeview中删除
+                self._delete_node(tree, row)
+        self._revalidate([self._tree_category(tree)])
+        
+        # 更新状态
+        self._set_modified_status()
+        return "break"
+    
+    def _forget_subtree(self, tree, item_id):
+        # 移除节点及其已加载子节点的索引记录
+        for child in tree.get_children(item_id):
+            self._forget_subtree(tree, child)
+        tree.node_index.pop(item_id, None)
+        tree.pending_nodes.discard(item_id)
+    
+    def _delete_node(self, tree, item_id):
+        container, key = tree.node_index[item_id]
+        following = []
+        if isinstance(container, list):
+            # 记录后续兄弟节点，删除后它们的下标需要前移
+            sibling = tree.next(item_id)
+            while sibling:
+                following.append(sibling)
+                sibling = tree.next(sibling)
+        
+        parent_id = tree.parent(item_id)
+        if self.search_index is not None:
+            self.search_index.remove_tree(container[key])
+        with self.document.history.step(f"删除 {tree.item(item_id, 'text')}", self._tree_category(tree)) as step:
+            step.pop(container, key)
+        self.document.invalidate_index()
+        if self.search_index is not None and isinstance(container, dict):
+            self.search_index.update(container)
+        self._forget_subtree(tree, item_id)
+        tree.delete(item_id)
+        
+        # 更新父节点的摘要显示（例如数组项数）
+        parent_path = ""
+        if parent_id:
+            parent_path = tree.item(parent_id, "text")
+            parent_key = tree.item(parent_id, "values")[0]
+            tree.item(parent_id, values=(parent_key, *self._describe_value(container)))
+        
+        for sibling in following:
+            sibling_key = tree.node_index[sibling][1] - 1
+            tree.node_index[sibling] = (container, sibling_key)
+            self._relabel_node(tree, sibling, self._child_path(parent_path, sibling_key))
+    
+    def _relabel_node(self, tree, item_id, path):
+        # 更新节点及其已加载子节点的路径显示
+        key = tree.node_index[item_id][1]
+        values = tree.item(item_id, "values")
+        tree.item(item_id, text=path, values=(self._key_text(key), *values[1:]))
+        for child in tree.get_children(item_id):
+            if child in tree.node_index:
+                self._relabel_node(tree, child, self._child_path(path, tree.node_index[child][1]))
+    
+    def undo(self):
+        self._replay_history(self.document.undo, "撤销", "没有可撤销的修改")
+    
+    def redo(self):
+        self._replay_history(self.document.redo, "重做", "没有可重做的修改")
+    
+    def _replay_history(self, replay, verb, empty_message):
+        # 撤销/重做只修改涉及的对象，随后重建对应的标签页
+        if self._is_busy():
+            return
+        step = replay()
+        if step is None:
+            self.status_var.set(empty_message)
+            return
+        self._refresh_changed_tabs(step.categories)
+        self.search_index = None
+        self.root.after_idle(self._ensure_search_index)
+        self.status_var.set(f"已{verb}: {step.description}（未保存，{len(self.journal)} 处更改）")
+    
+    def _current_view(self):
+        # 当前标签页中正在显示的 Treeview（树视图，或表格视图中的 Treeview）
+        current_tab = self.notebook.select()
+        if not current_tab:
+            return None
+        tab_frame = self.notebook.nametowidget(current_tab)
+        if tab_frame.view == "table":
+            return tab_frame.table_view.table.tree
+        return self._ensure_tab_tree(tab_frame)
+    
+    def _selected_entries(self, tree):
+        # 树或表格中选中的分类和链接: [(路径, 条目)]，按在数据中的顺序
+        view = getattr(tree, "table_view", None)
+        if view is not None:
+            items, list_path = view.current_list
+            chosen = view.table.selected
+            return [((*list_path, i), item) for i, item in enumerate(items) if id(item) in chosen]
+        entries = []
+        for row in tree.selection():
+            if row not in tree.node_index:  # 占位行
+                continue
+            container, key = tree.node_index[row]
+            path = self._node_path(tree, row)
+            if path[-2] in ENTRY_LISTS and isinstance(container[key], dict):
+                entries.append((path, container[key]))
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+    
+    def _selected_links(self, tree, verb):
+        # 选中的链接；选中了分类时在状态栏提示已跳过
+        entries = self._selected_entries(tree)
+        links = [item for path, item in entries if path[-2] == "items" and "id" in item]
+        if not entries:
+            self.status_var.set(f"请先选择要{verb}的链接")
+        elif len(links) < len(entries):
+            self.status_var.set(f"只能{verb}链接，已跳过 {len(entries) - len(links)} 个分类或没有 id 的条目")
+        return links
+    
+    def _paste_target(self, tree):
+        # 粘贴和添加的位置: (分类 id, 下标)。选中链接时插入到它之后，选中其他节点时追加到
+        # 所在分类的 items 末尾，没有选中时追加到标签页对应的分类
+        view = getattr(tree, "table_view", None)
+        if view is not None:
+            items, list_path = view.current_list
+            if not list_path:
+                return None, None
+            entries = self._selected_entries(tree)
+            index = entries[-1][0][-1] + 1 if entries else None
+            return self.document.get_path(list_path[:-1]).get("id"), index
         
-        # 删除项
-        if isinstance(parent, list):
-            del parent[last_key]
-        elif isinstance(parent, dict):
-            del parent[last_key]
+        path, index = tree.root_path, None
+        selected = [row for row in tree.selection() if row in tree.node_index]
+        if selected:
+            path = max(self._node_path(tree, row) for row in selected)
+            if path[-2] == "items" and isinstance(path[-1], int):
+                index = path[-1] + 1
+                path = path[:-2]
+        for end in range(len(path), 1, -1):
+            if path[end - 2] in ("navigationItems", "subCategories") and isinstance(path[end - 1], int):
+                return self.document.get_path(path[:end]).get("id"), index
+        return None, None
+    
+    def _apply_bulk_step(self, step):
+        # 批量修改后只刷新涉及的标签页，且只刷新一次
+        self._refresh_changed_tabs(step.categories)
+        self.status_var.set(f"已{step.description}（未保存，{len(self.journal)} 处更改）")
     
     def copy_selected_item(self, tree):
-        # 此功能可以后续实现
-        pass
+        links = self._selected_links(tree, "复制")
+        if links:
+            # 复制当时的内容，之后的编辑不影响剪贴板
+            self.clipboard = ("copy", copy.deepcopy(links))
+            self.status_var.set(f"已复制 {len(links)} 个链接，粘贴时插入到所选位置")
+        return "break"
+    
+    def cut_selected_item(self, tree):
+        links = self._selected_links(tree, "剪切")
+        if links:
+            # 粘贴时才移动，剪切本身不修改数据
+            self.clipboard = ("cut", [item["id"] for item in links])
+            self.status_var.set(f"已剪切 {len(links)} 个链接，粘贴时移动到所选位置")
+        return "break"
     
     def paste_item_to_selected(self, tree):
-        # 此功能可以后续实现
-        pass
+        # 复制的链接插入副本，剪切的链接移动过来；跨分类时 id 按目标分类重新分配
+        if self.clipboard is None or not self.navigation_data or self._is_busy():
+            return "break"
+        target, index = self._paste_target(tree)
+        if target is None:
+            self.status_var.set("请先选择要粘贴到的分类")
+            return "break"
+        kind, payload = self.clipboard
+        # 树和表格中的编辑直接修改数据，id 索引可能已过期
+        self.document.invalidate_index()
+        try:
+            if kind == "cut":
+                step = self.document.move_items(payload, target, index)
+                self.clipboard = None  # 剪切的链接只能粘贴一次
+            else:
+                step = self.document.paste_items(payload, target, index)
+        except NavigationError as e:
+            self.show_error("粘贴失败", str(e))
+            return "break"
+        self._apply_bulk_step(step)
+        return "break"
+    
+    def move_selected_items(self, tree):
+        if self._is_busy():
+            return
+        links = self._selected_links(tree, "移动")
+        if not links:
+            return
+        target = self._choose_category(f"将 {len(links)} 个链接移动到")
+        if target is None:
+            return
+        self.document.invalidate_index()
+        try:
+            step = self.document.move_items([item["id"] for item in links], target)
+        except NavigationError as e:
+            self.show_error("移动失败", str(e))
+            return
+        self._apply_bulk_step(step)
+    
+    def _choose_category(self, title):
+        # 列出全部分类和子分类，返回所选分类的 id，取消时返回 None
+        choices = [(len(path) // 2 - 1, node) for path, node in self.document.iter_entries()
+                   if path[-2] in ("navigationItems", "subCategories") and "id" in node]
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("420x480")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        list_frame = ttk.Frame(dialog)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        listbox = tk.Listbox(list_frame, activestyle="dotbox")
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        listbox.pack(fill=tk.BOTH, expand=True)
+        listbox.config(yscrollcommand=scrollbar.set)
+        for depth, node in choices:
+            listbox.insert(tk.END, "    " * depth + str(node.get("title", "未命名")))
+        
+        chosen = []
+        
+        def on_ok(event=None):
+            selection = listbox.curselection()
+            if selection:
+                chosen.append(choices[selection[0]][1]["id"])
+                dialog.destroy()
+        
+        listbox.bind("<Double-1>", on_ok)
+        listbox.bind("<Return>", on_ok)
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(btn_frame, text="确定", command=on_ok).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="取消", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+        listbox.focus_set()
+        self.root.wait_window(dialog)
+        return chosen[0] if chosen else None
+    
+    def toggle_selected_items(self, tree):
+        # 所选条目中有启用的则全部禁用，否则全部启用
+        if self._is_busy():
+            return
+        entries = [(path, item) for path, item in self._selected_entries(tree) if "id" in item]
+        if not entries:
+            self.status_var.set("请先选择要启用或禁用的条目")
+            return
+        enabled = not any(item.get("enabled", True) for _, item in entries)
+        self.document.invalidate_index()
+        try:
+            changed = self.document.set_enabled([item["id"] for _, item in entries], enabled)
+        except NavigationError as e:
+            self.show_error("修改失败", str(e))
+            return
+        self._refresh_changed_tabs([self.document.category_at(path) for path, _ in entries])
+        self.status_var.set(f"已{'启用' if enabled else '禁用'} {len(changed)} 个条目"
+                            f"（未保存，{len(self.journal)} 处更改）")
     
     def add_item(self):
-        # 此功能可以后续实现
-        pass
+        # 在所选位置添加一个链接，id 按所在分类分配
+        tree = self._current_view()
+        if tree is None or not self.navigation_data or self._is_busy():
+            return
+        target, index = self._paste_target(tree)
+        if target is None:
+            self.status_var.set("请先选择要添加到的分类")
+            return
+        title = simpledialog.askstring("添加链接", "标题:")
+        if not title:
+            return
+        href = simpledialog.askstring("添加链接", "链接:", initialvalue="https://")
+        if href is None:
+            return
+        
+        self.document.invalidate_index()
+        try:
+            item = {"id": self.document.new_item_id(target), "title": title.strip(), "href": href.strip(),
+                    "description": "", "icon": "", "enabled": True}
+            with self.document.history.step(f"添加 {item['title']}") as step:
+                self.document.add_item(target, item, index)
+        except NavigationError as e:
+            self.show_error("添加失败", str(e))
+            return
+        self._apply_bulk_step(step)
     
     def delete_item(self):
-        # 获取当前选中的标签页
-        current_tab = self.notebook.select()
-        if current_tab:
-            # 获取标签页中的Treeview
-            tab_frame = self.notebook.nametowidget(current_tab)
-            tree = tab_frame.winfo_children()[0].winfo_children()[2]  # 获取Treeview组件
+        # 获取当前标签页中的Treeview组件（树视图或表格视图）
+        tree = self._current_view()
+        if tree is not None:
             self.delete_selected_item(tree)
     
     def copy_item(self):
-        # 获取当前选中的标签页
-        current_tab = self.notebook.select()
-        if current_tab:
-            # 获取标签页中的Treeview
-            tab_frame = self.notebook.nametowidget(current_tab)
-            tree = tab_frame.winfo_children()[0].winfo_children()[2]  # 获取Treeview组件
+        tree = self._current_view()
+        if tree is not None:
             self.copy_selected_item(tree)
     
+    def cut_item(self):
+        tree = self._current_view()
+        if tree is not None:
+            self.cut_selected_item(tree)
+    
     def paste_item(self):
-        # 获取当前选中的标签页
-        current_tab = self.notebook.select()
-        if current_tab:
-            # 获取标签页中的Treeview
-            tab_frame = self.notebook.nametowidget(current_tab)
-            tree = tab_frame.winfo_children()[0].winfo_children()[2]  # 获取Treeview组件
+        tree = self._current_view()
+        if tree is not None:
             self.paste_item_to_selected(tree)
     
-    def save_json(self):
+    def move_item(self):
+        tree = self._current_view()
+        if tree is not None:
+            self.move_selected_items(tree)
+    
+    def toggle_item(self):
+        tree = self._current_view()
+        if tree is not None:
+            self.toggle_selected_items(tree)
+    
+    def save_json(self, then=None):
+        # 在工作线程中创建备份并保存；保存期间不允许编辑，then 在保存成功后调用
         if not self.navigation_data:
             messagebox.showinfo("信息", "没有可保存的数据")
             return
+        file_name = os.path.basename(self.json_path)
+        if self._is_busy():
+            return
         
-        try:
-            # 创建备份
-            self.create_backup()
-            
-            # 保存文件
-            with open(self.json_path, 'w', encoding='utf-8') as file:
-                json.dump(self.navigation_data, file, ensure_ascii=False, indent=2)
-            
-            # 更新原始数据引用
-            self.original_data = json.dumps(self.navigation_data, ensure_ascii=False)
-            
+        # 存在校验错误时默认不保存，确认后跳过保存前的检查
+        errors = self.document.validator.errors
+        if errors:
+            shown = "\n".join(str(issue) for issue in errors[:10])
+            more = f"\n... 共 {len(errors)} 个错误" if len(errors) > 10 else ""
+            if not messagebox.askyesno("校验失败", f"数据中有错误，保存后会直接发布到网站：\n\n{shown}{more}\n\n"
+                                                  "是否仍然保存？", default=messagebox.NO):
+                self.status_var.set(f"存在 {len(errors)} 个错误，未保存")
+                self.show_validation()
+                return
+        
+        def save(report, cancel):
+            # 创建备份并保存文件，保存后清空修改记录（内容未变化时不写入）
+            return self.document.save(backup=True, progress=lambda done: report(
+                f"正在保存 {file_name}: 已处理 {done / 1048576:.1f} MB"), validate=False if errors else None)
+        
+        def on_saved(written):
             # 更新状态
-            self.status_var.set(f"已保存文件: {os.path.basename(self.json_path)}")
-            messagebox.showinfo("成功", "文件已成功保存")
-            
-        except Exception as e:
-            self.show_error("保存错误", f"保存文件时出错: {str(e)}")
+            if written:
+                self.status_var.set(f"已保存文件: {file_name}")
+            else:
+                self.status_var.set(f"文件内容未变化: {file_name}")
+            conflicts = self.document.save_conflicts
+            if conflicts is not None:
+                # 保存前合并了外部修改，数据可能已被替换
+                rebuilt = self._refresh_changed_tabs()
+                self.status_var.set(f"{file_name} 在保存前已被外部修改，合并后保存（更新了 {rebuilt} 个分类）")
+                self._show_merge_conflicts(conflicts, "（外部版本已在保存前备份）")
+            self._schedule_git_commit()
+            if then is not None:
+                then()
+            elif written:
+                messagebox.showinfo("成功", "文件已成功保存")
+        
+        self._start_task("保存文件", save, on_saved,
+                         lambda e: self.show_error("保存错误", f"保存文件时出错: {str(e)}"))
     
-    def backup_current_file(self):
+    def toggle_git_publishing(self):
+        # 开启后保存和恢复排队，最后一次保存后 GIT_COMMIT_DELAY_MS 内没有新的保存时合并提交
+        if not self.git_enabled.get():
+            if self.document.git_publisher is not None and self.document.git_publisher.pending:
+                if messagebox.askyesno("git 发布", "还有尚未提交的保存，是否现在提交？"):
+                    self.commit_to_git(then=self.toggle_git_publishing)
+                    self.git_enabled.set(True)
+                    return
+            if self.git_commit_timer is not None:
+                self.root.after_cancel(self.git_commit_timer)
+                self.git_commit_timer = None
+            self.document.git_publisher = None
+            self.status_var.set("已关闭 git 发布")
+            return
         try:
-            # 创建备份
-            backup_path = self.create_backup()
+            publisher = self.document.enable_git_publishing()
+        except GitPublishError as e:
+            self.git_enabled.set(False)
+            self.show_error("无法开启 git 发布", str(e))
+            return
+        self.status_var.set(f"已开启 git 发布: 保存后 {GIT_COMMIT_DELAY_MS // 1000} 秒内没有新的保存时提交到 "
+                            f"{publisher.repo}")
+    
+    def _schedule_git_commit(self):
+        if self.document.git_publisher is None:
+            return
+        if self.git_commit_timer is not None:
+            self.root.after_cancel(self.git_commit_timer)
+        self.git_commit_timer = self.root.after(GIT_COMMIT_DELAY_MS, self.commit_to_git)
+    
+    def commit_to_git(self, then=None):
+        # 在工作线程中把发布目录的改动写成一次提交；then 在提交成功后调用
+        if self.git_commit_timer is not None:
+            self.root.after_cancel(self.git_commit_timer)
+            self.git_commit_timer = None
+        publisher = self.document.git_publisher
+        if publisher is None:
+            messagebox.showinfo("信息", "请先在文件菜单中开启“保存后提交到 git”")
+            return
+        if self.task is not None:
+            # 其他文件操作结束后再提交
+            self._schedule_git_commit()
+            return
+        
+        def on_committed(commit):
+            if commit:
+                self.status_var.set(f"已提交到 git: {commit[:12]}")
+            else:
+                self.status_var.set("发布文件没有变化，未提交")
+            if then is not None:
+                then()
+        
+        self._start_task("提交到 git", lambda report, cancel: publisher.commit(), on_committed,
+                         lambda e: self.show_error("提交失败", f"提交到 git 时出错: {str(e)}"))
+    
+    def backup_current_file(self):
+        def on_created(backup_path):
+            self.status_var.set(f"备份已创建: {os.path.basename(backup_path)}")
             messagebox.showinfo("成功", f"备份已创建: {os.path.basename(backup_path)}")
-        except Exception as e:
-            self.show_error("备份错误", f"创建备份时出错: {str(e)}")
+        
+        self._start_task("创建备份", lambda report, cancel: self.create_backup(), on_created,
+                         lambda e: self.show_error("备份错误", f"创建备份时出错: {str(e)}"))
     
-    def create_backup(self):
-        # 生成备份文件名
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"navigation_{timestamp}.json"
-        backup_path = os.path.join(self.backup_dir, backup_filename)
+    def update_resource_metadata(self):
+        # 只重新计算新增或变化的资源文件，然后更新 resource-metadata.json
+        def on_updated(summary):
+            self.status_var.set(f"资源清单: {format_summary(summary)}")
+        
+        self._start_task("更新资源清单", lambda report, cancel: regenerate_metadata(), on_updated)
+    
+    def dedupe_icons(self):
+        # 分析在后台进行，结果窗口中可以改写引用或删除未引用的文件
+        if not self.navigation_data:
+            return
+        self._start_task("分析图标文件", lambda report, cancel: analyze(self.document), self._show_icon_report)
+    
+    def _show_icon_report(self, report):
+        self.status_var.set(f"图标文件 {len(report.files)} 个，重复 {len(report.remap)} 个，"
+                            f"未引用 {len(report.unreferenced)} 个，失效引用 {len(report.dangling)} 个")
+        report_window = tk.Toplevel(self.root)
+        report_window.title("图标去重与清理")
+        report_window.geometry("800x500")
+        report_window.transient(self.root)
+        
+        text = tk.Text(report_window, wrap=tk.NONE, font=("SimHei", 10))
+        text.insert("1.0", report.format())
+        text.config(state=tk.DISABLED)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def on_apply():
+            if self._is_busy():
+                return
+            count = apply_remap(self.document, report.remap)
+            if count:
+                self._revalidate()
+                self._rebuild_loaded_tabs()
+                self._set_modified_status()
+            report_window.destroy()
+            self.status_var.set(f"已改写 {count} 个图标引用（尚未保存），保存后可删除重复文件")
         
-        # 创建备份
-        shutil.copy2(self.json_path, backup_path)
-        return backup_path
+        def on_remove():
+            if self.has_unsaved_changes():
+                # 磁盘上的文件可能仍引用这些图标
+                messagebox.showinfo("信息", "请先保存更改，再删除未引用的文件", parent=report_window)
+                return
+            if not report.unreferenced:
+                return
+            if not messagebox.askyesno("确认删除", f"确定要删除 {len(report.unreferenced)} 个未引用的图标文件吗？",
+                                       parent=report_window):
+                return
+            report_window.destroy()
+            self._start_task("删除未引用的图标", lambda r, cancel: remove_unreferenced(report),
+                             lambda removed: self.status_var.set(f"已删除 {len(removed)} 个未引用的图标文件"))
+        
+        btn_frame = ttk.Frame(report_window)
+        btn_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(btn_frame, text="改写重复引用", command=on_apply,
+                   state=tk.NORMAL if report.remap else tk.DISABLED).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="删除未引用文件", command=on_remove,
+                   state=tk.NORMAL if report.unreferenced else tk.DISABLED).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="关闭", command=report_window.destroy).pack(side=tk.LEFT, padx=5)
+    
+    def import_links(self):
+        # 解析和查重在后台进行；确认后一次性插入（一个撤销步骤），只刷新涉及的标签页
+        if not self.navigation_data or self._is_busy():
+            return
+        source = filedialog.askopenfilename(
+            title="导入链接",
+            filetypes=[("书签、CSV 或 JSONL", "*.html *.htm *.csv *.jsonl *.ndjson"), ("所有文件", "*.*")]
+        )
+        if not source:
+            return
+        # 找不到匹配分类的链接放入当前选中的分类
+        default_category = self._selected_category_id()
+        
+        def plan(report, cancel):
+            return plan_import(self.document, iter_candidates(source), default_category, cancel)
+        
+        def on_planned(result):
+            summary = result.summary()
+            if not result.additions:
+                messagebox.showinfo("导入链接", summary)
+                self.status_var.set(summary)
+                return
+            if not messagebox.askyesno("导入链接", f"{summary}\n\n确定导入 {len(result.additions)} 个链接吗？"):
+                return
+            step = apply_import(self.document, result)
+            self._refresh_changed_tabs(step.categories)
+            self.status_var.set(f"已{step.description}（未保存，{len(self.journal)} 处更改）")
+        
+        self._start_task("解析导入文件", plan, on_planned)
+    
+    def _selected_category_id(self):
+        # 当前标签页中选中节点所在的分类（或子分类）的 id，没有选中时为标签页对应的分类
+        tree = self._current_view()
+        if tree is None:
+            return None
+        return self._paste_target(tree)[0]
+    
+    def toggle_timing(self):
+        # 开启后各阶段的耗时写入 timings.log，状态栏右侧显示最近一次操作的摘要
+        enabled = self.timing_enabled.get()
+        if enabled and profiler.log_dir is None:
+            try:
+                profiler.configure(DEFAULT_PROFILE_DIR)
+            except OSError as e:
+                self.timing_enabled.set(False)
+                self.show_error("无法开启计时", f"无法创建日志目录: {str(e)}")
+                return
+        profiler.enabled = enabled
+        if enabled:
+            self.status_var.set(f"已开启操作计时，日志: {os.path.join(profiler.log_dir, 'timings.log')}")
+            self._schedule_timing_poll()
+        else:
+            self.timing_var.set("")
+            self.status_var.set("已关闭操作计时")
+    
+    def capture_next_operation(self):
+        # 下一次操作（加载、保存、备份、恢复、展开节点等）在 cProfile 和 tracemalloc 下运行
+        if profiler.log_dir is None:
+            try:
+                profiler.configure(DEFAULT_PROFILE_DIR)
+            except OSError as e:
+                self.show_error("无法分析", f"无法创建日志目录: {str(e)}")
+                return
+        profiler.capture_next()
+        self.status_var.set(f"将分析下一次操作，结果保存到 {profiler.log_dir}")
+        self._schedule_timing_poll()
+    
+    def _schedule_timing_poll(self):
+        if self.timing_poll is None:
+            self.timing_poll = self.root.after(TIMING_POLL_MS, self._poll_timing)
+    
+    def _poll_timing(self):
+        # 记录可能在工作线程中产生，这里在主线程中读取最新一条
+        self.timing_poll = None
+        record = profiler.last
+        if record is not None and record is not self.shown_timing:
+            self.shown_timing = record
+            self.timing_var.set(format_record(record))
+        if profiler.enabled or profiler.capturing:
+            self._schedule_timing_poll()
+    
+    def _rebuild_loaded_tabs(self):
+        # 数据在编辑器之外被批量修改后，重建已经创建的树和表格
+        for tab_id in self.notebook.tabs():
+            tab_frame = self.notebook.nametowidget(tab_id)
+            if getattr(tab_frame, "tree", None) is None:
+                continue
+            tab_frame.tree_stale = True
+            if tab_frame.view == "tree":
+                self._show_tree_view(tab_frame)
+            else:
+                tab_frame.table_view.table.render()
+    
+    def create_backup(self):
+        return self.document.create_backup()
     
     def restore_from_backup(self):
-        # 列出所有备份文件
+        # 列出所有备份（只读取备份清单）
         try:
-            backups = [f for f in os.listdir(self.backup_dir) if f.startswith("navigation_") and f.endswith(".json")]
-            backups.sort(reverse=True)  # 最新的备份在前
-            
-            if not backups:
+            total, _ = self.document.backups.query(limit=0)
+            if not total:
                 messagebox.showinfo("信息", "没有找到备份文件")
                 return
             
             # 创建选择对话框
             backup_window = tk.Toplevel(self.root)
             backup_window.title("选择备份文件")
-            backup_window.geometry("600x400")
+            backup_window.geometry("900x560")
             backup_window.transient(self.root)
             backup_window.grab_set()
             
-            # 创建列表框
-            listbox = tk.Listbox(backup_window, font=("SimHei", 10), width=80, height=20)
-            listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            # 过滤栏
+            filter_frame = ttk.Frame(backup_window)
+            filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
+            ttk.Label(filter_frame, text="过滤:").pack(side=tk.LEFT)
+            filter_var = tk.StringVar()
+            filter_entry = ttk.Entry(filter_frame, textvariable=filter_var, width=40)
+            filter_entry.pack(side=tk.LEFT, padx=5)
+            page_var = tk.StringVar()
+            ttk.Label(filter_frame, textvariable=page_var).pack(side=tk.RIGHT)
             
-            # 添加滚动条
-            scrollbar = ttk.Scrollbar(listbox, orient=tk.VERTICAL, command=listbox.yview)
+            # 备份列表
+            list_frame = ttk.Frame(backup_window)
+            list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            columns = ('created', 'size', 'categories', 'items', 'changes')
+            backup_tree = ttk.Treeview(list_frame, columns=columns, show='headings', selectmode='browse')
+            scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=backup_tree.yview)
             scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            listbox.config(yscrollcommand=scrollbar.set)
+            backup_tree.pack(fill=tk.BOTH, expand=True)
+            backup_tree.config(yscrollcommand=scrollbar.set)
+            for column, title, width in (('created', '时间', 150), ('size', '大小', 80), ('categories', '分类', 60),
+                                         ('items', '链接', 60), ('changes', '与上一版相比的变化', 500)):
+                backup_tree.heading(column, text=title)
+                backup_tree.column(column, width=width, minwidth=50)
             
-            # 填充列表
-            for backup in backups:
-                listbox.insert(tk.END, backup)
+            state = {"page": 0, "pages": 1}
+            page_size = 100
+            
+            def show_page():
+                total, entries = self.document.backups.query(filter_var.get().strip(),
+                                                             state["page"] * page_size, page_size)
+                backup_tree.delete(*backup_tree.get_children())
+                for entry in entries:
+                    info = entry.info
+                    changes = "; ".join(summarize_change(change) for change in info.get("changes", []))
+                    backup_tree.insert("", "end", iid=entry.name, values=(
+                        info.get("created", ""), f"{(info.get('size') or 0) / 1024:.1f} KB",
+                        info.get("categories", ""), info.get("items", ""), changes))
+                state["pages"] = max(1, (total + page_size - 1) // page_size)
+                page_var.set(f"第 {state['page'] + 1}/{state['pages']} 页，共 {total} 个备份")
+            
+            def change_page(step):
+                state["page"] = min(max(0, state["page"] + step), state["pages"] - 1)
+                show_page()
+            
+            def on_filter(*args):
+                state["page"] = 0
+                show_page()
+            
+            filter_var.trace_add("write", on_filter)
+            
+            def selected_backup():
+                selection = backup_tree.selection()
+                return selection[0] if selection else None
+            
+            # 预览差异：比较当前数据与所选备份，不修改任何文件
+            def on_preview():
+                name = selected_backup()
+                if not name:
+                    return
+                
+                def compare(report, cancel):
+                    backup_data = self.document.backups.load_data(name)
+                    return format_diff(diff_navigation(self.navigation_data, backup_data))
+                
+                def show(diff_text):
+                    self.status_var.set(f"已比较备份 {name}")
+                    if not backup_window.winfo_exists():
+                        return
+                    preview_window = tk.Toplevel(backup_window)
+                    preview_window.title(f"恢复 {name} 将带来的变化")
+                    preview_window.geometry("700x450")
+                    text = tk.Text(preview_window, wrap=tk.WORD, font=("SimHei", 10))
+                    text.insert("1.0", diff_text)
+                    text.config(state=tk.DISABLED)
+                    text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+                    ttk.Button(preview_window, text="关闭", command=preview_window.destroy).pack(pady=5)
+                
+                self._start_task("比较备份", compare, show)
             
             # 选择按钮
             def on_select():
-                selection = listbox.curselection()
-                if selection:
-                    selected_backup = listbox.get(selection[0])
-                    backup_path = os.path.join(self.backup_dir, selected_backup)
-                    
+                selected = selected_backup()
+                if selected:
                     # 确认恢复
-                    if messagebox.askyesno("确认恢复", f"确定要从备份 '{selected_backup}' 恢复吗？\n这将覆盖当前文件。"):
-                        # 创建当前文件的备份
-                        self.create_backup()
-                        
-                        # 复制备份文件到原始位置
-                        shutil.copy2(backup_path, self.json_path)
-                        
-                        # 重新加载数据
-                        self.load_navigation_json()
+                    if messagebox.askyesno("确认恢复", f"确定要从备份 '{selected}' 恢复吗？\n这将覆盖当前文件。"):
+                        def on_restored(name):
+                            backup_window.destroy()
+                            self._schedule_git_commit()
+                            # 重新加载数据
+                            self.load_navigation_json(then=lambda: messagebox.showinfo("成功", "已从备份恢复"))
                         
-                        backup_window.destroy()
-                        messagebox.showinfo("成功", "已从备份恢复")
+                        # 创建当前文件的备份，再复制备份文件到原始位置
+                        self._start_task("恢复备份", lambda report, cancel: self.document.restore_backup(selected),
+                                         on_restored,
+                                         lambda e: self.show_error("恢复错误", f"恢复备份时出错: {str(e)}"))
             
             # 按钮框架
             btn_frame = ttk.Frame(backup_window)
             btn_frame.pack(fill=tk.X, padx=10, pady=10)
             
-            ttk.Button(btn_frame, text="选择", command=on_select).pack(side=tk.LEFT, padx=5)
+            ttk.Button(btn_frame, text="上一页", command=lambda: change_page(-1)).pack(side=tk.LEFT, padx=5)
+            ttk.Button(btn_frame, text="下一页", command=lambda: change_page(1)).pack(side=tk.LEFT, padx=5)
+            ttk.Button(btn_frame, text="预览差异", command=on_preview).pack(side=tk.LEFT, padx=5)
+            ttk.Button(btn_frame, text="恢复", command=on_select).pack(side=tk.LEFT, padx=5)
             ttk.Button(btn_frame, text="取消", command=backup_window.destroy).pack(side=tk.LEFT, padx=5)
             
+            show_page()
+            filter_entry.focus_set()
+            
         except Exception as e:
             self.show_error("恢复错误", f"恢复备份时出错: {str(e)}")
     
     def has_unsaved_changes(self):
-        if not self.navigation_data or not self.original_data:
+        if not self.navigation_data:
             return False
-        return json.dumps(self.navigation_data, ensure_ascii=False) != self.original_data
+        with profiler.stage("dirty_check"):
+            return self.journal.is_dirty
     
     def on_closing(self):
+        # 文件操作进行中时不关闭，避免写到一半的文件
+        if self._is_busy():
+            return
+        
         # 检查是否有未保存的更改
         if self.has_unsaved_changes():
             response = messagebox.askyesnocancel("未保存的更改", 
                                                "您有未保存的更改。是否保存当前内容？")
             if response is None:  # 取消操作
                 return
-            if response:  # 保存更改
-                self.save_json()
+            if response:  # 保存完成后关闭窗口
+                self.save_json(then=self.on_closing)
+                return
+        
+        # 排队等待提交的保存在关闭前提交
+        if self.document.git_publisher is not None and self.document.git_publisher.pending:
+            self.commit_to_git(then=self.root.destroy)
+            return
         
         # 关闭窗口
         self.root.destroy()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# tools 下的模块按文件名互相导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
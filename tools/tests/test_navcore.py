@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+from navcore import NavigationDocument
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, ensure_ascii=False, indent=2)
+
+
+def catalog(*titles):
+    return {"navigationItems": [
+        {"id": "1", "title": "分类", "items": [{"id": f"1_{i}", "title": title, "href": f"https://example.com/{i}"}
+                                              for i, title in enumerate(titles, 1)]},
+    ]}
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "navigation.json"
+    write_json(str(path), catalog("a", "b"))
+    document = NavigationDocument(str(path), str(tmp_path / "backups"))
+    document.write_shards = document.write_search_index = document.write_compressed = False
+    document.load()
+    return document
+
+
+def test_save_merges_external_change_instead_of_overwriting(document):
+    document.data["navigationItems"][0]["items"][0]["title"] = "本地"
+    write_json(document.json_path, catalog("a", "外部"))
+    # 外部写入可能与上次加载落在同一时间戳内，改变修改时间保证能被发现
+    stat = os.stat(document.json_path)
+    os.utime(document.json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert document.disk_changed()
+    assert document.save(backup=False)
+    assert document.save_conflicts == []
+    with open(document.json_path, encoding="utf-8") as file:
+        saved = json.load(file)
+    assert [item["title"] for item in saved["navigationItems"][0]["items"]] == ["本地", "外部"]
+    assert not document.disk_changed()
+
+
+def test_save_records_state_of_written_bytes(document):
+    document.data["navigationItems"][0]["items"][1]["title"] = "c"
+    assert document.save(backup=False)
+    assert document.save_conflicts is None
+    known = document.disk_state
+    assert document.read_external_change() is None
+    assert document.disk_state.digest == known.digest
+    assert (document.disk_state.size, document.disk_state.mtime_ns) == (known.size, known.mtime_ns)
+
+    # 内容不变时不写入，仍记录磁盘上的版本
+    assert not document.save(backup=False)
+    assert document.disk_state.digest == known.digest
+    assert not document.disk_changed()
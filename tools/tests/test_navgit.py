@@ -0,0 +1,99 @@
+import os
+import subprocess
+
+import pytest
+
+from navgit import GitPublisher
+
+
+def git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True,
+                          text=True).stdout.strip()
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    remote = tmp_path / "remote.git"
+    work = tmp_path / "work"
+    subprocess.run(["git", "init", "-q", "--bare", "-b", "main", str(remote)], check=True)
+    subprocess.run(["git", "init", "-q", "-b", "main", str(work)], check=True)
+    # commit-tree 需要身份信息，测试机器上不一定配置过
+    git(work, "config", "user.name", "NavSphere Test")
+    git(work, "config", "user.email", "test@example.com")
+    git(work, "remote", "add", "origin", str(remote))
+    write(str(work / "README.md"), "readme\n")
+    git(work, "add", "README.md")
+    git(work, "commit", "-q", "-m", "init")
+    git(work, "push", "-q", "origin", "main")
+    content = work / "content"
+    write(str(content / "navigation.json"), '{"navigationItems": []}\n')
+    write(str(content / "dist" / "etags.json"), "{}\n")
+    return work
+
+
+def committed_files(work, rev="main"):
+    return set(git(work, "ls-tree", "-r", "--name-only", rev).splitlines())
+
+
+def test_queued_saves_become_one_commit(repo):
+    publisher = GitPublisher(str(repo), ["content"])
+    before = git(repo, "rev-parse", "main")
+    publisher.queue("保存 navigation.json")
+    write(str(repo / "content" / "navigation.json"), '{"navigationItems": [1]}\n')
+    publisher.queue("保存 navigation.json")
+
+    commit = publisher.commit()
+    assert commit == git(repo, "rev-parse", "main")
+    assert git(repo, "rev-list", "--count", f"{before}..main") == "1"
+    message = git(repo, "log", "-1", "--format=%B", "main")
+    assert message.startswith("更新导航数据（2 次保存）")
+    assert publisher.pending == []
+    assert {"content/navigation.json", "content/dist/etags.json"} <= committed_files(repo)
+    # 提交的文件也同步到了暂存区，工作区是干净的
+    assert git(repo, "status", "--porcelain") == ""
+    # 没有变化时不提交
+    assert publisher.commit() is None
+
+
+def test_deleted_files_are_dropped(repo):
+    publisher = GitPublisher(str(repo), ["content"])
+    publisher.commit()
+    os.remove(str(repo / "content" / "dist" / "etags.json"))
+    publisher.commit()
+    files = committed_files(repo)
+    assert "content/dist/etags.json" not in files
+    assert "content/navigation.json" in files
+
+
+def test_dotfiles_and_backups_are_excluded(repo):
+    write(str(repo / "content" / "backups" / "manifest.jsonl"), "{}\n")
+    write(str(repo / "content" / "dist" / ".sources.json"), "{}\n")
+    publisher = GitPublisher(str(repo), ["content"])
+    publisher.commit()
+    files = committed_files(repo)
+    assert not any("/backups/" in path for path in files)
+    assert "content/dist/.sources.json" not in files
+    assert "content/navigation.json" in files
+
+
+def test_commit_is_pushed_to_the_bare_remote(repo, tmp_path):
+    publisher = GitPublisher(str(repo), ["content"], remote="origin")
+    commit = publisher.commit("发布")
+    assert commit == git(repo, "rev-parse", "refs/heads/main")
+    assert commit == git(str(tmp_path / "remote.git"), "rev-parse", "refs/heads/main")
+    assert git(repo, "log", "-1", "--format=%s", "main") == "发布"
+
+
+def test_other_branch_leaves_checkout_alone(repo):
+    publisher = GitPublisher(str(repo), ["content"], branch="publish")
+    head = git(repo, "rev-parse", "HEAD")
+    commit = publisher.commit()
+    assert git(repo, "rev-parse", "refs/heads/publish") == commit
+    assert git(repo, "rev-parse", "HEAD") == head
+    assert "content/navigation.json" in committed_files(repo, "publish")
@@ -0,0 +1,157 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from navlinks import LinkCache, LinkChecker
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _handle(self):
+        server = self.server
+        path = self.path.split("?", 1)[0]
+        with server.lock:
+            server.requests.append((self.command, self.path, dict(self.headers)))
+        if path == "/ok":
+            if self.headers.get("If-None-Match") == ETAG:
+                self._reply(304, [("ETag", ETAG)])
+            else:
+                self._reply(200, [("ETag", ETAG), ("Last-Modified", LAST_MODIFIED)])
+        elif path == "/no-head":
+            self._reply(405 if self.command == "HEAD" else 200)
+        elif path == "/moved":
+            self._reply(301, [("Location", "/ok")])
+        elif path == "/loop-a":
+            self._reply(302, [("Location", "/loop-b")])
+        elif path == "/loop-b":
+            self._reply(302, [("Location", "/loop-a")])
+        elif path == "/slow":
+            with server.lock:
+                server.active += 1
+                server.max_active = max(server.max_active, server.active)
+                server.starts.append(time.monotonic())
+            time.sleep(0.05)
+            with server.lock:
+                server.active -= 1
+            self._reply(200)
+        else:
+            self._reply(404)
+
+    do_HEAD = _handle
+    do_GET = _handle
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.active = 0
+    httpd.max_active = 0
+    httpd.starts = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _checker(cache=None, **options):
+    options.setdefault("host_interval", 0)
+    return LinkChecker(cache=cache, timeout=5, **options)
+
+
+def test_ok_and_not_found(server):
+    results = _checker().check([f"{server.base}/ok", f"{server.base}/missing"])
+    ok = results[f"{server.base}/ok"]
+    assert ok["ok"] and ok["status"] == 200
+    assert ok["etag"] == ETAG and ok["last_modified"] == LAST_MODIFIED
+    missing = results[f"{server.base}/missing"]
+    assert not missing["ok"] and missing["status"] == 404
+
+
+def test_head_falls_back_to_get(server):
+    record = _checker().check([f"{server.base}/no-head"])[f"{server.base}/no-head"]
+    assert record["ok"] and record["status"] == 200
+    assert [method for method, _, _ in server.requests] == ["HEAD", "GET"]
+
+
+def test_redirect_is_followed(server):
+    record = _checker().check([f"{server.base}/moved"])[f"{server.base}/moved"]
+    assert record["ok"] and record["status"] == 200
+    assert record["final_url"] == f"{server.base}/ok"
+
+
+def test_redirect_loop_fails(server):
+    record = _checker().check([f"{server.base}/loop-a"])[f"{server.base}/loop-a"]
+    assert not record["ok"]
+    assert "重定向次数过多" in record["error"]
+
+
+def test_fresh_cache_skips_request(server, tmp_path):
+    url = f"{server.base}/ok"
+    cache = LinkCache(str(tmp_path / "links.json"), ttl=3600)
+    _checker(cache).check([url])
+    assert len(server.requests) == 1
+    results = _checker(LinkCache(str(tmp_path / "links.json"), ttl=3600)).check([url])
+    assert results[url]["ok"]
+    assert len(server.requests) == 1
+
+
+def test_expired_entry_revalidates_with_304(server, tmp_path):
+    url = f"{server.base}/ok"
+    path = str(tmp_path / "links.json")
+    _checker(LinkCache(path, ttl=3600)).check([url])
+
+    cache = LinkCache(path, ttl=3600)
+    cache.entries[url]["checked"] -= 7200  # 超过有效期
+    record = _checker(cache).check([url])[url]
+    assert record["ok"] and record["revalidated"] and record["status"] == 200
+    _, _, headers = server.requests[-1]
+    assert headers.get("If-None-Match") == ETAG
+    assert headers.get("If-Modified-Since") == LAST_MODIFIED
+    assert not cache.is_fresh(cache.get(url), now=record["checked"] + 3601)
+
+
+def test_force_ignores_fresh_cache(server, tmp_path):
+    url = f"{server.base}/ok"
+    cache = LinkCache(str(tmp_path / "links.json"), ttl=3600)
+    _checker(cache).check([url])
+    _checker(cache).check([url], force=True)
+    assert len(server.requests) == 2
+
+
+def test_per_host_concurrency_limit(server):
+    urls = [f"{server.base}/slow?n={i}" for i in range(8)]
+    results = _checker(per_host=2, concurrency=8).check(urls)
+    assert all(record["ok"] for record in results.values())
+    assert server.max_active == 2
+
+
+def test_per_host_interval(server):
+    urls = [f"{server.base}/slow?n={i}" for i in range(4)]
+    _checker(per_host=4, concurrency=4, host_interval=0.1).check(urls)
+    starts = sorted(server.starts)
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert len(gaps) == 3 and min(gaps) >= 0.08
+
+
+def test_non_http_links_are_skipped(server):
+    record = _checker().check(["mailto:someone@example.com"])["mailto:someone@example.com"]
+    assert record["ok"] and record["skipped"]
+    assert not server.requests